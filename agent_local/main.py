@@ -1,4 +1,5 @@
 import subprocess
+from contextlib import nullcontext
 from pathlib import Path
 
 import requests
@@ -11,6 +12,16 @@ from pydantic import BaseModel
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    from dark8_core.llm.gateway import GatewayBusy, GatewayTimeout, get_gateway
+except ImportError:  # standalone image without dark8_core: no shared admission control
+    get_gateway = None
+
+    class GatewayBusy(Exception):
+        pass
+
+    GatewayTimeout = GatewayBusy
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 CONFIG_PATH = BASE_DIR / "config" / "ollama.yaml"
 
@@ -130,7 +141,12 @@ def agent_chat(req: ChatRequest):
     retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
     session.mount("http://", HTTPAdapter(max_retries=retries))
     try:
-        r = session.post(url, json=payload, timeout=30)
+        if get_gateway is not None:
+            # interactive: admitted ahead of agent and background work
+            with get_gateway().slot(payload["model"] or "", priority="interactive", timeout=30):
+                r = session.post(url, json=payload, timeout=30)
+        else:
+            r = session.post(url, json=payload, timeout=30)
         r.raise_for_status()
         try:
             return r.json()
@@ -138,6 +154,8 @@ def agent_chat(req: ChatRequest):
             return {"text": r.text}
     except requests.RequestException as e:
         raise HTTPException(status_code=502, detail=str(e))
+    except (GatewayBusy, GatewayTimeout) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
 
 
 @app.post("/agent/chat_stream")
@@ -150,17 +168,32 @@ def agent_chat_stream(req: ChatRequest):
     endpoint = cfg.get("endpoint", "/v1/chat/completions")
     url = f"http://{host}:{port}{endpoint}"
     payload = {"model": req.model or cfg.get("model"), "prompt": req.prompt}
+    if get_gateway is not None:
+        # interactive, like /agent/chat; the slot is held until the stream ends
+        slot = get_gateway().slot(payload["model"] or "", priority="interactive", timeout=30)
+    else:
+        slot = nullcontext()
+
+    def iter_stream():
+        with slot:
+            r = requests.post(url, json=payload, stream=True, timeout=60)
+            try:
+                yield b""
+                for chunk in r.iter_content(chunk_size=1024):
+                    if chunk:
+                        yield chunk
+            finally:
+                r.close()
+
+    stream = iter_stream()
     try:
-        r = requests.post(url, json=payload, stream=True, timeout=60)
+        # run up to the first yield: take the slot and open the upstream response,
+        # so failures are still proper HTTP errors; from here on closing the
+        # generator (or dropping it) releases the slot
+        next(stream)
     except requests.RequestException as e:
         raise HTTPException(status_code=502, detail=str(e))
+    except (GatewayBusy, GatewayTimeout) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
 
-    def iter_stream():
-        try:
-            for chunk in r.iter_content(chunk_size=1024):
-                if chunk:
-                    yield chunk
-        finally:
-            r.close()
-
-    return StreamingResponse(iter_stream(), media_type="text/plain")
+    return StreamingResponse(stream, media_type="text/plain")
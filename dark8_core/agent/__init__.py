@@ -159,7 +159,7 @@ class ToolExecutor:
 
             paths = params.get("paths")
             if paths and FileSearchSource is not None:
-                extra.append(FileSearchSource(paths=paths))
+                extra.append(FileSearchSource(paths=paths, catalog_path=params.get("catalog_path")))
 
             # support searching a provided DB by setting use_db=True
             use_db = bool(params.get("use_db", False))
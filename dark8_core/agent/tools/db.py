@@ -1,17 +1,22 @@
 """Database tools for agent execution.
 
-Provides a small async-compatible wrapper around SQLite operations the
-agent can call as a tool. Exposes `db_execute(params)` which accepts
+Provides SQLite helpers (sync, plus `AsyncDatabase` for use from async
+code) and a wrapper the agent can call as a tool. Exposes `db_execute(params)` which accepts
 an action ("bootstrap", "query", "insert") and returns a JSON-serializable
 result dict.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import sqlite3
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import threading
 import time
+import weakref
 
 from pathlib import Path
 
@@ -38,21 +43,222 @@ def _resolve_db_path(params: Dict[str, Any]) -> Optional[str]:
     return None
 
 
+class _ThreadConns:
+    """One thread's pooled connections: path -> (conn, inode, flags, generation).
+
+    Held only by the thread's `threading.local`, so when the thread exits
+    this goes away and its connections are closed with it.
+    """
+
+    __slots__ = ("conns", "__weakref__")
+
+    def __init__(self):
+        self.conns: Dict[str, Tuple[sqlite3.Connection, Optional[int], set, int]] = {}
+
+    def __del__(self):
+        for entry in self.conns.values():
+            try:
+                entry[0].close()
+            except Exception:
+                pass
+
+
+class ConnectionPool:
+    """Per-database, thread-affine pool of reusable SQLite connections.
+
+    Each thread gets its own connection per database path (sqlite3 connections
+    must not be shared between threads mid-statement), opened once and reused
+    by every helper in this module. Connections are tuned for many small
+    writes: WAL journal, synchronous=NORMAL, memory-mapped I/O and a larger
+    prepared-statement cache.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 5.0,
+        cached_statements: int = 256,
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size_kib: int = 16 * 1024,
+    ):
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self._local = threading.local()
+        # every live thread's connections; entries vanish when their thread exits
+        self._threads: "weakref.WeakSet[_ThreadConns]" = weakref.WeakSet()
+        # bumped by close_all(); a cached connection from an older generation is closed
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _open(self, path: str) -> sqlite3.Connection:
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # check_same_thread=False only so close_all() may run from any thread;
+        # connections are still handed out to their owning thread only
+        conn = sqlite3.connect(
+            path,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+            conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"DB pragma setup failed for {path}: {e}")
+        return conn
+
+    @staticmethod
+    def _inode(path: str) -> Optional[int]:
+        try:
+            return Path(path).stat().st_ino
+        except OSError:
+            return None
+
+    def _thread_conns(self) -> Dict[str, Tuple[sqlite3.Connection, Optional[int], set, int]]:
+        local = getattr(self._local, "state", None)
+        if local is None:
+            local = self._local.state = _ThreadConns()
+            with self._lock:
+                self._threads.add(local)
+        return local.conns
+
+    def get(self, path: str) -> sqlite3.Connection:
+        conns = self._thread_conns()
+        generation = self._generations.get(path, 0)
+        entry = conns.get(path)
+        if entry is not None:
+            conn, inode, _, opened_in = entry
+            if opened_in != generation:
+                # closed by close_all() from some thread; just forget it
+                del conns[path]
+            # reopen if the file was deleted/replaced under a cached connection
+            elif path == ":memory:" or self._inode(path) == inode:
+                return conn
+            else:
+                self._discard(path, conn)
+        conn = self._open(path)
+        conns[path] = (conn, self._inode(path) if path != ":memory:" else None, set(), generation)
+        return conn
+
+    def flags(self, path: str) -> set:
+        """Per-connection scratch set, e.g. to remember that a schema was verified.
+
+        It is reset whenever the underlying connection is reopened.
+        """
+        self.get(path)
+        return self._local.state.conns[path][2]
+
+    def _discard(self, path: str, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        conns = self._thread_conns()
+        if conns.get(path, (None,))[0] is conn:
+            del conns[path]
+
+    def close_all(self, path: Optional[str] = None) -> None:
+        """Close pooled connections (all, or only those for `path`) in every thread.
+
+        Other threads notice on their next get() and open a fresh connection.
+        """
+        with self._lock:
+            threads = list(self._threads)
+            drop = []
+            for local in threads:
+                for p, entry in list(local.conns.items()):
+                    if (path is None or p == path) and entry[3] == self._generations.get(p, 0):
+                        drop.append(entry[0])
+            for p in [path] if path is not None else {p for local in threads for p in local.conns}:
+                self._generations[p] = self._generations.get(p, 0) + 1
+        for conn in drop:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+_pool = ConnectionPool()
+
+
+def get_pool() -> ConnectionPool:
+    return _pool
+
+
 def _connect(path: str) -> sqlite3.Connection:
-    Path(path).parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(path, timeout=5)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Return this thread's pooled connection for `path` (do not close it)."""
+    return _pool.get(path)
+
+
+def close_connections(db_path: Optional[str] = None) -> None:
+    """Close pooled connections, e.g. before deleting or moving a database file."""
+    _pool.close_all(db_path)
+
+
+@contextmanager
+def _transaction(db_path: str):
+    """Yield a cursor on the pooled connection; commit on success, roll back on error."""
+    conn = _connect(db_path)
+    cur = conn.cursor()
+    try:
+        yield cur
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
 
 
 # simple per-db locks to serialize schema/FTS operations
 _db_locks: Dict[str, threading.RLock] = {}
+_db_locks_guard = threading.Lock()
+
+
+def _get_db_lock(path: str) -> threading.RLock:
+    lock = _db_locks.get(path)
+    if lock is None:
+        with _db_locks_guard:
+            lock = _db_locks.setdefault(path, threading.RLock())
+    return lock
+
+
+# callbacks notified with the db path after document writes (e.g. search cache
+# invalidation); bound methods are held weakly so listeners can be collected
+_write_listeners: List[Any] = []
 
 
-def _get_db_lock(path: str) -> threading.Lock:
-    if path not in _db_locks:
-        _db_locks[path] = threading.RLock()
-    return _db_locks[path]
+def add_write_listener(callback) -> None:
+    """Register `callback(db_path)` to be called after documents are written."""
+    ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+    _write_listeners.append(ref)
+
+
+def remove_write_listener(callback) -> None:
+    for ref in list(_write_listeners):
+        if ref() == callback:
+            _write_listeners.remove(ref)
+
+
+def _notify_write(db_path: str) -> None:
+    for ref in list(_write_listeners):
+        cb = ref()
+        if cb is None:
+            try:
+                _write_listeners.remove(ref)
+            except ValueError:
+                pass
+            continue
+        try:
+            cb(db_path)
+        except Exception as e:
+            logger.error(f"DB write listener error: {e}")
 
 
 def _serialize_rows(rows: List[sqlite3.Row]) -> List[Dict[str, Any]]:
@@ -68,45 +274,49 @@ def bootstrap_db(db_path: str) -> Dict[str, Any]:
     Currently creates a `migrations` table used by bootstrapping logic.
     """
     try:
-        conn = _connect(db_path)
-        cur = conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS migrations (
-                id TEXT PRIMARY KEY,
-                applied_at TEXT
+        with _transaction(db_path) as cur:
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS migrations (
+                    id TEXT PRIMARY KEY,
+                    applied_at TEXT
+                )
+                """
             )
-            """
-        )
-        conn.commit()
-        cur.close()
-        conn.close()
         return {"success": True, "message": "bootstrapped", "path": db_path}
     except Exception as e:
         logger.error(f"DB bootstrap error: {e}")
         return {"success": False, "error": str(e)}
 
 
-def run_query(db_path: str, sql: str, params: Tuple = ()) -> Dict[str, Any]:
+def _execute_once(db_path: str, sql: str, params: Tuple = (), as_tuples: bool = False) -> Dict[str, Any]:
+    """Run one statement without retrying; sqlite3 errors propagate to the caller."""
+    with _transaction(db_path) as cur:
+        if as_tuples:
+            cur.row_factory = None
+        cur.execute(sql, params)
+        # any statement producing a result set (SELECT, WITH ..., PRAGMA, RETURNING)
+        if cur.description is not None:
+            rows = cur.fetchall()
+            if as_tuples:
+                return {"success": True, "columns": [d[0] for d in cur.description], "rows": rows}
+            return {"success": True, "rows": _serialize_rows(rows)}
+        # non-select -> committed by _transaction
+        affected = cur.rowcount
+    return {"success": True, "affected": affected}
+
+
+def run_query(db_path: str, sql: str, params: Tuple = (), as_tuples: bool = False) -> Dict[str, Any]:
+    """Run a statement with retry on busy/locked errors.
+
+    Result sets come back as a list of dicts, or with `as_tuples=True` as
+    {"columns": [...], "rows": [tuple, ...]} which is much cheaper for wide or
+    large results.
+    """
     attempts = 0
     while True:
         try:
-            conn = _connect(db_path)
-            cur = conn.cursor()
-            cur.execute(sql, params)
-            if sql.strip().lower().startswith("select"):
-                rows = cur.fetchall()
-                data = _serialize_rows(rows)
-                cur.close()
-                conn.close()
-                return {"success": True, "rows": data}
-
-            # non-select -> commit
-            conn.commit()
-            affected = cur.rowcount
-            cur.close()
-            conn.close()
-            return {"success": True, "affected": affected}
+            return _execute_once(db_path, sql, params, as_tuples)
         except sqlite3.OperationalError as e:
             attempts += 1
             if attempts > 5:
@@ -133,18 +343,77 @@ def run_query_single(db_path: str, sql: str, params: Tuple = ()) -> Optional[Dic
     return rows[0] if rows else None
 
 
+class RowStream:
+    """Iterate a SELECT in fixed-size chunks without materializing the result.
+
+    Iterating yields lists of at most `chunk_size` rows (dicts, or plain tuples
+    with `as_tuples=True`); `columns` is filled in once the statement has run.
+    The cursor is closed when iteration finishes or the generator is closed.
+    """
+
+    def __init__(
+        self, db_path: str, sql: str, params: Tuple = (), chunk_size: int = 1000, as_tuples: bool = False
+    ):
+        self.db_path = db_path
+        self.sql = sql
+        self.params = tuple(params)
+        self.chunk_size = max(1, int(chunk_size))
+        self.as_tuples = as_tuples
+        self.columns: List[str] = []
+
+    def __iter__(self) -> Iterator[List[Any]]:
+        cur = _connect(self.db_path).cursor()
+        cur.row_factory = None
+        try:
+            cur.execute(self.sql, self.params)
+            self.columns = [d[0] for d in (cur.description or ())]
+            cols = self.columns
+            while True:
+                chunk = cur.fetchmany(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk if self.as_tuples else [dict(zip(cols, row)) for row in chunk]
+        finally:
+            cur.close()
+
+    def rows(self) -> Iterator[Any]:
+        """Flat row iterator over all chunks."""
+        for chunk in self:
+            yield from chunk
+
+
+def iter_query(
+    db_path: str, sql: str, params: Tuple = (), chunk_size: int = 1000, as_tuples: bool = False
+) -> RowStream:
+    """Return a RowStream for `sql` (see RowStream)."""
+    return RowStream(db_path, sql, params, chunk_size, as_tuples)
+
+
+async def aiter_query(
+    db_path: str, sql: str, params: Tuple = (), chunk_size: int = 1000, as_tuples: bool = False
+):
+    """Async iterator version of iter_query; each chunk is fetched on the DB worker thread."""
+    adb = get_async_db(db_path)
+    it = iter(RowStream(db_path, sql, params, chunk_size, as_tuples))
+    done = object()
+    try:
+        while True:
+            chunk = await adb.run(next, it, done)
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        await adb.run(it.close)
+
+
 def run_write(db_path: str, sql: str, params: Tuple = ()) -> Dict[str, Any]:
     """Execute a write (INSERT/UPDATE/DELETE) and return affected count."""
     attempts = 0
     while True:
         try:
-            conn = _connect(db_path)
-            cur = conn.cursor()
-            cur.execute(sql, params)
-            conn.commit()
-            affected = cur.rowcount
-            cur.close()
-            conn.close()
+            with _transaction(db_path) as cur:
+                cur.execute(sql, params)
+                affected = cur.rowcount
             return {"success": True, "affected": affected}
         except sqlite3.OperationalError as e:
             attempts += 1
@@ -158,18 +427,46 @@ def run_write(db_path: str, sql: str, params: Tuple = ()) -> Dict[str, Any]:
             return {"success": False, "error": str(e)}
 
 
+_DOCUMENTS_DDL = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT,
+    content TEXT NOT NULL,
+    tags TEXT,
+    metadata TEXT
+)
+"""
+
+# External-content FTS5 index over `documents`: the text lives only in
+# `documents`, the triggers below keep the index in sync on every write.
+# prefix= adds 2- and 3-character prefix indexes so `term*` queries are lookups.
+_FTS_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, content, tags, content='documents', content_rowid='id', prefix='2 3'
+)
+"""
+
+_FTS_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS documents_fts_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, title, content, tags)
+    VALUES (new.id, COALESCE(new.title, ''), new.content, COALESCE(new.tags, ''));
+END;
+CREATE TRIGGER IF NOT EXISTS documents_fts_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, content, tags)
+    VALUES ('delete', old.id, COALESCE(old.title, ''), old.content, COALESCE(old.tags, ''));
+END;
+CREATE TRIGGER IF NOT EXISTS documents_fts_au AFTER UPDATE OF title, content, tags ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, content, tags)
+    VALUES ('delete', old.id, COALESCE(old.title, ''), old.content, COALESCE(old.tags, ''));
+    INSERT INTO documents_fts(rowid, title, content, tags)
+    VALUES (new.id, COALESCE(new.title, ''), new.content, COALESCE(new.tags, ''));
+END;
+"""
+
+
 def ensure_documents_table(db_path: str) -> Dict[str, Any]:
     """Create the `documents` table and a simple index if missing."""
-    sql = """
-    CREATE TABLE IF NOT EXISTS documents (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT,
-        content TEXT NOT NULL,
-        tags TEXT,
-        metadata TEXT
-    )
-    """
-    res = run_query(db_path, sql)
+    res = run_query(db_path, _DOCUMENTS_DDL)
     # create index on content for LIKE queries
     try:
         run_query(db_path, "CREATE INDEX IF NOT EXISTS idx_documents_content ON documents(content)")
@@ -178,58 +475,95 @@ def ensure_documents_table(db_path: str) -> Dict[str, Any]:
     return res
 
 
+def _fts_is_external(cur: sqlite3.Cursor) -> Optional[bool]:
+    """True/False for an existing documents_fts table, None if it does not exist.
+
+    Only a table in the current layout (external content with prefix indexes)
+    counts as True; anything older needs a migration.
+    """
+    cur.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='documents_fts'")
+    row = cur.fetchone()
+    if row is None:
+        return None
+    ddl = (row[0] or "").replace(" ", "").lower()
+    return "content=" in ddl and "prefix=" in ddl
+
+
 def ensure_fts5(db_path: str) -> Dict[str, Any]:
-    """Ensure FTS5 virtual table and triggers exist for `documents` table."""
-    # create virtual table
+    """Ensure the external-content FTS5 table and its sync triggers exist.
+
+    Databases created with the old standalone `documents_fts` table (which
+    stored every document twice) or without prefix indexes are migrated in
+    place: the old table is dropped, recreated in the current layout and
+    rebuilt from `documents`.
+    """
+    if "fts5" in _pool.flags(db_path):
+        return {"success": True, "migrated": False}
     try:
         lock = _get_db_lock(db_path)
         with lock:
-            conn = _connect(db_path)
-            cur = conn.cursor()
-            # create a standalone FTS5 table with columns for boosting
-            cur.executescript(
-                """
-                CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
-                    title, content, tags
-                );
-                """
-            )
-            conn.commit()
-            cur.close()
-            conn.close()
-            return {"success": True}
+            ensure_documents_table(db_path)
+            with _transaction(db_path) as cur:
+                external = _fts_is_external(cur)
+                if external is False:
+                    logger.info(f"Migrating documents_fts to external-content FTS5: {db_path}")
+                    cur.execute("DROP TABLE documents_fts")
+                cur.execute(_FTS_DDL)
+                for stmt in _FTS_TRIGGERS.split("END;"):
+                    if stmt.strip():
+                        cur.execute(stmt + "END;")
+                if external is not True:
+                    # new or migrated index: populate it from the content table
+                    cur.execute("INSERT INTO documents_fts(documents_fts) VALUES('rebuild')")
+            _pool.flags(db_path).add("fts5")
+            return {"success": True, "migrated": external is False}
     except Exception as e:
         logger.error(f"ensure_fts5 error: {e}")
         return {"success": False, "error": str(e)}
 
 
+def optimize_fts(db_path: str, merge_pages: Optional[int] = None) -> Dict[str, Any]:
+    """FTS5 maintenance.
+
+    Without `merge_pages` runs 'optimize' (merge all index segments into one,
+    best after bulk loads). With `merge_pages` runs an incremental 'merge' that
+    does at most that much work, suitable for periodic background upkeep.
+    """
+    lock = _get_db_lock(db_path)
+    with lock:
+        try:
+            ensure_fts5(db_path)
+            with _transaction(db_path) as cur:
+                if merge_pages:
+                    cur.execute(
+                        "INSERT INTO documents_fts(documents_fts, rank) VALUES('merge', ?)",
+                        (int(merge_pages),),
+                    )
+                else:
+                    cur.execute("INSERT INTO documents_fts(documents_fts) VALUES('optimize')")
+            return {"success": True, "action": "merge" if merge_pages else "optimize"}
+        except Exception as e:
+            logger.error(f"optimize_fts error: {e}")
+            return {"success": False, "error": str(e)}
+
+
 def rebuild_fts_index(db_path: str) -> Dict[str, Any]:
     """Rebuild FTS index from `documents` table."""
     lock = _get_db_lock(db_path)
     with lock:
         try:
-            conn = _connect(db_path)
-            cur = conn.cursor()
             # ensure fts exists
             ensure_fts5(db_path)
-
-            # prefer FTS5 rebuild mechanism to avoid manually manipulating
-            # internal FTS tables which can lead to corruption
-            cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='documents_fts'")
-            if cur.fetchone():
-                try:
-                    cur.execute("INSERT INTO documents_fts(documents_fts) VALUES('rebuild')")
-                except sqlite3.DatabaseError as e:
-                    logger.error(f"rebuild_fts_index: rebuild failed: {e}")
-                    cur.close()
-                    conn.close()
-                    return {"success": False, "error": str(e)}
-            else:
-                # no fts table, create it and let ensure_fts5 handle creation
-                ensure_fts5(db_path)
-            conn.commit()
-            cur.close()
-            conn.close()
+            with _transaction(db_path) as cur:
+                # prefer FTS5 rebuild mechanism to avoid manually manipulating
+                # internal FTS tables which can lead to corruption
+                cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='documents_fts'")
+                if cur.fetchone():
+                    try:
+                        cur.execute("INSERT INTO documents_fts(documents_fts) VALUES('rebuild')")
+                    except sqlite3.DatabaseError as e:
+                        logger.error(f"rebuild_fts_index: rebuild failed: {e}")
+                        return {"success": False, "error": str(e)}
             return {"success": True}
         except Exception as e:
             logger.error(f"rebuild_fts_index error: {e}")
@@ -241,11 +575,18 @@ def search_fts(
 ) -> List[Dict[str, Any]]:
     """Search FTS5 virtual table. Supports optional BM25 weights tuple (title, content, tags).
 
+    `query` is user input (parsed with dark8_core.search.query, so punctuation
+    and diacritics are safe) or an already parsed query node.
     Returns list of dicts with id, snippet, score.
     """
     out: List[Dict[str, Any]] = []
     if not query:
         return out
+    from dark8_core.search.query import parse_query, to_fts5
+
+    match = to_fts5(parse_query(query) if isinstance(query, str) else query)
+    if not match:
+        return out
     if weights is None:
         weights = (1.0, 1.0, 1.0)
     try:
@@ -255,7 +596,7 @@ def search_fts(
             "snippet(documents_fts, -1, '<b>', '</b>', '...', 10) as snippet "
             "FROM documents_fts WHERE documents_fts MATCH ? ORDER BY score ASC LIMIT ?"
         )
-        params = (weights[0], weights[1], weights[2], query, limit)
+        params = (weights[0], weights[1], weights[2], match, limit)
         res = run_query(db_path, sql, params)
         if not res.get("success"):
             return out
@@ -266,6 +607,100 @@ def search_fts(
         return out
 
 
+# Character-trigram index (FTS5 `trigram` tokenizer) next to documents_fts, used
+# to find typo-tolerant candidates before fuzzy scoring. Opt-in: it costs write
+# amplification on every insert, so it is only built by ensure_trigram_index()
+# (at ingest or through the 'trigram_migrate' action), never on the read path.
+_TRIGRAM_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_trigram USING fts5(
+    content, content='documents', content_rowid='id', tokenize='trigram'
+)
+"""
+
+_TRIGRAM_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS documents_trigram_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_trigram(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_trigram_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_trigram(documents_trigram, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_trigram_au AFTER UPDATE OF content ON documents BEGIN
+    INSERT INTO documents_trigram(documents_trigram, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO documents_trigram(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+
+def has_trigram_index(db_path: str) -> bool:
+    """True if the trigram index was created for this database."""
+    if "trigram" in _pool.flags(db_path):
+        return True
+    res = run_query(db_path, "SELECT 1 FROM sqlite_master WHERE type='table' AND name='documents_trigram'")
+    if res.get("success") and res.get("rows"):
+        _pool.flags(db_path).add("trigram")
+        return True
+    return False
+
+
+def ensure_trigram_index(db_path: str) -> Dict[str, Any]:
+    """Create (and populate) the trigram index and its sync triggers if missing."""
+    if "trigram" in _pool.flags(db_path):
+        return {"success": True}
+    try:
+        lock = _get_db_lock(db_path)
+        with lock:
+            with _transaction(db_path) as cur:
+                cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='documents_trigram'")
+                exists = cur.fetchone() is not None
+                cur.execute(_TRIGRAM_DDL)
+                for stmt in _TRIGRAM_TRIGGERS.split("END;"):
+                    if stmt.strip():
+                        cur.execute(stmt + "END;")
+                if not exists:
+                    cur.execute("INSERT INTO documents_trigram(documents_trigram) VALUES('rebuild')")
+            _pool.flags(db_path).add("trigram")
+            return {"success": True}
+    except Exception as e:
+        logger.error(f"ensure_trigram_index error: {e}")
+        return {"success": False, "error": str(e)}
+
+
+def trigrams(text: str) -> set:
+    """Lowercased character trigrams of text (same units the FTS5 trigram tokenizer uses)."""
+    t = (text or "").lower()
+    return {t[i : i + 3] for i in range(len(t) - 2)}
+
+
+def search_trigram(db_path: str, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """Candidate documents sharing character trigrams with query, most shared first.
+
+    Returns dicts with id, content and score (bm25, lower is better). Queries
+    shorter than three characters have no trigrams and return [], as do
+    databases without the (opt-in) trigram index.
+    """
+    grams = sorted(g for g in trigrams(query) if g.strip())
+    if not grams:
+        return []
+    if not has_trigram_index(db_path):
+        return []
+    match = " OR ".join('"' + g.replace('"', '""') + '"' for g in grams)
+    sql = (
+        "SELECT d.id AS id, d.content AS content, bm25(documents_trigram) AS score "
+        "FROM documents_trigram JOIN documents d ON d.id = documents_trigram.rowid "
+        "WHERE documents_trigram MATCH ? ORDER BY score ASC LIMIT ?"
+    )
+    res = run_query(db_path, sql, (match, limit))
+    return res.get("rows", []) if res.get("success") else []
+
+
+def _title_tags(metadata: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+    # extract optional title/tags from metadata
+    try:
+        return (metadata or {}).get("title") or "", (metadata or {}).get("tags") or ""
+    except Exception:
+        return "", ""
+
+
 def index_document(db_path: str, doc_id: int, content: str) -> bool:
     """Index a single document into documents table and FTS (insert or update)."""
     try:
@@ -273,25 +708,21 @@ def index_document(db_path: str, doc_id: int, content: str) -> bool:
         lock = _get_db_lock(db_path)
         with lock:
             ensure_documents_table(db_path)
-            existing = run_query_single(db_path, "SELECT id, title, metadata, tags FROM documents WHERE id = ?", (doc_id,))
-            title = ""
-            tags = ""
-            if existing:
-                # update content only if provided
-                run_write(db_path, "UPDATE documents SET content = ? WHERE id = ?", (content, doc_id))
-                title = existing.get("title") or ""
-                tags = existing.get("tags") or ""
-            else:
-                # insert with empty title/tags
-                run_write(db_path, "INSERT INTO documents (id, content, metadata, title, tags) VALUES (?, ?, ?, ?, ?)", (doc_id, content, json.dumps({}), title, tags))
-            # ensure FTS exists and update FTS table explicitly (replace row)
             ensure_fts5(db_path)
-            try:
-                run_write(db_path, "DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
-            except Exception:
-                pass
-            run_write(db_path, "INSERT INTO documents_fts(rowid, title, content, tags) VALUES (?, ?, ?, ?)", (doc_id, title or "", content, tags or ""))
-            return True
+            with _transaction(db_path) as cur:
+                # FTS is kept in sync by the documents_fts_* triggers
+                cur.execute("SELECT id FROM documents WHERE id = ?", (doc_id,))
+                if cur.fetchone():
+                    # update content only if provided
+                    cur.execute("UPDATE documents SET content = ? WHERE id = ?", (content, doc_id))
+                else:
+                    # insert with empty title/tags
+                    cur.execute(
+                        "INSERT INTO documents (id, content, metadata, title, tags) VALUES (?, ?, ?, ?, ?)",
+                        (doc_id, content, json.dumps({}), "", ""),
+                    )
+        _notify_write(db_path)
+        return True
     except Exception as e:
         logger.error(f"index_document error: {e}")
         return False
@@ -304,101 +735,187 @@ def reindex_all(db_path: str) -> Dict[str, Any]:
     return rebuild_fts_index(db_path)
 
 
-def bulk_insert_documents(
-    db_path: str,
-    docs: List[Tuple[str, Optional[Dict[str, Any]]]],
-    reindex: bool = False,
-    batch_size: int = 1000,
-) -> Dict[str, Any]:
-    """Insert many documents in a single transaction and update FTS.
+def _normalize_doc(item: Any) -> Tuple[str, str, str, str]:
+    """Accept (content, metadata) tuples or dicts; return (title, content, tags, metadata_json)."""
+    if isinstance(item, dict):
+        content = item.get("content", "")
+        metadata = item.get("metadata")
+        if metadata is None:
+            metadata = {k: v for k, v in item.items() if k != "content"}
+    elif isinstance(item, str):
+        content, metadata = item, None
+    else:
+        content, metadata = item[0], (item[1] if len(item) > 1 else None)
+    title, tags = _title_tags(metadata)
+    return title, content if content is not None else "", tags, json.dumps(metadata or {})
 
-    docs: list of (content, metadata) tuples. Returns dict with success and
-    inserted_count and optionally list of ids if small.
+
+def _ingest_batch(db_path: str, rows: List[Tuple[str, str, str, str]]) -> Tuple[int, int]:
+    """Insert one batch with executemany in a single transaction (FTS via triggers).
+
+    Returns (first_id, last_id) of the inserted rows.
     """
     attempts = 0
     while True:
+        conn = _connect(db_path)
+        cur = conn.cursor()
         try:
-            lock = _get_db_lock(db_path)
-            with lock:
-                conn = _connect(db_path)
-                cur = conn.cursor()
-                # ensure tables
-                ensure_documents_table(db_path)
-                ensure_fts5(db_path)
-
-                inserted_ids: List[int] = []
-                # do all inserts in one transaction for speed
-                for content, metadata in docs:
-                    meta_json = json.dumps(metadata or {})
-                    title = ""
-                    tags = ""
+            # take the write lock up front so the id range below belongs to this batch
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute("SELECT COALESCE(MAX(id), 0) FROM documents")
+            prev_max = cur.fetchone()[0]
+            cur.executemany(
+                "INSERT INTO documents (title, content, tags, metadata) VALUES (?, ?, ?, ?)", rows
+            )
+            cur.execute("SELECT MIN(id), MAX(id) FROM documents WHERE id > ?", (prev_max,))
+            first_id, last_id = cur.fetchone()
+            conn.commit()
+            return first_id, last_id
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            attempts += 1
+            if attempts > 5:
+                raise
+            logger.warning(f"ingest batch retry {attempts}: {e}")
+            time.sleep(0.05 * attempts)
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def ingest_documents(
+    db_path: str,
+    docs: Iterable[Any],
+    batch_size: int = 1000,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    reindex: bool = False,
+) -> Dict[str, Any]:
+    """Stream documents into `documents` + FTS in committed batches.
+
+    docs may be any iterable/generator of (content, metadata) tuples, plain
+    strings or dicts ({"content": ..., "metadata": {...}} or flat fields). Only
+    one batch is held in memory at a time, so large corpora load with constant
+    memory. `progress`, if given, is called after every committed batch with
+    inserted/batches/elapsed/rows_per_sec counters.
+    """
+    batch_size = max(1, int(batch_size))
+    started = time.perf_counter()
+    stats: Dict[str, Any] = {"inserted": 0, "batches": 0, "first_id": None, "last_id": None}
+    try:
+        lock = _get_db_lock(db_path)
+        with lock:
+            ensure_documents_table(db_path)
+            ensure_fts5(db_path)
+            it = iter(docs)
+            while True:
+                batch = [_normalize_doc(d) for d in islice(it, batch_size)]
+                if not batch:
+                    break
+                first_id, last_id = _ingest_batch(db_path, batch)
+                if stats["first_id"] is None:
+                    stats["first_id"] = first_id
+                stats["last_id"] = last_id
+                stats["inserted"] += len(batch)
+                stats["batches"] += 1
+                _notify_write(db_path)
+                if progress is not None:
+                    elapsed = time.perf_counter() - started
                     try:
-                        title = (metadata or {}).get("title") or ""
-                        tags = (metadata or {}).get("tags") or ""
-                    except Exception:
-                        title = ""
-                        tags = ""
+                        progress(
+                            {
+                                "inserted": stats["inserted"],
+                                "batches": stats["batches"],
+                                "elapsed": elapsed,
+                                "rows_per_sec": stats["inserted"] / elapsed if elapsed > 0 else 0.0,
+                            }
+                        )
+                    except Exception as e:
+                        logger.warning(f"ingest progress callback error: {e}")
+
+            if reindex:
+                # full rebuild if requested
+                reindex_all(db_path)
+    except Exception as e:
+        logger.error(f"ingest_documents error: {e}")
+        return {"success": False, "error": str(e), **stats}
 
-                    cur.execute("INSERT INTO documents (title, content, tags, metadata) VALUES (?, ?, ?, ?)", (title, content, tags, meta_json))
-                    # index into standalone FTS table explicitly using last_insert_rowid()
-                    last_id = cur.lastrowid
-                    cur.execute("INSERT INTO documents_fts(rowid, title, content, tags) VALUES (?, ?, ?, ?)", (last_id, title or "", content, tags or ""))
-                    inserted_ids.append(last_id)
+    stats["elapsed"] = time.perf_counter() - started
+    return {"success": True, **stats}
 
-                conn.commit()
-                cur.close()
-                conn.close()
 
-                if reindex:
-                    # full rebuild if requested
-                    reindex_all(db_path)
+def iter_jsonl_documents(path: str, content_field: str = "content") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (content, metadata) from a JSONL file one line at a time."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(obj, dict):
+                continue
+            content = obj.pop(content_field, None)
+            if content is None:
+                continue
+            yield str(content), obj
+
+
+def iter_directory_documents(
+    root: str, exts: Optional[set] = None
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (text, {"title", "path"}) for every matching file under root, lazily."""
+    exts = exts or {".txt", ".md", ".json", ".py"}
+    for p in Path(root).rglob("*"):
+        if p.is_file() and p.suffix in exts:
+            try:
+                text = p.read_text(errors="ignore")
+            except Exception:
+                continue
+            yield text, {"title": p.name, "path": str(p)}
 
-                return {"success": True, "inserted": len(inserted_ids), "ids": inserted_ids}
-        except sqlite3.OperationalError as e:
-            attempts += 1
-            if attempts > 5:
-                logger.error(f"bulk_insert_documents error: {e}")
-                return {"success": False, "error": str(e)}
-            time.sleep(0.05 * attempts)
-            continue
-        except Exception as e:
-            logger.error(f"bulk_insert_documents error: {e}")
-            return {"success": False, "error": str(e)}
+
+def bulk_insert_documents(
+    db_path: str,
+    docs: List[Tuple[str, Optional[Dict[str, Any]]]],
+    reindex: bool = False,
+    batch_size: int = 1000,
+) -> Dict[str, Any]:
+    """Insert many documents in batches (FTS is updated by triggers).
+
+    docs: list of (content, metadata) tuples. Returns dict with success and
+    inserted_count and optionally list of ids if small. For iterators or large
+    inputs prefer `ingest_documents`, which does not collect ids.
+    """
+    res = ingest_documents(db_path, docs, batch_size=batch_size, reindex=reindex)
+    if not res.get("success"):
+        return {"success": False, "error": res.get("error")}
+    first, last = res.get("first_id"), res.get("last_id")
+    # ids within a batch are contiguous (AUTOINCREMENT under a write lock), but
+    # batches may interleave with other writers, so only report when unambiguous
+    ids = list(range(first, last + 1)) if first is not None and last - first + 1 == res["inserted"] else []
+    return {"success": True, "inserted": res["inserted"], "ids": ids}
 
 
 def insert_document(db_path: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> Optional[int]:
     """Insert a document into `documents` and return inserted id."""
-    ensure_documents_table(db_path)
     meta_json = json.dumps(metadata or {})
     try:
         lock = _get_db_lock(db_path)
         with lock:
-            # extract optional title/tags from metadata
-            title = ""
-            tags = ""
-            try:
-                title = (metadata or {}).get("title") or ""
-                tags = (metadata or {}).get("tags") or ""
-            except Exception:
-                title = ""
-                tags = ""
-
-            conn = _connect(db_path)
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO documents (title, content, tags, metadata) VALUES (?, ?, ?, ?)",
-                (title, content, tags, meta_json),
-            )
-            conn.commit()
-            last = cur.lastrowid
-            cur.close()
-            conn.close()
-            # Ensure FTS exists and index the inserted document
-            try:
-                ensure_fts5(db_path)
-                run_write(db_path, "INSERT INTO documents_fts(rowid, title, content, tags) VALUES (?, ?, ?, ?)", (last, title or "", content, tags or ""))
-            except Exception:
-                pass
+            ensure_fts5(db_path)
+            title, tags = _title_tags(metadata)
+            # documents_fts_ai trigger indexes the row in the same transaction
+            with _transaction(db_path) as cur:
+                cur.execute(
+                    "INSERT INTO documents (title, content, tags, metadata) VALUES (?, ?, ?, ?)",
+                    (title, content, tags, meta_json),
+                )
+                last = cur.lastrowid
+        _notify_write(db_path)
         return last
     except Exception as e:
         logger.error(f"Insert document error: {e}")
@@ -422,93 +939,229 @@ def get_document_by_id(db_path: str, doc_id: int) -> Optional[Dict[str, Any]]:
     }
 
 
-def list_documents(db_path: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-    rows = run_query_all(
-        db_path, "SELECT id, title, content, tags, metadata FROM documents ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset)
-    )
-    out = []
-    for r in rows:
-        try:
-            meta = json.loads(r.get("metadata") or "{}")
-        except Exception:
-            meta = {}
-        out.append(
-            {"id": r.get("id"), "title": r.get("title"), "content": r.get("content"), "tags": r.get("tags"), "metadata": meta}
+def _document_from_row(r: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        meta = json.loads(r.get("metadata") or "{}")
+    except Exception:
+        meta = {}
+    return {"id": r.get("id"), "title": r.get("title"), "content": r.get("content"), "tags": r.get("tags"), "metadata": meta}
+
+
+def list_documents(
+    db_path: str, limit: int = 100, offset: int = 0, before_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Newest-first page of documents.
+
+    Pass the smallest id of the previous page as `before_id` for keyset paging
+    (`WHERE id < ?` on the primary key), which stays fast at any depth; OFFSET
+    paging is kept for compatibility but gets slower the deeper it goes.
+    """
+    if before_id is not None:
+        rows = run_query_all(
+            db_path,
+            "SELECT id, title, content, tags, metadata FROM documents WHERE id < ? ORDER BY id DESC LIMIT ?",
+            (before_id, limit),
         )
-    return out
+    else:
+        rows = run_query_all(
+            db_path, "SELECT id, title, content, tags, metadata FROM documents ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset)
+        )
+    return [_document_from_row(r) for r in rows]
+
+
+def iter_documents(db_path: str, page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+    """Yield all documents newest-first in keyset-paged chunks of `page_size`."""
+    before_id: Optional[int] = None
+    while True:
+        page = list_documents(db_path, limit=page_size, before_id=before_id)
+        if not page:
+            return
+        yield page
+        before_id = page[-1]["id"]
 
 
 def delete_document(db_path: str, doc_id: int) -> bool:
     lock = _get_db_lock(db_path)
+    affected = 0
     with lock:
-        res = run_write(db_path, "DELETE FROM documents WHERE id = ?", (doc_id,))
-        # also ensure FTS row removed (triggers may handle it, but enforce)
         try:
-            run_write(db_path, "DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
-        except Exception:
-            pass
-        return bool(res.get("success") and res.get("affected", 0) > 0)
+            ensure_fts5(db_path)
+            # documents_fts_ad trigger removes the FTS entry
+            with _transaction(db_path) as cur:
+                cur.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+                affected = cur.rowcount
+        except Exception as e:
+            logger.error(f"delete_document error: {e}")
+            return False
+    _notify_write(db_path)
+    return affected > 0
 
 
 def update_document(db_path: str, doc_id: int, content: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
-    """Update document content and metadata, update title/tags, and sync FTS index."""
+    """Update document content and metadata, update title/tags (FTS synced by trigger)."""
     meta_json = json.dumps(metadata or {})
     lock = _get_db_lock(db_path)
     with lock:
-        # update main document
-        res = run_write(db_path, "UPDATE documents SET content = ?, metadata = ? WHERE id = ?", (content, meta_json, doc_id))
+        try:
+            ensure_fts5(db_path)
+            # single UPDATE; documents_fts_au trigger re-indexes title/content/tags
+            sets = ["content = ?", "metadata = ?"]
+            values: List[Any] = [content, meta_json]
+            # if metadata contains title/tags, update those fields too
+            for field in ("title", "tags"):
+                if metadata and field in metadata:
+                    sets.append(f"{field} = ?")
+                    values.append(metadata.get(field))
+            values.append(doc_id)
+            with _transaction(db_path) as cur:
+                cur.execute(f"UPDATE documents SET {', '.join(sets)} WHERE id = ?", tuple(values))
+        except Exception as e:
+            logger.error(f"update_document error: {e}")
+            return False
+
+    _notify_write(db_path)
+    return True
+
 
-        # if metadata contains title/tags, update those fields too
+class AsyncDatabase:
+    """Asynchronous front-end for one SQLite database.
+
+    All work runs on a dedicated single-thread executor, so the event loop never
+    blocks on SQLite and writes to the database are naturally serialized (the
+    worker thread owns its pooled connection). Busy/locked errors are retried
+    with `asyncio.sleep` backoff instead of `time.sleep`. Cancelling an awaiting
+    caller interrupts its statement via `sqlite3.Connection.interrupt()` if it
+    is running, or drops it if it is still queued behind another caller.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 5, backoff: float = 0.05):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dark8-db")
+        self._conn: Optional[sqlite3.Connection] = None
+        # token of the call executing on the worker right now (None when idle)
+        self._running: Optional[Dict[str, bool]] = None
+        self._running_lock = threading.Lock()
+
+    def _call(self, token: Dict[str, bool], func: Callable[..., Any], *args: Any) -> Any:
+        # runs on the worker thread: remember its connection for interrupt()
+        with self._running_lock:
+            if token["cancelled"]:
+                raise asyncio.CancelledError()
+            self._conn = _connect(self.db_path)
+            self._running = token
         try:
-            if metadata:
-                if "title" in metadata:
-                    run_write(db_path, "UPDATE documents SET title = ? WHERE id = ?", (metadata.get("title"), doc_id))
-                if "tags" in metadata:
-                    run_write(db_path, "UPDATE documents SET tags = ? WHERE id = ?", (metadata.get("tags"), doc_id))
-        except Exception:
-            pass
+            return func(*args)
+        finally:
+            with self._running_lock:
+                self._running = None
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking helper (e.g. `insert_document`) on this database's thread."""
+        loop = asyncio.get_running_loop()
+        token = {"cancelled": False}
+        fut = loop.run_in_executor(self._executor, self._call, token, func, *args)
+        try:
+            return await fut
+        except asyncio.CancelledError:
+            with self._running_lock:
+                token["cancelled"] = True
+                # only stop the statement if it is this caller's; a queued call is just dropped
+                if self._running is token and self._conn is not None:
+                    try:
+                        self._conn.interrupt()
+                    except Exception:
+                        pass
+            raise
 
-        # reindex into FTS: fetch current stored values to ensure consistency
+    async def _retrying(self, label: str, func: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+        attempts = 0
+        while True:
+            try:
+                return await self.run(func, *args)
+            except sqlite3.OperationalError as e:
+                attempts += 1
+                if attempts > self.max_attempts or "interrupted" in str(e):
+                    logger.error(f"DB {label} error: {e}")
+                    return {"success": False, "error": str(e)}
+                await asyncio.sleep(self.backoff * 2 ** (attempts - 1))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"DB {label} error: {e}")
+                return {"success": False, "error": str(e)}
+
+    async def query(self, sql: str, params: Tuple = (), as_tuples: bool = False) -> Dict[str, Any]:
+        return await self._retrying("query", _execute_once, self.db_path, sql, tuple(params), as_tuples)
+
+    async def write(self, sql: str, params: Tuple = ()) -> Dict[str, Any]:
+        return await self._retrying("write", _execute_once, self.db_path, sql, tuple(params))
+
+    async def bootstrap(self) -> Dict[str, Any]:
+        return await self.run(bootstrap_db, self.db_path)
+
+    async def close(self) -> None:
+        """Close the worker's connection and stop the thread."""
         try:
-            ensure_fts5(db_path)
-            doc = get_document_by_id(db_path, doc_id)
-            if doc is not None:
-                t = doc.get("title") or ""
-                c = doc.get("content") or ""
-                tg = doc.get("tags") or ""
-                try:
-                    run_write(db_path, "DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
-                except Exception:
-                    pass
-                run_write(db_path, "INSERT INTO documents_fts(rowid, title, content, tags) VALUES (?, ?, ?, ?)", (doc_id, t, c, tg))
-        except Exception:
-            pass
+            await self.run(_pool.close_all, self.db_path)
+        finally:
+            self._executor.shutdown(wait=False)
 
-        return bool(res.get("success") and res.get("affected", 0) >= 0)
+
+_async_dbs: Dict[str, AsyncDatabase] = {}
+_async_dbs_guard = threading.Lock()
+
+
+def get_async_db(db_path: str) -> AsyncDatabase:
+    """Return the shared AsyncDatabase for `db_path` (one worker thread per DB)."""
+    with _async_dbs_guard:
+        adb = _async_dbs.get(db_path)
+        if adb is None:
+            adb = _async_dbs[db_path] = AsyncDatabase(db_path)
+        return adb
 
 
 async def db_execute(params: Dict[str, Any]) -> Dict[str, Any]:
     """High-level entrypoint for agent tool calls.
 
+    Runs on the database's AsyncDatabase worker thread, so it never blocks
+    the caller's event loop.
+
     Expected params:
-      - action: 'bootstrap' | 'query' | 'insert' (default: 'query')
+      - action: 'bootstrap' | 'query' | 'insert' | 'fts_migrate' | 'fts_optimize'
+        | 'fts_merge' | 'trigram_migrate' (default: 'query')
       - db_path: optional filesystem path to sqlite DB
       - sql: SQL statement for query/insert
       - params: sequence of parameters for SQL
+      - as_tuples: return {"columns": [...], "rows": [tuple, ...]} instead of dicts
+      - pages: work limit for 'fts_merge' (default 500)
     """
     action = params.get("action", "query")
     db_path = _resolve_db_path(params)
     if not db_path:
         return {"success": False, "error": "database path not provided"}
 
+    adb = get_async_db(db_path)
+
     if action == "bootstrap":
-        return bootstrap_db(db_path)
+        return await adb.bootstrap()
+
+    if action == "fts_migrate":
+        return await adb.run(ensure_fts5, db_path)
+
+    if action == "trigram_migrate":
+        return await adb.run(ensure_trigram_index, db_path)
+
+    if action in ("fts_optimize", "fts_merge"):
+        pages = params.get("pages", 500) if action == "fts_merge" else None
+        return await adb.run(optimize_fts, db_path, pages)
 
     if action in ("query", "insert", "exec"):
         sql = params.get("sql")
         if not sql:
             return {"success": False, "error": "missing sql parameter"}
         sql_params = tuple(params.get("params", ()))
-        return run_query(db_path, sql, sql_params)
+        return await adb.query(sql, sql_params, as_tuples=bool(params.get("as_tuples", False)))
 
     return {"success": False, "error": f"unknown action: {action}"}
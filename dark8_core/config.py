@@ -60,6 +60,51 @@ class SystemConfig:
     OLLAMA_CONTEXT_WINDOW: int = field(
         default_factory=lambda: int(os.getenv("OLLAMA_CONTEXT_WINDOW", "8096"))
     )
+    OLLAMA_TIMEOUT: float = field(
+        default_factory=lambda: float(os.getenv("OLLAMA_TIMEOUT", "60"))
+    )
+    OLLAMA_CONNECT_TIMEOUT: float = field(
+        default_factory=lambda: float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+    )
+    OLLAMA_MAX_CONNECTIONS: int = field(
+        default_factory=lambda: int(os.getenv("OLLAMA_MAX_CONNECTIONS", "10"))
+    )
+    OLLAMA_MAX_KEEPALIVE: int = field(
+        default_factory=lambda: int(os.getenv("OLLAMA_MAX_KEEPALIVE", "5"))
+    )
+    OLLAMA_RETRIES: int = field(default_factory=lambda: int(os.getenv("OLLAMA_RETRIES", "2")))
+    OLLAMA_RETRY_BACKOFF: float = field(
+        default_factory=lambda: float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.5"))
+    )
+
+    # LLM response cache (memory LRU + SQLite); empty path keeps it in memory only
+    LLM_CACHE_ENABLED: bool = field(
+        default_factory=lambda: os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    )
+    LLM_CACHE_PATH: str = field(
+        default_factory=lambda: os.path.expanduser(
+            os.getenv("LLM_CACHE_PATH", "~/.dark8/cache/llm_cache.sqlite3")
+        )
+    )
+    LLM_CACHE_MEMORY_ENTRIES: int = field(
+        default_factory=lambda: int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1000"))
+    )
+    # cosine similarity for near-duplicate prompt hits; 0 disables
+    LLM_CACHE_SEMANTIC_THRESHOLD: float = field(
+        default_factory=lambda: float(os.getenv("LLM_CACHE_SEMANTIC_THRESHOLD", "0"))
+    )
+
+    # LLM gateway: concurrent requests per model, queue size per priority (0 = built-in
+    # 32/64/256 for interactive/agent/background), seconds of waiting per priority boost
+    LLM_GATEWAY_MAX_IN_FLIGHT: int = field(
+        default_factory=lambda: int(os.getenv("LLM_GATEWAY_MAX_IN_FLIGHT", "2"))
+    )
+    LLM_GATEWAY_MAX_QUEUE: int = field(
+        default_factory=lambda: int(os.getenv("LLM_GATEWAY_MAX_QUEUE", "0"))
+    )
+    LLM_GATEWAY_AGING_SECONDS: float = field(
+        default_factory=lambda: float(os.getenv("LLM_GATEWAY_AGING_SECONDS", "30"))
+    )
 
     # Database
     DATABASE_URL: str = field(
@@ -110,6 +155,17 @@ class SystemConfig:
     NLP_ENTITY_THRESHOLD: float = field(
         default_factory=lambda: float(os.getenv("NLP_ENTITY_THRESHOLD", "0.5"))
     )
+    # ONNX intent model (export_intents_to_onnx.py output); empty disables it
+    NLP_ONNX_MODEL_DIR: str = field(default_factory=lambda: os.getenv("NLP_ONNX_MODEL_DIR", ""))
+    NLP_ONNX_QUANTIZE: bool = field(
+        default_factory=lambda: os.getenv("NLP_ONNX_QUANTIZE", "false").lower() == "true"
+    )
+    NLP_ONNX_MAX_BATCH: int = field(
+        default_factory=lambda: int(os.getenv("NLP_ONNX_MAX_BATCH", "32"))
+    )
+    NLP_ONNX_BATCH_WINDOW_MS: float = field(
+        default_factory=lambda: float(os.getenv("NLP_ONNX_BATCH_WINDOW_MS", "5"))
+    )
 
     # Search / FTS boosting weights: (title_weight, content_weight, tags_weight)
     SEARCH_WEIGHTS: tuple = field(default_factory=lambda: (
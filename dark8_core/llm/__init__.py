@@ -3,50 +3,94 @@
 Integration with local Ollama LLM backend for advanced reasoning.
 """
 
+import asyncio
+import functools
 import json
+import time
 from typing import AsyncGenerator, Dict, List, Optional
 
 from dark8_core.config import config
+from dark8_core.llm.cache import LLMCache, get_llm_cache
+from dark8_core.llm.gateway import GatewayBusy, LLMGateway, get_gateway, llm_priority
+from dark8_core.llm.singleflight import SingleFlight, StreamFlight
+from dark8_core.llm.transport import (
+    OllamaTransport,
+    aclose_transports,
+    get_transport,
+    is_connect_error,
+)
 from dark8_core.logger import logger
 
+# how long a failed availability check is trusted before asking again
+AVAILABILITY_RETRY_SECONDS = 30.0
+
+# in-flight requests shared by every client, keyed on host/model/params/prompt
+_generations = SingleFlight()
+_streams = StreamFlight()
+
 
 class OllamaClient:
     """Client for Ollama LLM backend"""
 
-    def __init__(self, host: str = None, model: str = None):
+    def __init__(
+        self,
+        host: str = None,
+        model: str = None,
+        transport: OllamaTransport = None,
+        gateway: LLMGateway = None,
+    ):
         self.host = host or config.OLLAMA_HOST
         self.model = model or config.OLLAMA_MODEL
         self.temperature = config.OLLAMA_TEMPERATURE
         self.context_window = config.OLLAMA_CONTEXT_WINDOW
-        self.available = False
-        self._check_availability()
-
-    def _check_availability(self):
-        """Check if Ollama is available"""
-        try:
-            import asyncio
-
-            import httpx
-
-            async def check():
-                try:
-                    async with httpx.AsyncClient(timeout=5) as client:
-                        response = await client.get(f"{self.host}/api/tags")
-                        return response.status_code == 200
-                except Exception:
-                    return False
+        # pooled keep-alive connections, shared by every client of this host
+        self.transport = transport or get_transport(self.host)
+        # admission control shared with every other LLM caller in the process
+        self.gateway = gateway or get_gateway()
+        # None until the first (lazy) check
+        self._available: Optional[bool] = None
+        self._checked_at = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Last known availability (False until checked)"""
+        return bool(self._available)
+
+    @available.setter
+    def available(self, value: bool):
+        self._available = value
+        self._checked_at = time.monotonic()
+
+    async def check_availability(self, refresh: bool = False) -> bool:
+        """
+        Check if Ollama is available.
 
-            # Run sync check
-            loop = asyncio.new_event_loop()
-            self.available = loop.run_until_complete(check())
-            loop.close()
+        Done lazily on first use; a positive answer is kept until a request
+        fails, a negative one is re-checked after AVAILABILITY_RETRY_SECONDS.
+        """
+        if not refresh and self._available is not None:
+            if self._available or time.monotonic() - self._checked_at < AVAILABILITY_RETRY_SECONDS:
+                return self._available
 
-            if self.available:
+        try:
+            response = await self.transport.request(
+                "GET", "/api/tags", timeout=self.transport.connect_timeout
+            )
+            available = response.status_code == 200
+        except Exception:
+            available = False
+
+        if available != self._available:
+            if available:
                 logger.info(f"✓ Ollama available at {self.host}")
             else:
                 logger.warning(f"✗ Ollama not available at {self.host}")
-        except Exception as e:
-            logger.warning(f"Ollama check failed: {e}")
+        self.available = available
+        return available
+
+    def _mark_unreachable(self, e: Exception):
+        # a read timeout means a slow model, not a missing server
+        if is_connect_error(e):
             self.available = False
 
     async def generate(self, prompt: str, context: List[int] = None) -> str:
@@ -60,31 +104,37 @@ class OllamaClient:
         Returns:
             Generated text
         """
-        if not self.available:
+        if not await self.check_availability():
             logger.warning("Ollama not available, returning default response")
             return "Ollama is not available. Please install and start Ollama."
 
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "temperature": self.temperature,
+            "stream": False,
+            "context": context or [],
+        }
+        # identical concurrent requests share one upstream generation
+        key = (self.host, self.model, self.temperature, prompt, tuple(context or ()))
+        return await _generations.do(key, lambda: self._generate(payload))
+
+    async def _generate(self, payload: Dict) -> str:
         try:
-            import httpx
-
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "temperature": self.temperature,
-                "stream": False,
-                "context": context or [],
-            }
-
-            async with httpx.AsyncClient(timeout=60) as client:
-                response = await client.post(f"{self.host}/api/generate", json=payload)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("response", "")
-                else:
-                    logger.error(f"Ollama error: {response.text}")
-                    return ""
+            async with self.gateway.aslot(self.model):
+                response = await self.transport.request("POST", "/api/generate", json=payload)
+
+            if response.status_code == 200:
+                data = response.json()
+                return data.get("response", "")
+            else:
+                logger.error(f"Ollama error: {response.text}")
+                return ""
+        except GatewayBusy as e:
+            logger.warning(f"Generate rejected: {e}")
+            return ""
         except Exception as e:
+            self._mark_unreachable(e)
             logger.error(f"Generate error: {e}")
             return ""
 
@@ -92,55 +142,62 @@ class OllamaClient:
         """
         Generate text with streaming response.
 
-        Yields chunks as they arrive.
+        Yields chunks as they arrive. A caller joining an identical stream
+        already in progress gets the chunks generated so far, then the rest.
         """
-        if not self.available:
+        if not await self.check_availability():
             yield "Ollama is not available..."
             return
 
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "temperature": self.temperature,
+            "stream": True,
+        }
+        key = (self.host, self.model, self.temperature, prompt)
+        async for chunk in _streams.stream(key, lambda: self._stream(payload)):
+            yield chunk
+
+    async def _stream(self, payload: Dict) -> AsyncGenerator[str, None]:
         try:
-            import httpx
-
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "temperature": self.temperature,
-                "stream": True,
-            }
-
-            async with httpx.AsyncClient(timeout=60) as client:
-                async with client.stream(
-                    "POST", f"{self.host}/api/generate", json=payload
-                ) as response:
+            async with self.gateway.aslot(self.model):
+                async with self.transport.stream("POST", "/api/generate", json=payload) as response:
                     async for line in response.aiter_lines():
                         if line:
                             data = json.loads(line)
                             chunk = data.get("response", "")
                             if chunk:
                                 yield chunk
+        except GatewayBusy as e:
+            logger.warning(f"Stream rejected: {e}")
         except Exception as e:
+            self._mark_unreachable(e)
             logger.error(f"Stream error: {e}")
 
     async def list_models(self) -> List[Dict]:
         """List available models"""
         try:
-            import httpx
-
-            async with httpx.AsyncClient(timeout=10) as client:
-                response = await client.get(f"{self.host}/api/tags")
-                if response.status_code == 200:
-                    return response.json().get("models", [])
+            response = await self.transport.request("GET", "/api/tags", timeout=10)
+            if response.status_code == 200:
+                return response.json().get("models", [])
         except Exception as e:
+            self._mark_unreachable(e)
             logger.error(f"List models error: {e}")
 
         return []
 
+    async def aclose(self):
+        """Close pooled connections"""
+        await self.transport.aclose()
+
 
 class ReasoningEngine:
     """LLM-powered reasoning for agent decisions"""
 
-    def __init__(self):
-        self.client = OllamaClient()
+    def __init__(self, client: OllamaClient = None, cache: LLMCache = None):
+        self.client = client or get_ollama_client()
+        self.cache = cache if cache is not None else get_llm_cache()
         self.system_prompt = """You are DARK8, an autonomous AI operating system assistant.
 Your role is to help users build applications, analyze code, and solve problems using natural language.
 You understand Polish language well.
@@ -154,6 +211,28 @@ You should:
 Always respond in the same language as the user (Polish or English).
 Be concise but informative."""
 
+    async def _generate(self, prompt: str) -> str:
+        """Generate through the response cache"""
+        if self.cache is None:
+            return await self.client.generate(prompt)
+
+        key = {
+            "model": self.client.model,
+            "temperature": self.client.temperature,
+            "system": self.system_prompt,
+        }
+        # SQLite and prompt embedding block: keep them off the event loop
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, functools.partial(self.cache.get, prompt, **key))
+        if cached is not None:
+            return cached
+
+        response = await self.client.generate(prompt)
+        # errors come back as "" and an unreachable server as a canned message
+        if response and self.client.available:
+            await loop.run_in_executor(None, functools.partial(self.cache.put, prompt, response, **key))
+        return response
+
     async def reason(self, user_input: str, context: str = "") -> str:
         """
         Reason about a user command and suggest approach.
@@ -172,7 +251,7 @@ Analyze the request and provide:
 
 Response (be concise):"""
 
-        return await self.client.generate(prompt)
+        return await self._generate(prompt)
 
     async def code_review(self, code: str) -> str:
         """
@@ -190,7 +269,7 @@ Code:
 
 Review (be concise):"""
 
-        return await self.client.generate(prompt)
+        return await self._generate(prompt)
 
     async def explain_error(self, error: str, context: str = "") -> str:
         """
@@ -209,7 +288,7 @@ Please:
 
 Response (be concise):"""
 
-        return await self.client.generate(prompt)
+        return await self._generate(prompt)
 
 
 # Singleton instances
@@ -233,9 +312,20 @@ def get_reasoning_engine() -> ReasoningEngine:
     return _reasoning_engine
 
 
+async def aclose_llm():
+    """Close pooled Ollama connections (application shutdown)"""
+    await aclose_transports()
+
+
 __all__ = [
     "OllamaClient",
+    "OllamaTransport",
+    "LLMCache",
+    "LLMGateway",
+    "get_gateway",
+    "llm_priority",
     "ReasoningEngine",
     "get_ollama_client",
     "get_reasoning_engine",
+    "aclose_llm",
 ]
@@ -0,0 +1,300 @@
+# DARK8 OS - LLM Response Cache
+"""
+Tiered cache for LLM responses.
+
+An in-memory LRU (O(1) get/put) sits in front of a SQLite store, so answers
+survive restarts. Entries are keyed on (model, temperature, system prompt,
+prompt hash): the same prompt to another model or at another temperature is
+a different entry. Optionally, a prompt whose embedding is close enough to a
+cached one (same model/temperature/system) is answered from that entry.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Union
+
+from dark8_core.logger import logger
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    temperature REAL NOT NULL,
+    system_hash TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache(accessed_at)"
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def cache_key(prompt: str, model: str = "", temperature: float = 0.0, system: str = "") -> str:
+    """Full SHA-256 over every input that changes the answer."""
+    return _sha256(json.dumps([model, round(float(temperature), 4), _sha256(system), _sha256(prompt)]))
+
+
+class LLMCache:
+    """Memory LRU + SQLite store for LLM responses.
+
+    `path=None` keeps everything in memory. `semantic_threshold` > 0 together
+    with an `embed` callable (text -> vector) enables near-duplicate lookup
+    through a VectorStore of cached prompts.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_memory: int = 1000,
+        max_disk: int = 100_000,
+        semantic_threshold: float = 0.0,
+        embed: Optional[Callable[[str], Union[Sequence[float], "np.ndarray"]]] = None,
+    ):
+        self.path = str(path) if path else None
+        self.max_memory = max(1, max_memory)
+        self.max_disk = max(1, max_disk)
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._puts = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(_DDL)
+            self._db.execute(_INDEX)
+
+        self.semantic_threshold = semantic_threshold
+        self._embed = embed if semantic_threshold > 0 else None
+        # one VectorStore per scope (model/temperature/system), so a lookup ranks
+        # only prompts that could answer it
+        self._vectors: Dict[str, object] = {}
+        self._vectors_lock = threading.Lock()
+
+    # -- semantic tier -------------------------------------------------------
+
+    def _vector_store(self, scope: str, dim: int, create: bool = True):
+        with self._vectors_lock:
+            store = self._vectors.get(scope)
+            if store is None:
+                store_path = f"{self.path}.vectors/{scope}" if self.path else None
+                # lookups reopen a store left by an earlier run but never create one
+                if create or (store_path is not None and Path(store_path).exists()):
+                    from dark8_core.nlp.vector_store import VectorStore
+
+                    store = self._vectors[scope] = VectorStore(dim=dim, path=store_path)
+            return store
+
+    def _semantic_get(self, prompt: str, scope: str) -> Optional[str]:
+        import numpy as np
+
+        vec = np.asarray(self._embed(prompt), dtype=np.float32)
+        store = self._vector_store(scope, vec.shape[-1], create=False)
+        if store is None:
+            return None
+        for key, score, _meta in store.search(vec, k=5):
+            if score < self.semantic_threshold:
+                break
+            response = self._lookup(key)
+            if response is not None:
+                return response
+            # row pruned while its vector was being added: drop the orphan
+            store.delete(key)
+        return None
+
+    def _semantic_put(self, prompt: str, scope: str, key: str) -> None:
+        try:
+            vec = self._embed(prompt)
+            import numpy as np
+
+            vec = np.asarray(vec, dtype=np.float32)
+            self._vector_store(scope, vec.shape[-1]).add(key, vec, {"scope": scope})
+        except Exception as e:
+            logger.debug(f"LLM cache embedding skipped: {e}")
+
+    def _forget_vectors(self, keys) -> None:
+        """Drop the prompt vectors of entries that left the cache."""
+        if not keys or not self._vectors:
+            return
+        with self._vectors_lock:
+            stores = list(self._vectors.values())
+        for key in keys:
+            for store in stores:
+                if store.delete(key):
+                    break
+
+    # -- exact tiers ---------------------------------------------------------
+
+    def _remember(self, key: str, response: str) -> List[str]:
+        """Put key in the memory LRU; returns keys gone for good (memory-only cache)."""
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        evicted = []
+        while len(self._memory) > self.max_memory:
+            old, _ = self._memory.popitem(last=False)
+            if self._db is None:
+                evicted.append(old)
+        return evicted
+
+    def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            response = self._memory.get(key)
+            if response is not None:
+                self._memory.move_to_end(key)
+                return response
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE llm_cache SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+            )
+            self._remember(key, row[0])
+            self.disk_hits += 1
+            return row[0]
+
+    def get(self, prompt: str, model: str = "", temperature: float = 0.0, system: str = "") -> Optional[str]:
+        """Cached response, or None"""
+        key = cache_key(prompt, model, temperature, system)
+        response = self._lookup(key)
+        if response is None and self._embed is not None:
+            try:
+                response = self._semantic_get(prompt, cache_key("", model, temperature, system))
+            except Exception as e:
+                logger.debug(f"LLM cache semantic lookup failed: {e}")
+            if response is not None:
+                self.semantic_hits += 1
+        if response is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return response
+
+    def put(self, prompt: str, response: str, model: str = "", temperature: float = 0.0, system: str = ""):
+        """Store response in both tiers"""
+        key = cache_key(prompt, model, temperature, system)
+        now = time.time()
+        with self._lock:
+            dropped = self._remember(key, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache "
+                    "(key, model, temperature, system_hash, prompt_hash, prompt, response, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, model, float(temperature), _sha256(system), _sha256(prompt), prompt, response, now, now),
+                )
+                self._puts += 1
+                if self._puts % 1000 == 0:
+                    dropped = self._prune()
+        if self._embed is not None:
+            self._semantic_put(prompt, cache_key("", model, temperature, system), key)
+            self._forget_vectors(dropped)
+
+    def _prune(self) -> List[str]:
+        """Drop least recently used rows beyond max_disk; returns their keys."""
+        (count,) = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count <= self.max_disk:
+            return []
+        keys = [
+            row[0]
+            for row in self._db.execute(
+                "SELECT key FROM llm_cache ORDER BY accessed_at LIMIT ?", (count - self.max_disk,)
+            )
+        ]
+        self._db.executemany("DELETE FROM llm_cache WHERE key = ?", [(k,) for k in keys])
+        for k in keys:
+            self._memory.pop(k, None)
+        return keys
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total > 0 else 0
+        disk_size = 0
+        if self._db is not None:
+            with self._lock:
+                (disk_size,) = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+
+        return {
+            "size": len(self._memory),
+            "max_size": self.max_memory,
+            "disk_size": disk_size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": f"{hit_rate:.1%}",
+        }
+
+    def clear(self):
+        """Clear cache"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+        with self._vectors_lock:
+            stores = list(self._vectors.values())
+        for store in stores:
+            for key in store.ids():
+                store.delete(key)
+        logger.info("✓ Cache cleared")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        with self._vectors_lock:
+            stores, self._vectors = list(self._vectors.values()), {}
+        for store in stores:
+            store.close()
+
+
+_llm_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Shared cache configured from config.LLM_CACHE_*, or None when disabled"""
+    global _llm_cache
+    from dark8_core.config import config
+
+    if not config.LLM_CACHE_ENABLED:
+        return None
+    if _llm_cache is None:
+        embed = None
+        if config.LLM_CACHE_SEMANTIC_THRESHOLD > 0:
+            from dark8_core.nlp.bert import BERTPolishLoader
+
+            embed = BERTPolishLoader().get_embedding
+        _llm_cache = LLMCache(
+            path=config.LLM_CACHE_PATH or None,
+            max_memory=config.LLM_CACHE_MEMORY_ENTRIES,
+            semantic_threshold=config.LLM_CACHE_SEMANTIC_THRESHOLD,
+            embed=embed,
+        )
+    return _llm_cache
+
+
+__all__ = ["LLMCache", "cache_key", "get_llm_cache"]
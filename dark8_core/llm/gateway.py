@@ -0,0 +1,379 @@
+# DARK8 OS - LLM Gateway
+"""
+Process-wide admission control for calls to the local model server.
+
+Every Ollama call takes a slot from the gateway first. Each model has a
+maximum number of requests in flight; callers beyond that wait in one of
+three bounded queues - interactive, agent, background - and are admitted
+in priority order. A waiting request gains one priority level for every
+`aging_seconds` it has waited, so background work is delayed, not starved.
+A full queue rejects the request immediately with `GatewayBusy`.
+
+The gateway serves both threads (`slot`) and coroutines (`aslot`); an
+async waiter never blocks its event loop.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from typing import Callable, Deque, Dict, Iterator, Optional
+
+PRIORITIES = ("interactive", "agent", "background")
+DEFAULT_PRIORITY = "agent"
+
+_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_priority", default=None)
+
+
+class GatewayBusy(Exception):
+    """The queue for this model and priority is full."""
+
+
+class GatewayTimeout(TimeoutError):
+    """Waited longer than the caller's timeout for a slot."""
+
+
+class SharedPriority:
+    """Priority of work done for several callers at once (a coalesced request).
+
+    It starts at the first caller's priority and only ever rises, when a more
+    urgent caller joins; a request still queued in the gateway moves up with it.
+    """
+
+    def __init__(self, priority: str):
+        self.priority = priority
+        self._listeners: list = []
+
+    def raise_to(self, priority: str) -> None:
+        if PRIORITIES.index(priority) >= PRIORITIES.index(self.priority):
+            return
+        self.priority = priority
+        for listener in list(self._listeners):
+            listener(priority)
+
+    @contextmanager
+    def _listening(self, listener: Callable[[str], None]) -> Iterator[None]:
+        self._listeners.append(listener)
+        try:
+            yield
+        finally:
+            self._listeners.remove(listener)
+
+
+_shared: contextvars.ContextVar[Optional[SharedPriority]] = contextvars.ContextVar("llm_shared_priority", default=None)
+
+
+def current_priority() -> str:
+    shared = _shared.get()
+    if shared is not None:
+        return shared.priority
+    return _priority.get() or DEFAULT_PRIORITY
+
+
+@contextmanager
+def shared_priority(shared: SharedPriority) -> Iterator[None]:
+    """Run LLM calls made inside this block at `shared`'s (raisable) priority."""
+    token = _shared.set(shared)
+    try:
+        yield
+    finally:
+        _shared.reset(token)
+
+
+@contextmanager
+def llm_priority(priority: str) -> Iterator[None]:
+    """Run LLM calls made inside this block (same thread/task) at `priority`."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued_at", "wake", "granted")
+
+    def __init__(self, priority: str, wake: Callable[[], None]):
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.wake = wake
+        self.granted = False
+
+
+class _Samples:
+    """Last N observations, for percentiles."""
+
+    __slots__ = ("values", "count")
+
+    def __init__(self, size: int = 512):
+        self.values: Deque[float] = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.values.append(value)
+        self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        if not self.values:
+            return {"count": self.count, "p50_ms": 0.0, "p95_ms": 0.0}
+        ordered = sorted(self.values)
+
+        def pick(q: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000.0, 2)
+
+        return {"count": self.count, "p50_ms": pick(0.50), "p95_ms": pick(0.95)}
+
+
+class _Model:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.queues: Dict[str, Deque[_Waiter]] = {p: deque() for p in PRIORITIES}
+        self.wait = {p: _Samples() for p in PRIORITIES}
+        self.latency = {p: _Samples() for p in PRIORITIES}
+        self.rejected = {p: 0 for p in PRIORITIES}
+        self.timed_out = {p: 0 for p in PRIORITIES}
+
+    def queued(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+
+class LLMGateway:
+    """Per-model concurrency limit with prioritized, bounded wait queues."""
+
+    def __init__(
+        self,
+        max_in_flight: int = 2,
+        max_queue: Optional[Dict[str, int]] = None,
+        aging_seconds: float = 30.0,
+        model_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = {"interactive": 32, "agent": 64, "background": 256}
+        self.max_queue.update(max_queue or {})
+        self.aging_seconds = aging_seconds
+        self._model_limits = dict(model_limits or {})
+        self._models: Dict[str, _Model] = {}
+        self._lock = threading.Lock()
+
+    # -- bookkeeping (lock held) ----------------------------------------------
+
+    def _model(self, model: str) -> _Model:
+        state = self._models.get(model)
+        if state is None:
+            limit = self._model_limits.get(model, self.max_in_flight)
+            state = self._models[model] = _Model(max(1, limit))
+        return state
+
+    def _next(self, state: _Model) -> Optional[_Waiter]:
+        """Head waiter with the best aged priority; FIFO within a class."""
+        now = time.monotonic()
+        best, best_rank = None, None
+        for level, name in enumerate(PRIORITIES):
+            queue = state.queues[name]
+            if not queue:
+                continue
+            head = queue[0]
+            aged = int((now - head.enqueued_at) / self.aging_seconds) if self.aging_seconds > 0 else 0
+            rank = (level - aged, head.enqueued_at)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = head, rank
+        if best is not None:
+            state.queues[best.priority].popleft()
+        return best
+
+    def _dispatch(self, state: _Model) -> None:
+        while state.in_flight < state.limit:
+            waiter = self._next(state)
+            if waiter is None:
+                return
+            state.in_flight += 1
+            waiter.granted = True
+            try:
+                waiter.wake()
+            except RuntimeError:
+                # the waiter's event loop is gone; nobody will use this slot
+                state.in_flight -= 1
+
+    def _enqueue(self, model: str, priority: str, wake: Callable[[], None]):
+        """Take a free slot (returns None) or queue a waiter (returns it)."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown LLM priority: {priority}")
+        with self._lock:
+            state = self._model(model)
+            if state.in_flight < state.limit and not state.queued():
+                state.in_flight += 1
+                state.wait[priority].add(0.0)
+                return None
+            if len(state.queues[priority]) >= self.max_queue.get(priority, 0):
+                state.rejected[priority] += 1
+                raise GatewayBusy(f"LLM queue full for {model} ({priority})")
+            waiter = _Waiter(priority, wake)
+            state.queues[priority].append(waiter)
+            return waiter
+
+    def _abandon(self, model: str, waiter: _Waiter) -> None:
+        """A waiter gave up (timeout/cancel); hand back a slot granted meanwhile."""
+        with self._lock:
+            state = self._model(model)
+            if waiter.granted:
+                state.in_flight -= 1
+                self._dispatch(state)
+            else:
+                try:
+                    state.queues[waiter.priority].remove(waiter)
+                except ValueError:
+                    pass
+            state.timed_out[waiter.priority] += 1
+
+    def _promote(self, model: str, waiter: _Waiter, priority: str) -> None:
+        """Move a still-queued waiter to a more urgent queue (keeps its age)."""
+        with self._lock:
+            state = self._model(model)
+            if waiter.granted or PRIORITIES.index(priority) >= PRIORITIES.index(waiter.priority):
+                return
+            try:
+                state.queues[waiter.priority].remove(waiter)
+            except ValueError:
+                return
+            waiter.priority = priority
+            queue = state.queues[priority]
+            queue.append(waiter)
+            if len(queue) > 1 and queue[-2].enqueued_at > waiter.enqueued_at:
+                # keep FIFO by arrival within the class
+                state.queues[priority] = deque(sorted(queue, key=lambda w: w.enqueued_at))
+
+    def _promotions(self, model: str, waiter: Optional[_Waiter]):
+        shared = _shared.get()
+        if waiter is None or shared is None:
+            return nullcontext()
+        return shared._listening(lambda priority: self._promote(model, waiter, priority))
+
+    def _admitted(self, model: str, waiter: _Waiter) -> None:
+        with self._lock:
+            self._model(model).wait[waiter.priority].add(time.monotonic() - waiter.enqueued_at)
+
+    def _release(self, model: str, priority: str, started: float) -> None:
+        with self._lock:
+            state = self._model(model)
+            state.latency[priority].add(time.monotonic() - started)
+            state.in_flight -= 1
+            self._dispatch(state)
+
+    # -- public API ------------------------------------------------------------
+
+    def set_limit(self, model: str, limit: int) -> None:
+        """Change how many requests `model` may run at once."""
+        with self._lock:
+            self._model_limits[model] = limit
+            state = self._model(model)
+            state.limit = max(1, limit)
+            self._dispatch(state)
+
+    @contextmanager
+    def slot(self, model: str, priority: Optional[str] = None, timeout: Optional[float] = None):
+        """Blocking: hold one of `model`'s slots for the duration of the block."""
+        priority = priority or current_priority()
+        event = threading.Event()
+        waiter = self._enqueue(model, priority, event.set)
+        if waiter is not None:
+            with self._promotions(model, waiter):
+                if not event.wait(timeout):
+                    self._abandon(model, waiter)
+                    raise GatewayTimeout(f"No LLM slot for {model} within {timeout}s")
+            self._admitted(model, waiter)
+            priority = waiter.priority
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(model, priority, started)
+
+    @asynccontextmanager
+    async def aslot(self, model: str, priority: Optional[str] = None, timeout: Optional[float] = None):
+        """Async: like slot(), waiting without blocking the event loop."""
+        priority = priority or current_priority()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            # may be called from another thread releasing a slot
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enqueue(model, priority, wake)
+        if waiter is not None:
+            try:
+                with self._promotions(model, waiter):
+                    await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                self._abandon(model, waiter)
+                raise GatewayTimeout(f"No LLM slot for {model} within {timeout}s") from None
+            except asyncio.CancelledError:
+                self._abandon(model, waiter)
+                raise
+            self._admitted(model, waiter)
+            priority = waiter.priority
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(model, priority, started)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per model: limit, in flight, queue depth and wait/latency percentiles per priority."""
+        with self._lock:
+            result = {}
+            for model, state in self._models.items():
+                result[model] = {
+                    "limit": state.limit,
+                    "in_flight": state.in_flight,
+                    "priorities": {
+                        p: {
+                            "queued": len(state.queues[p]),
+                            "rejected": state.rejected[p],
+                            "timed_out": state.timed_out[p],
+                            "queue_wait": state.wait[p].summary(),
+                            "latency": state.latency[p].summary(),
+                        }
+                        for p in PRIORITIES
+                    },
+                }
+            return result
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Shared gateway configured from config.LLM_GATEWAY_*"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                from dark8_core.config import config
+
+                queue = config.LLM_GATEWAY_MAX_QUEUE
+                _gateway = LLMGateway(
+                    max_in_flight=config.LLM_GATEWAY_MAX_IN_FLIGHT,
+                    max_queue={p: queue for p in PRIORITIES} if queue > 0 else None,
+                    aging_seconds=config.LLM_GATEWAY_AGING_SECONDS,
+                )
+    return _gateway
+
+
+__all__ = [
+    "LLMGateway",
+    "GatewayBusy",
+    "GatewayTimeout",
+    "PRIORITIES",
+    "SharedPriority",
+    "current_priority",
+    "llm_priority",
+    "shared_priority",
+    "get_gateway",
+]
@@ -0,0 +1,201 @@
+# DARK8 OS - Request Coalescing
+"""
+Single-flight deduplication for identical in-flight LLM requests.
+
+While a request for a key is running, further callers with the same key
+wait for that one upstream call instead of starting their own generation.
+For streams, a late joiner first receives everything generated so far and
+then follows the live tail. The upstream call is cancelled only when every
+caller waiting on it has gone away. It runs at the priority of the most
+urgent caller waiting on it (see gateway.SharedPriority).
+"""
+
+import asyncio
+import contextvars
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dark8_core.llm.gateway import SharedPriority, current_priority, shared_priority
+
+FlightKey = Tuple[Any, ...]
+
+
+def _start(loop: asyncio.AbstractEventLoop, coro, priority: SharedPriority) -> asyncio.Task:
+    """Task running coro with LLM calls at `priority` (raised by later joiners)."""
+
+    def create() -> asyncio.Task:
+        with shared_priority(priority):
+            # the task copies the current context, including the shared priority
+            return loop.create_task(coro)
+
+    return contextvars.copy_context().run(create)
+
+
+class _FlightTable:
+    """Flights per event loop; futures are loop-bound, so never join across loops.
+
+    Keyed on the loop object itself (weakly), not id(loop): a closed loop's
+    id can be reused by a new one.
+    """
+
+    def __init__(self):
+        self._by_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[FlightKey, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def __len__(self) -> int:
+        return sum(len(flights) for flights in list(self._by_loop.values()))
+
+    def of(self, loop: asyncio.AbstractEventLoop) -> Dict[FlightKey, Any]:
+        flights = self._by_loop.get(loop)
+        if flights is None:
+            flights = self._by_loop[loop] = {}
+        return flights
+
+
+class _Flight:
+    __slots__ = ("task", "waiters", "priority")
+
+    def __init__(self, task: asyncio.Task, priority: SharedPriority):
+        self.task = task
+        self.waiters = 0
+        self.priority = priority
+
+
+class SingleFlight:
+    """Coalesce concurrent awaitables that share a key."""
+
+    def __init__(self):
+        self._flights = _FlightTable()
+        self.started = 0
+        self.joined = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: FlightKey, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of factory(), shared with every concurrent caller using key."""
+        flights = self._flights.of(asyncio.get_running_loop())
+        flight = flights.get(key)
+        if flight is None:
+            priority = SharedPriority(current_priority())
+            task = _start(asyncio.get_running_loop(), factory(), priority)
+            flight = flights[key] = _Flight(task, priority)
+            task.add_done_callback(lambda _t, f=flight: self._forget(flights, key, f))
+            self.started += 1
+        else:
+            flight.priority.raise_to(current_priority())
+            self.joined += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # last one out: stop the upstream call, and let new callers start afresh
+                self._forget(flights, key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    @staticmethod
+    def _forget(flights, key, flight) -> None:
+        if flights.get(key) is flight:
+            del flights[key]
+
+
+class _StreamFlight:
+    __slots__ = ("chunks", "done", "error", "changed", "task", "subscribers", "priority")
+
+    def __init__(self, priority: SharedPriority):
+        self.priority = priority
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.subscribers = 0
+
+    def notify(self) -> None:
+        # wake current readers; later readers wait on a fresh event
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class StreamFlight:
+    """Coalesce concurrent async iterators that share a key.
+
+    The first caller's iterator is consumed by a background task into a
+    buffer; every subscriber (including the first) replays the buffer from
+    the start and then waits for new chunks.
+    """
+
+    def __init__(self):
+        self._flights = _FlightTable()
+        self.started = 0
+        self.joined = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def _pump(self, flights, key, flight: _StreamFlight, source: AsyncIterator[Any]) -> None:
+        try:
+            async for chunk in source:
+                flight.chunks.append(chunk)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self._forget(flights, key, flight)
+            flight.notify()
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    @staticmethod
+    def _forget(flights, key, flight) -> None:
+        if flights.get(key) is flight:
+            del flights[key]
+
+    async def stream(self, key: FlightKey, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Chunks of factory(), shared with every concurrent caller using key."""
+        loop = asyncio.get_running_loop()
+        flights = self._flights.of(loop)
+        flight = flights.get(key)
+        if flight is None:
+            flight = flights[key] = _StreamFlight(SharedPriority(current_priority()))
+            flight.task = _start(loop, self._pump(flights, key, flight, factory()), flight.priority)
+            self.started += 1
+        else:
+            flight.priority.raise_to(current_priority())
+            self.joined += 1
+
+        flight.subscribers += 1
+        position = 0
+        try:
+            while True:
+                changed = flight.changed
+                if position < len(flight.chunks):
+                    chunk = flight.chunks[position]
+                    position += 1
+                    yield chunk
+                elif flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                else:
+                    await changed.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done and flight.task is not None:
+                # nobody is listening any more
+                self._forget(flights, key, flight)
+                flight.task.cancel()
+
+
+__all__ = ["SingleFlight", "StreamFlight"]
@@ -0,0 +1,204 @@
+# DARK8 OS - Ollama HTTP Transport
+"""
+One long-lived, pooled `httpx.AsyncClient` for talking to Ollama.
+
+Connections are kept alive between calls, so an LLM request no longer pays
+TCP setup every time. Failures are retried with exponential backoff, but a
+non-idempotent request (a POST that starts a generation) only when it cannot
+have reached the server: connection refused or connect/pool timeouts, and
+502/503 replies. A read timeout may mean the model is still generating, so
+it is never retried for them. A streamed request is only retried before its
+first byte arrives.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from dark8_core.logger import logger
+
+# upstream hiccups worth retrying (model loading, proxy in front of Ollama restarting)
+RETRY_STATUS = {502, 503, 504}
+# ...of which these also guarantee a POST was not processed (504 may come after it was)
+UNSENT_STATUS = {502, 503}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def is_transient_error(exc: Exception) -> bool:
+    """Connection-level failure (refused, reset, timed out) rather than a bad request."""
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(exc, httpx.TransportError)
+
+
+def is_connect_error(exc: Exception) -> bool:
+    """Failure before the request was sent: the server is unreachable, not just slow."""
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+class OllamaTransport:
+    """Pooled HTTP client bound to one Ollama host.
+
+    The client is created lazily on first use. httpx connections belong to
+    the event loop that opened them, so when called from a different loop
+    (e.g. a later `asyncio.run`) a fresh client is created for that loop.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 10,
+        max_keepalive: int = 5,
+        retries: int = 2,
+        backoff: float = 0.5,
+    ):
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _new_client(self):
+        import httpx
+
+        return httpx.AsyncClient(
+            base_url=self.host,
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+            ),
+        )
+
+    def client(self):
+        """The pooled client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop or getattr(self._client, "is_closed", False):
+            # a client from a finished loop cannot be closed from here; let it go
+            self._client = self._new_client()
+            self._loop = loop
+        return self._client
+
+    async def _sleep(self, attempt: int) -> None:
+        await asyncio.sleep(self.backoff * (2**attempt))
+
+    @staticmethod
+    def _retry_policy(method: str, idempotent: Optional[bool]):
+        """(error predicate, statuses) worth retrying for this kind of request."""
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        if idempotent:
+            return is_transient_error, RETRY_STATUS
+        return is_connect_error, UNSENT_STATUS
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        json: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        idempotent: Optional[bool] = None,
+    ):
+        """Send a request, retrying failures that are safe to retry; returns the httpx response.
+
+        `idempotent` defaults to True for GET/HEAD/OPTIONS only.
+        """
+        retryable, retry_status = self._retry_policy(method, idempotent)
+        kwargs: Dict[str, Any] = {}
+        if json is not None:
+            kwargs["json"] = json
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.client().request(method, path, **kwargs)
+            except Exception as e:
+                if attempt >= self.retries or not retryable(e):
+                    raise
+                logger.debug(f"Ollama {method} {path} failed ({e}), retry {attempt + 1}")
+            else:
+                if response.status_code not in retry_status or attempt >= self.retries:
+                    return response
+                logger.debug(f"Ollama {method} {path} -> {response.status_code}, retry {attempt + 1}")
+            await self._sleep(attempt)
+
+    @asynccontextmanager
+    async def stream(
+        self, method: str, path: str, json: Optional[Dict[str, Any]] = None, idempotent: Optional[bool] = None
+    ) -> AsyncIterator:
+        """Open a streamed response; retries (as in request()) only until the response starts."""
+        retryable, retry_status = self._retry_policy(method, idempotent)
+        for attempt in range(self.retries + 1):
+            try:
+                request = self.client().build_request(method, path, json=json)
+                response = await self.client().send(request, stream=True)
+            except Exception as e:
+                if attempt >= self.retries or not retryable(e):
+                    raise
+                logger.debug(f"Ollama stream {path} failed ({e}), retry {attempt + 1}")
+            else:
+                if response.status_code in retry_status and attempt < self.retries:
+                    await response.aclose()
+                else:
+                    break
+            await self._sleep(attempt)
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def aclose(self) -> None:
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+
+_transports: Dict[str, OllamaTransport] = {}
+
+
+def get_transport(host: Optional[str] = None) -> OllamaTransport:
+    """Shared transport per host, configured from config.OLLAMA_*."""
+    from dark8_core.config import config
+
+    host = (host or config.OLLAMA_HOST).rstrip("/")
+    transport = _transports.get(host)
+    if transport is None:
+        transport = _transports[host] = OllamaTransport(
+            host,
+            timeout=config.OLLAMA_TIMEOUT,
+            connect_timeout=config.OLLAMA_CONNECT_TIMEOUT,
+            max_connections=config.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive=config.OLLAMA_MAX_KEEPALIVE,
+            retries=config.OLLAMA_RETRIES,
+            backoff=config.OLLAMA_RETRY_BACKOFF,
+        )
+    return transport
+
+
+async def aclose_transports() -> None:
+    """Close every shared transport (application shutdown)."""
+    for transport in list(_transports.values()):
+        await transport.aclose()
+
+
+__all__ = [
+    "OllamaTransport",
+    "RETRY_STATUS",
+    "UNSENT_STATUS",
+    "is_transient_error",
+    "is_connect_error",
+    "get_transport",
+    "aclose_transports",
+]
@@ -7,6 +7,7 @@ Handles intent classification, entity extraction, and semantic parsing.
 from typing import Dict, List, Optional, Tuple
 
 from dark8_core.logger import logger
+from dark8_core.nlp.keywords import KeywordAutomaton
 
 
 class IntentClassifier:
@@ -30,6 +31,17 @@ class IntentClassifier:
         "EXIT": ["wyjdź", "koniec", "wyłącz", "Stop"],
     }
 
+    # all keywords compiled into one automaton (built on first use)
+    _automaton: Optional[KeywordAutomaton] = None
+    _keyword_intents: List[str] = []
+
+    @classmethod
+    def rebuild(cls) -> None:
+        """Recompile INTENTS; call after changing them at runtime."""
+        pairs = [(keyword, intent) for intent, keywords in cls.INTENTS.items() for keyword in keywords]
+        cls._keyword_intents = [intent for _, intent in pairs]
+        cls._automaton = KeywordAutomaton(keyword for keyword, _ in pairs)
+
     @classmethod
     def classify(cls, text: str) -> Tuple[str, float]:
         """
@@ -37,14 +49,18 @@ class IntentClassifier:
         Returns: (intent_name, confidence_score)
         """
         text_lower = text.lower()
-
-        # Simple keyword matching (will be upgraded to BERT-based)
-        for intent, keywords in cls.INTENTS.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    # Simple confidence scoring
-                    confidence = 0.7 + (0.3 * (len(keyword) / len(text_lower)))
-                    return intent, min(confidence, 1.0)
+        if cls._automaton is None:
+            cls.rebuild()
+
+        # Simple keyword matching (will be upgraded to BERT-based): one pass finds
+        # every keyword, the first one in declaration order decides
+        found = cls._automaton.matches(text_lower)
+        if found:
+            index = min(found)
+            keyword = cls._automaton.keywords[index]
+            # Simple confidence scoring
+            confidence = 0.7 + (0.3 * (len(keyword) / len(text_lower)))
+            return cls._keyword_intents[index], min(confidence, 1.0)
 
         return "UNKNOWN", 0.0
 
@@ -61,22 +77,30 @@ class EntityExtractor:
         "TOOL": ["git", "docker", "kubernetes", "npm", "pip"],
     }
 
+    _automaton: Optional[KeywordAutomaton] = None
+    _pattern_types: List[str] = []
+
+    @classmethod
+    def rebuild(cls) -> None:
+        """Recompile ENTITY_TYPES; call after changing them at runtime."""
+        pairs = [(pattern, etype) for etype, patterns in cls.ENTITY_TYPES.items() for pattern in patterns]
+        cls._pattern_types = [etype for _, etype in pairs]
+        cls._automaton = KeywordAutomaton(pattern for pattern, _ in pairs)
+
     @classmethod
     def extract(cls, text: str) -> Dict[str, List[str]]:
         """
         Extract entities from Polish text.
         Returns: {entity_type: [values]}
         """
-        entities = {}
-        text_lower = text.lower()
-
-        for entity_type, patterns in cls.ENTITY_TYPES.items():
-            entities[entity_type] = []
-            for pattern in patterns:
-                if pattern in text_lower:
-                    entities[entity_type].append(pattern)
-
-        return {k: v for k, v in entities.items() if v}
+        if cls._automaton is None:
+            cls.rebuild()
+        entities: Dict[str, List[str]] = {}
+        for index in sorted(cls._automaton.matches(text.lower())):
+            entities.setdefault(cls._pattern_types[index], []).append(cls._automaton.keywords[index])
+
+        # keep ENTITY_TYPES order
+        return {k: entities[k] for k in cls.ENTITY_TYPES if k in entities}
 
 
 class PolishParser:
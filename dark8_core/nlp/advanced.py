@@ -4,10 +4,12 @@ Enhanced NLP engine with learning capabilities.
 Uses transformer models and learns from user interactions.
 """
 
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
 from dark8_core.logger import logger
+from dark8_core.nlp.keywords import KeywordAutomaton
+from dark8_core.nlp.learned import LearnedPatternIndex, get_learned_index
 from dark8_core.persistence import get_database
 
 
@@ -53,24 +55,13 @@ class AdvancedIntentClassifier:
         },
     }
 
-    def __init__(self):
-        self.learned_patterns: Dict[str, float] = {}
-        self._load_learned_patterns()
-
-    def _load_learned_patterns(self):
-        """Load patterns learned from previous interactions"""
-        try:
-            db = get_database()
-            conversations = db.get_conversations(limit=1000)
+    # all hierarchy keywords compiled into one automaton (built on first use)
+    _automaton: Optional[KeywordAutomaton] = None
+    _entries: List[Tuple[str, str, int]] = []
 
-            for conv in conversations:
-                if conv.intent and conv.confidence:
-                    key = f"{conv.user_input}:{conv.intent}"
-                    self.learned_patterns[key] = conv.confidence
-
-            logger.info(f"✓ Loaded {len(self.learned_patterns)} learned patterns")
-        except Exception as e:
-            logger.warning(f"Could not load learned patterns: {e}")
+    def __init__(self, learned_patterns: Optional[LearnedPatternIndex] = None):
+        # shared index, kept current by DatabaseManager.add_conversation
+        self.learned_patterns = learned_patterns or get_learned_index()
 
     def classify(self, text: str, use_learning: bool = True) -> Tuple[str, float, str]:
         """
@@ -85,30 +76,43 @@ class AdvancedIntentClassifier:
 
         # Check learned patterns first
         if use_learning:
-            for key, conf in self.learned_patterns.items():
-                if key.startswith(text_lower):
-                    intent = key.split(":")[1]
-                    return intent, conf, "learned"
+            learned = self.learned_patterns.lookup(text_lower)
+            if learned:
+                intent, conf = learned
+                return intent, conf, "learned"
+
+        # Hierarchical search: one automaton pass, matches visited in declaration order
+        automaton, entries = self._compiled()
+        for index in sorted(automaton.matches(text_lower)):
+            keyword = automaton.keywords[index]
+            category, intent, priority = entries[index]
+            # Confidence = keyword match + priority bonus
+            confidence = 0.6 + (0.1 * (len(keyword) / len(text_lower))) + (0.04 / priority)
+
+            if confidence > best_confidence:
+                best_confidence = min(confidence, 1.0)
+                best_intent = intent
+                best_category = category
 
-        # Hierarchical search
-        for category, intents in self.INTENT_HIERARCHY.items():
-            for intent, config_dict in intents.items():
-                keywords = config_dict["keywords"]
-
-                for keyword in keywords:
-                    if keyword in text_lower:
-                        priority = config_dict["priority"]
-                        # Confidence = keyword match + priority bonus
-                        confidence = (
-                            0.6 + (0.1 * (len(keyword) / len(text_lower))) + (0.04 / priority)
-                        )
+        return best_intent, best_confidence, best_category
 
-                        if confidence > best_confidence:
-                            best_confidence = min(confidence, 1.0)
-                            best_intent = intent
-                            best_category = category
+    @classmethod
+    def _compiled(cls) -> Tuple[KeywordAutomaton, List[Tuple[str, str, int]]]:
+        if cls._automaton is None:
+            cls.rebuild()
+        return cls._automaton, cls._entries
 
-        return best_intent, best_confidence, best_category
+    @classmethod
+    def rebuild(cls) -> None:
+        """Recompile INTENT_HIERARCHY keywords; call after changing them at runtime."""
+        keywords, entries = [], []
+        for category, intents in cls.INTENT_HIERARCHY.items():
+            for intent, config_dict in intents.items():
+                for keyword in config_dict["keywords"]:
+                    keywords.append(keyword)
+                    entries.append((category, intent, config_dict["priority"]))
+        cls._entries = entries
+        cls._automaton = KeywordAutomaton(keywords)
 
 
 class EntityExtractorAdvanced:
@@ -151,25 +155,40 @@ class EntityExtractorAdvanced:
         },
     }
 
+    _automaton: Optional[KeywordAutomaton] = None
+    _pattern_types: List[str] = []
+
+    @classmethod
+    def rebuild(cls) -> None:
+        """Recompile ENTITY_PATTERNS; call after changing them at runtime."""
+        pairs = [
+            (pattern, etype)
+            for etype, config_dict in cls.ENTITY_PATTERNS.items()
+            for pattern in config_dict["patterns"]
+        ]
+        cls._pattern_types = [etype for _, etype in pairs]
+        cls._automaton = KeywordAutomaton(pattern for pattern, _ in pairs)
+
     @classmethod
     def extract(cls, text: str) -> Dict[str, List[Dict]]:
         """
         Extract entities with metadata.
         Returns: {entity_type: [{value, confidence, type}]}
         """
-        entities = {}
-        text_lower = text.lower()
-
-        for entity_type, config_dict in cls.ENTITY_PATTERNS.items():
-            entities[entity_type] = []
-
-            for pattern in config_dict["patterns"]:
-                if pattern in text_lower:
-                    entities[entity_type].append(
-                        {"value": pattern, "confidence": 0.8, "category": config_dict["type"]}
-                    )
+        if cls._automaton is None:
+            cls.rebuild()
+        entities: Dict[str, List[Dict]] = {}
+        for index in sorted(cls._automaton.matches(text.lower())):
+            entity_type = cls._pattern_types[index]
+            entities.setdefault(entity_type, []).append(
+                {
+                    "value": cls._automaton.keywords[index],
+                    "confidence": 0.8,
+                    "category": cls.ENTITY_PATTERNS[entity_type]["type"],
+                }
+            )
 
-        return {k: v for k, v in entities.items() if v}
+        return {k: entities[k] for k in cls.ENTITY_PATTERNS if k in entities}
 
 
 class DependencyAnalyzer:
@@ -268,14 +287,12 @@ class AdvancedNLPEngine:
                 ai_response=feedback,
                 intent=command.intent,
                 confidence=command.confidence,
-                entities=asdict(command.entities),
+                entities=command.entities,
                 context={"success": success, "priority": command.priority},
             )
 
-            # Update learned patterns
+            # learned patterns are updated by the database's conversation listener
             if success:
-                key = f"{command.normalized}:{command.intent}"
-                self.intent_classifier.learned_patterns[key] = command.confidence
                 logger.debug(f"✓ Learned: {command.intent} (conf: {command.confidence:.2%})")
         except Exception as e:
             logger.error(f"Learning error: {e}")
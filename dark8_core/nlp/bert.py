@@ -4,8 +4,17 @@ Semantic NLP using BERT Polish fine-tuned model.
 Replaces keyword-based classification with embeddings.
 """
 
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .vector_store import VectorStore
 
 
 @dataclass
@@ -13,21 +22,128 @@ class SemanticEmbedding:
     """Semantic text embedding"""
 
     text: str
-    embedding: List[float]  # 768-dim for BERT-base
+    embedding: np.ndarray  # 768-dim float32 for BERT-base
     intent: str
     confidence: float
     similarity_scores: Dict[str, float]
 
 
+def _text_key(text: str) -> int:
+    """64-bit key of text (first 8 bytes of its SHA-256); never 0, which marks empty slots."""
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little") or 1
+
+
+class EmbeddingCache:
+    """Bounded LRU of float32 embeddings, with an optional on-disk spill.
+
+    The in-memory tier holds at most `max_entries` vectors (~3 KB each for
+    768 dims). With `spill_path`, evicted and new vectors are also written to a
+    memory-mapped, direct-mapped table of `spill_slots` rows keyed by text hash
+    (`<spill_path>.keys` + `<spill_path>.f32`); colliding keys overwrite each
+    other, so the file never grows.
+    """
+
+    def __init__(
+        self,
+        dim: int = 768,
+        max_entries: int = 4096,
+        spill_path: Optional[str] = None,
+        spill_slots: int = 65536,
+    ):
+        self.dim = dim
+        self.max_entries = max_entries
+        self._data: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.spill_hits = 0
+        self._keys = self._vectors = None
+        if spill_path:
+            base = Path(spill_path).expanduser()
+            base.parent.mkdir(parents=True, exist_ok=True)
+            self._keys = self._open_map(base.with_suffix(".keys"), np.uint64, (spill_slots,))
+            self._vectors = self._open_map(base.with_suffix(".f32"), np.float32, (spill_slots, dim))
+
+    @staticmethod
+    def _open_map(path: Path, dtype, shape) -> np.memmap:
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if not path.exists() or path.stat().st_size != size:
+            with open(path, "wb") as fh:
+                fh.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, text: object) -> bool:
+        return isinstance(text, str) and _text_key(text) in self._data
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = _text_key(text)
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return vec
+            if self._keys is not None:
+                slot = key % self._keys.shape[0]
+                if int(self._keys[slot]) == key:
+                    vec = np.array(self._vectors[slot])
+                    vec.setflags(write=False)
+                    self._insert(key, vec)
+                    self.spill_hits += 1
+                    return vec
+            self.misses += 1
+            return None
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        key = _text_key(text)
+        # cached vectors are handed out shared, so they are read-only copies
+        vec = np.array(vector, dtype=np.float32)
+        vec.setflags(write=False)
+        with self._lock:
+            self._insert(key, vec)
+            if self._keys is not None:
+                slot = key % self._keys.shape[0]
+                self._vectors[slot] = vec
+                self._keys[slot] = key
+
+    def _insert(self, key: int, vec: np.ndarray) -> None:
+        self._data[key] = vec
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def flush(self) -> None:
+        if self._keys is not None:
+            self._vectors.flush()
+            self._keys.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "spill_hits": self.spill_hits,
+        }
+
+
 class BERTPolishLoader:
     """Load and manage BERT Polish models"""
 
-    def __init__(self):
+    EMBEDDING_DIM = 768
+
+    def __init__(self, cache_size: int = 4096, cache_path: Optional[str] = None):
         self.model_name = "bert-base-multilingual-cased"
         self.model_path = "~/.cache/huggingface/transformers/bert-polish"
         self.tokenizer = None
         self.model = None
-        self.embedding_cache = {}
+        self.embedding_cache = EmbeddingCache(self.EMBEDDING_DIM, max_entries=cache_size, spill_path=cache_path)
 
     def load_model(self) -> bool:
         """Load BERT Polish model from HuggingFace"""
@@ -43,23 +159,39 @@ class BERTPolishLoader:
             print("⚠️ BERT not available. Using fallback embeddings.")
             return False
 
-    def get_embedding(self, text: str) -> List[float]:
-        """Get semantic embedding for text (stub - 768 dimensions)"""
-        # Stub embedding for testing
-        import hashlib
-        import random
+    def _compute_embedding(self, text: str) -> np.ndarray:
+        """Stub embedding: deterministic pseudo-random N(0, 0.1) vector seeded by the text."""
+        rng = np.random.default_rng(_text_key(text))
+        return rng.normal(0.0, 0.1, self.EMBEDDING_DIM).astype(np.float32)
 
-        if text in self.embedding_cache:
-            return self.embedding_cache[text]
+    def get_embedding(self, text: str) -> np.ndarray:
+        """Get semantic embedding for text (stub - 768 dimensions, float32, read-only)
 
-        # Generate deterministic but pseudo-random embeddings for now
-        hash_obj = hashlib.sha256(text.encode())
-        random.seed(int(hash_obj.hexdigest(), 16) % (2**32))
-        embedding = [random.gauss(0, 0.1) for _ in range(768)]
-
-        self.embedding_cache[text] = embedding
+        The array may be shared with the cache and other callers; copy it before
+        modifying it in place.
+        """
+        cached = self.embedding_cache.get(text)
+        if cached is not None:
+            return cached
+        embedding = self._compute_embedding(text)
+        embedding.setflags(write=False)
+        self.embedding_cache.put(text, embedding)
         return embedding
 
+    def get_embeddings(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings for many texts as one (len(texts), 768) float32 matrix.
+
+        Duplicates are computed once and cache hits are reused.
+        """
+        out = np.empty((len(texts), self.EMBEDDING_DIM), dtype=np.float32)
+        done: Dict[str, np.ndarray] = {}
+        for i, text in enumerate(texts):
+            vec = done.get(text)
+            if vec is None:
+                vec = done[text] = self.get_embedding(text)
+            out[i] = vec
+        return out
+
 
 class SemanticIntentClassifier:
     """Classify intents using semantic similarity (BERT-based)"""
@@ -82,12 +214,12 @@ class SemanticIntentClassifier:
         self.bert.load_model()
         self.intent_embeddings = self._prepare_intent_embeddings()
 
-    def _prepare_intent_embeddings(self) -> Dict[str, List[float]]:
+    def _prepare_intent_embeddings(self) -> Dict[str, np.ndarray]:
         """Prepare embeddings for all intents"""
-        return {
-            intent: self.bert.get_embedding(description)
-            for intent, description in self.INTENT_EMBEDDINGS.items()
-        }
+        matrix = self.bert.get_embeddings(list(self.INTENT_EMBEDDINGS.values()))
+        self._intent_names = list(self.INTENT_EMBEDDINGS)
+        self._intent_matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        return dict(zip(self._intent_names, matrix))
 
     def classify(self, text: str) -> Tuple[str, float, Dict[str, float]]:
         """
@@ -96,11 +228,10 @@ class SemanticIntentClassifier:
         """
         text_embedding = self.bert.get_embedding(text)
 
-        # Calculate cosine similarities
-        similarities = {}
-        for intent, intent_embedding in self.intent_embeddings.items():
-            similarity = self._cosine_similarity(text_embedding, intent_embedding)
-            similarities[intent] = similarity
+        # Cosine similarity against all intents in one matrix-vector product
+        norm = float(np.linalg.norm(text_embedding))
+        sims = self._intent_matrix @ text_embedding / norm if norm else np.zeros(len(self._intent_names))
+        similarities = {intent: float(sim) for intent, sim in zip(self._intent_names, sims)}
 
         # Get best match
         best_intent = max(similarities, key=similarities.get)
@@ -124,39 +255,58 @@ class SemanticIntentClassifier:
 
 
 class SemanticSimilarityEngine:
-    """Find semantically similar code, queries, patterns"""
+    """Find semantically similar code, queries, patterns
 
-    def __init__(self):
-        self.bert = BERTPolishLoader()
-        self.knowledge_base: List[Dict] = []
+    Embeddings live in a VectorStore (normalized float32 matrix, batched
+    matmul / IVF search). Pass `store_path` to keep the knowledge base on disk
+    across restarts.
+    """
 
-    def add_to_knowledge(self, text: str, intent: str, metadata: Dict = None):
+    def __init__(self, store_path: Optional[str] = None, dim: int = 768):
+        self.bert = BERTPolishLoader()
+        self.store = VectorStore(dim=dim, path=store_path)
+
+    @property
+    def knowledge_base(self) -> List[Dict]:
+        """Snapshot of stored items (text, intent, metadata, embedding)."""
+        items = []
+        for item_id in self.store.ids():
+            vector, payload = self.store.get(item_id)
+            items.append({**(payload or {}), "id": item_id, "embedding": vector.tolist()})
+        return items
+
+    def add_to_knowledge(self, text: str, intent: str, metadata: Dict = None, item_id: str = None):
         """Add text to knowledge base"""
         embedding = self.bert.get_embedding(text)
-
-        self.knowledge_base.append(
-            {"text": text, "intent": intent, "embedding": embedding, "metadata": metadata or {}}
+        self.store.add(
+            item_id or uuid.uuid4().hex,
+            embedding,
+            {"text": text, "intent": intent, "metadata": metadata or {}},
         )
 
+    def add_knowledge_items(self, items) -> int:
+        """Index `KnowledgeItem` rows, reusing their stored embeddings when present."""
+        return self.store.add_knowledge_items(items, embed=self.bert.get_embedding)
+
+    def remove_from_knowledge(self, item_id: str) -> bool:
+        return self.store.delete(item_id)
+
     def find_similar(self, query: str, top_k: int = 5) -> List[Dict]:
         """Find top-k similar items in knowledge base"""
         query_embedding = self.bert.get_embedding(query)
-
-        similarities = []
-        for item in self.knowledge_base:
-            sim = SemanticSimilarityEngine._cosine_similarity(query_embedding, item["embedding"])
-            similarities.append(
+        results = []
+        for item_id, sim, payload in self.store.search(query_embedding, top_k):
+            payload = payload or {}
+            results.append(
                 {
-                    "text": item["text"],
-                    "intent": item["intent"],
+                    "text": payload.get("text"),
+                    "intent": payload.get("intent"),
                     "similarity": sim,
-                    "metadata": item["metadata"],
+                    "metadata": payload.get("metadata") or {},
+                    "id": item_id,
                 }
             )
-
-        # Sort by similarity desc
-        similarities.sort(key=lambda x: x["similarity"], reverse=True)
-        return similarities[:top_k]
+        return results
 
     @staticmethod
     def _cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
@@ -213,4 +363,6 @@ __all__ = [
     "Phase3NLPEngine",
     "BERTPolishLoader",
     "SemanticEmbedding",
+    "EmbeddingCache",
+    "VectorStore",
 ]
@@ -0,0 +1,81 @@
+# DARK8 OS - Keyword Automaton
+"""
+Aho-Corasick automaton for multi-keyword matching.
+
+All keywords of a classifier are compiled once into one automaton; a single
+left-to-right pass over the text then reports every keyword occurrence,
+including overlapping ones ("analizuj" inside "przeanalizuj"), no matter how
+many intents or patterns exist.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+class KeywordAutomaton:
+    """Match many literal keywords in one pass.
+
+    Keywords are numbered in insertion order; `matches()` returns the set of
+    numbers found, so callers can resolve ties by their declaration order.
+    """
+
+    def __init__(self, keywords: Iterable[str] = ()):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for keyword in keywords:
+            self._add(keyword)
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _add(self, keyword: str) -> None:
+        index = len(self.keywords)
+        self.keywords.append(keyword)
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(index)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # inherit matches ending at the fallback state
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (end_offset, keyword_index) for every occurrence."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in out[state]:
+                yield pos + 1, index
+
+    def matches(self, text: str) -> Set[int]:
+        """Indices of all keywords occurring in text."""
+        return {index for _, index in self.iter_matches(text)}
+
+
+__all__ = ["KeywordAutomaton"]
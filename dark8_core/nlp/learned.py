@@ -0,0 +1,133 @@
+# DARK8 OS - Learned Pattern Index
+"""
+Prefix index over inputs the user has already been understood on.
+
+`AdvancedIntentClassifier` answers from here before keyword matching: a text
+that is a prefix of a stored input returns that input's intent. The index is
+a character trie on normalized text, so a lookup costs O(len(text)) instead
+of a scan over every stored conversation, and it is updated incrementally
+from `DatabaseManager.add_conversation` rather than reloaded from the DB.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from dark8_core.logger import logger
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace."""
+    return " ".join(text.lower().split())
+
+
+class _Node:
+    __slots__ = ("children", "best")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        # most recent entry stored anywhere below this node
+        self.best: Optional[Tuple[int, str, float]] = None
+
+
+class LearnedPatternIndex:
+    """Trie of normalized inputs -> (intent, confidence).
+
+    Every node remembers the most recent entry in its subtree, so a prefix
+    lookup is a single walk down the trie. Newer entries win, both for the
+    same input learned again and for prefixes shared by several inputs.
+    Holds at most `max_entries` inputs; past twice that the trie is rebuilt
+    from the most recent ones.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._root = _Node()
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, text: str) -> bool:
+        return normalize(text) in self._entries
+
+    def add(self, text: str, intent: str, confidence: float) -> None:
+        key = normalize(text)
+        if not key or not intent:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (intent, confidence)
+            self._insert(key, intent, confidence)
+            if len(self._entries) > 2 * self.max_entries:
+                self._rebuild()
+
+    def _insert(self, key: str, intent: str, confidence: float) -> None:
+        self._seq += 1
+        entry = (self._seq, intent, confidence)
+        node = self._root
+        node.best = entry
+        for ch in key:
+            node = node.children.setdefault(ch, _Node())
+            node.best = entry
+
+    def _rebuild(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._root = _Node()
+        for key, (intent, confidence) in self._entries.items():
+            self._insert(key, intent, confidence)
+
+    def lookup(self, text: str) -> Optional[Tuple[str, float]]:
+        """(intent, confidence) of the newest stored input starting with text."""
+        key = normalize(text)
+        if not key:
+            return None
+        node = self._root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        _, intent, confidence = node.best
+        return intent, confidence
+
+    def on_conversation(
+        self, user_input: str, intent: str, confidence: float, context: Optional[Dict] = None
+    ) -> None:
+        """DatabaseManager listener: index every stored conversation that did not fail."""
+        if not confidence or (context or {}).get("success") is False:
+            return
+        self.add(user_input, intent, confidence)
+
+
+_learned_index: Optional[LearnedPatternIndex] = None
+_learned_index_lock = threading.Lock()
+
+
+def get_learned_index() -> LearnedPatternIndex:
+    """Shared index, seeded once from recent conversations and then kept
+    current by the database's conversation listener."""
+    global _learned_index
+    if _learned_index is not None:
+        return _learned_index
+    with _learned_index_lock:
+        if _learned_index is None:
+            index = LearnedPatternIndex()
+            try:
+                from dark8_core.persistence import get_database
+
+                db = get_database()
+                # oldest first, so the newest input wins shared prefixes
+                for conv in reversed(db.get_conversations(limit=index.max_entries)):
+                    index.on_conversation(conv.user_input, conv.intent, conv.confidence, conv.context)
+                db.on_conversation(index.on_conversation)
+                logger.info(f"✓ Loaded {len(index)} learned patterns")
+            except Exception as e:
+                logger.warning(f"Could not load learned patterns: {e}")
+            _learned_index = index
+    return _learned_index
+
+
+__all__ = ["LearnedPatternIndex", "get_learned_index", "normalize"]
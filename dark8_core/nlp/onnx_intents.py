@@ -0,0 +1,260 @@
+# DARK8 OS - ONNX Intent Inference
+"""
+Serve the Polish BERT intent classifier exported by export_intents_to_onnx.py
+with onnxruntime on CPU - no torch in the serving path.
+
+`OnnxIntentClassifier` runs one batch; `IntentBatcher` collects concurrent
+`classify()` calls for a few milliseconds and runs them as one batch, which
+is what makes BERT-sized models viable at high request rates.
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dark8_core.logger import logger
+from dark8_core.nlp import IntentClassifier
+
+ONNX_FILE = "intent_classifier.onnx"
+QUANTIZED_FILE = "intent_classifier.int8.onnx"
+LABELS_FILE = "labels.json"
+
+# dataset_intents.jsonl labels -> intents of the keyword pipeline (IntentClassifier.INTENTS),
+# which the agent plans on; labels without an entry keep the keyword intent
+PIPELINE_INTENTS: Dict[str, str] = {
+    "SEARCH_FILE": "SEARCH",
+    "LIST_DIR": "LIST_FILES",
+    "READ_FILE": "READ_FILE",
+    "READ_LOG": "READ_FILE",
+    "WRITE_FILE": "WRITE_FILE",
+    "APPEND_FILE": "WRITE_FILE",
+    "DELETE_FILE": "DELETE",
+    "DELETE_DIR": "DELETE",
+    "RUN_APP": "EXECUTE_COMMAND",
+    "INSTALL_APP": "INSTALL",
+    "SYSTEM_INFO": "STATUS",
+}
+
+
+def pipeline_intent(label: str) -> Optional[str]:
+    """Keyword-pipeline intent for a model label, or None when it has none."""
+    intent = PIPELINE_INTENTS.get(label, label)
+    return intent if intent in IntentClassifier.INTENTS else None
+
+
+def _load_tokenizer(model_dir: Path, max_length: int):
+    """Fast (Rust) tokenizer: `tokenizers` on tokenizer.json, else transformers' fast tokenizer."""
+    tokenizer_json = model_dir / "tokenizer.json"
+    if tokenizer_json.exists():
+        try:
+            from tokenizers import Tokenizer  # type: ignore
+
+            tok = Tokenizer.from_file(str(tokenizer_json))
+            tok.enable_truncation(max_length=max_length)
+            tok.enable_padding(length=max_length)
+
+            def encode(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+                encs = tok.encode_batch(list(texts))
+                ids = np.array([e.ids for e in encs], dtype=np.int64)
+                mask = np.array([e.attention_mask for e in encs], dtype=np.int64)
+                return ids, mask
+
+            return encode
+        except ImportError:
+            pass
+
+    from transformers import AutoTokenizer  # type: ignore
+
+    hf = AutoTokenizer.from_pretrained(str(model_dir), use_fast=True)
+
+    def encode(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        enc = hf(list(texts), padding="max_length", truncation=True, max_length=max_length, return_tensors="np")
+        return enc["input_ids"].astype(np.int64), enc["attention_mask"].astype(np.int64)
+
+    return encode
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = logits - logits.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class OnnxIntentClassifier:
+    """Intent classifier running the exported ONNX graph on CPU.
+
+    The export pads to a fixed `max_length` (64) and only the batch axis is
+    dynamic, so every batch is tokenized to exactly that length. With
+    `quantize` the model is converted once to dynamic int8
+    (`intent_classifier.int8.onnx` next to the original) and that copy is used.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        onnx_path: Optional[str] = None,
+        max_length: int = 64,
+        quantize: bool = False,
+        threads: Optional[int] = None,
+    ):
+        import onnxruntime as ort  # type: ignore
+
+        self.model_dir = Path(model_dir).expanduser()
+        self.max_length = max_length
+        path = Path(onnx_path) if onnx_path else self.model_dir / ONNX_FILE
+        if quantize:
+            path = self._quantized(path)
+        self.onnx_path = path
+
+        with open(self.model_dir / LABELS_FILE, encoding="utf-8") as fh:
+            self.labels: List[str] = json.load(fh)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads or max(1, (os.cpu_count() or 2) // 2)
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._encode = _load_tokenizer(self.model_dir, max_length)
+        logger.info(f"ONNX intent model loaded: {path} ({len(self.labels)} intents)")
+
+    @staticmethod
+    def _quantized(path: Path) -> Path:
+        target = path.with_name(QUANTIZED_FILE)
+        if not target.exists() or target.stat().st_mtime < path.stat().st_mtime:
+            from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+
+            logger.info(f"Quantizing intent model to int8: {target}")
+            quantize_dynamic(str(path), str(target), weight_type=QuantType.QInt8)
+        return target
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """(intent, confidence) for each text, computed in one session.run()."""
+        if not texts:
+            return []
+        ids, mask = self._encode(texts)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        feeds = {k: v for k, v in feeds.items() if k in self._input_names}
+        (logits,) = self.session.run(["logits"], feeds)
+        probs = _softmax(np.asarray(logits, dtype=np.float32))
+        best = probs.argmax(axis=1)
+        return [(self.labels[i], float(probs[row, i])) for row, i in enumerate(best)]
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        return self.predict_batch([text])[0]
+
+
+class IntentBatcher:
+    """Micro-batch concurrent classify() calls into predict_batch() runs.
+
+    The first waiting request opens a window of `window_ms`; everything that
+    arrives inside it (up to `max_batch`) is classified together on a single
+    inference thread, so the event loop never blocks on the model.
+    """
+
+    def __init__(self, classifier, max_batch: int = 32, window_ms: float = 5.0):
+        self.classifier = classifier
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dark8-intent")
+        self.batches = 0
+        self.requests = 0
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def classify(self, text: str) -> Tuple[str, float]:
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((text, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    # drain whatever is already queued without waiting
+                    if queue.empty():
+                        break
+                    batch.append(queue.get_nowait())
+                    continue
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            live = [(t, f) for t, f in batch if not f.done()]
+            if not live:
+                continue
+            self.batches += 1
+            self.requests += len(live)
+            try:
+                preds = await loop.run_in_executor(
+                    self._executor, self.classifier.predict_batch, [t for t, _ in live]
+                )
+                for (_, fut), pred in zip(live, preds):
+                    if not fut.done():
+                        fut.set_result(pred)
+            except Exception as e:
+                for _, fut in live:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    async def aclose(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch": (self.requests / self.batches) if self.batches else 0.0,
+        }
+
+
+_intent_service: Optional[IntentBatcher] = None
+_intent_service_failed = False
+
+
+def get_intent_service() -> Optional[IntentBatcher]:
+    """Shared batcher for the configured ONNX model, or None when not configured/available."""
+    global _intent_service, _intent_service_failed
+    if _intent_service is not None or _intent_service_failed:
+        return _intent_service
+    from dark8_core.config import config
+
+    model_dir = getattr(config, "NLP_ONNX_MODEL_DIR", "")
+    if not model_dir:
+        _intent_service_failed = True
+        return None
+    try:
+        classifier = OnnxIntentClassifier(model_dir, quantize=getattr(config, "NLP_ONNX_QUANTIZE", False))
+        _intent_service = IntentBatcher(
+            classifier,
+            max_batch=getattr(config, "NLP_ONNX_MAX_BATCH", 32),
+            window_ms=getattr(config, "NLP_ONNX_BATCH_WINDOW_MS", 5.0),
+        )
+    except Exception as e:
+        logger.warning(f"ONNX intent model unavailable, using keyword intents: {e}")
+        _intent_service_failed = True
+    return _intent_service
+
+
+__all__ = ["OnnxIntentClassifier", "IntentBatcher", "PIPELINE_INTENTS", "pipeline_intent", "get_intent_service"]
@@ -0,0 +1,375 @@
+# DARK8 OS - Vector Store
+"""
+Persistent embedding index for semantic search.
+
+Vectors are L2-normalized on insert and kept in one float32 matrix, so cosine
+similarity is a single matrix product. With a `path` the matrix is a
+memory-mapped file (`vectors.f32`) and ids/payloads live in an append-only
+journal (`journal.jsonl`), so every add/delete is durable without rewriting
+the index; `compact()` squashes the journal.
+
+Small indexes are searched exactly. Past `exact_threshold` live vectors an
+IVF index (spherical k-means centroids + inverted lists) restricts each query
+to the `nprobe` closest clusters.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dark8_core.logger import logger
+
+_VECTORS = "vectors.f32"
+_JOURNAL = "journal.jsonl"
+_CENTROIDS = "ivf_centroids.npy"
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first (argpartition, no full sort)."""
+    if k >= scores.shape[0]:
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class VectorStore:
+    """Append/delete/search store of normalized float32 vectors keyed by id."""
+
+    def __init__(
+        self,
+        dim: int = 768,
+        path: Optional[str] = None,
+        exact_threshold: int = 20000,
+        nprobe: int = 8,
+        initial_capacity: int = 1024,
+    ):
+        self.dim = dim
+        self.path = Path(path).expanduser() if path else None
+        self.exact_threshold = exact_threshold
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._ids: List[Optional[str]] = []  # slot -> id (None = free)
+        self._payloads: List[Any] = []
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._matrix: np.ndarray = np.zeros((0, dim), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._journal = None
+        # IVF state: centroids (nlist x dim), slot lists per centroid, slot -> list
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: Optional[List[List[int]]] = None
+        self._assign: Dict[int, int] = {}
+        self._trained_on = 0
+        if self.path is not None:
+            self._open()
+        else:
+            self._resize(initial_capacity)
+
+    # -- storage ---------------------------------------------------------------
+
+    @property
+    def capacity(self) -> int:
+        return self._matrix.shape[0]
+
+    def _resize(self, capacity: int) -> None:
+        old = self._matrix
+        if self.path is not None:
+            file = self.path / _VECTORS
+            if isinstance(old, np.memmap):
+                old.flush()
+            with open(file, "ab") as fh:
+                fh.truncate(capacity * self.dim * 4)
+            self._matrix = np.memmap(file, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        else:
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[: old.shape[0]] = old
+            self._matrix = grown
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: self._alive.shape[0]] = self._alive
+        self._alive = alive
+
+    def _open(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self.path / _VECTORS
+        rows = file.stat().st_size // (self.dim * 4) if file.exists() else 0
+        journal = self.path / _JOURNAL
+        if journal.exists():
+            self._replay(journal)
+        self._resize(max(rows, len(self._ids), 1024))
+        for slot, item_id in enumerate(self._ids):
+            self._alive[slot] = item_id is not None
+        centroids = self.path / _CENTROIDS
+        if centroids.exists():
+            try:
+                self._centroids = np.load(centroids)
+                self._trained_on = len(self._slots)
+            except Exception as e:
+                logger.warning(f"VectorStore: ignoring unreadable IVF centroids: {e}")
+        self._journal = open(journal, "a", encoding="utf-8")
+
+    def _replay(self, journal: Path) -> None:
+        with open(journal, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # torn last line after a crash
+                    continue
+                if entry.get("op") == "dim":
+                    if entry["dim"] != self.dim:
+                        raise ValueError(f"vector store at {self.path} has dim {entry['dim']}, not {self.dim}")
+                elif entry.get("op") == "add":
+                    slot = entry["slot"]
+                    while len(self._ids) <= slot:
+                        self._ids.append(None)
+                        self._payloads.append(None)
+                    old = self._slots.pop(entry["id"], None)
+                    if old is not None and old != slot:
+                        self._ids[old] = None
+                        self._payloads[old] = None
+                    self._ids[slot] = entry["id"]
+                    self._payloads[slot] = entry.get("payload")
+                    self._slots[entry["id"]] = slot
+                elif entry.get("op") == "del":
+                    slot = self._slots.pop(entry["id"], None)
+                    if slot is not None:
+                        self._ids[slot] = None
+                        self._payloads[slot] = None
+        self._free = [slot for slot, item_id in enumerate(self._ids) if item_id is None]
+
+    def _log(self, entry: Dict[str, Any]) -> None:
+        if self._journal is not None:
+            if self._journal.tell() == 0:
+                self._journal.write(json.dumps({"op": "dim", "dim": self.dim}) + "\n")
+            self._journal.write(json.dumps(entry, default=str) + "\n")
+            self._journal.flush()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, item_id: object) -> bool:
+        return str(item_id) in self._slots
+
+    def ids(self) -> List[str]:
+        return [i for i in self._ids if i is not None]
+
+    def get(self, item_id: Any) -> Optional[Tuple[np.ndarray, Any]]:
+        """(normalized vector, payload) for item_id, or None."""
+        with self._lock:
+            slot = self._slots.get(str(item_id))
+            if slot is None:
+                return None
+            return np.array(self._matrix[slot]), self._payloads[slot]
+
+    # -- writes ----------------------------------------------------------------
+
+    def add(self, item_id: Any, vector: Sequence[float], payload: Any = None) -> None:
+        self.add_many([item_id], [vector], [payload])
+
+    def add_many(
+        self,
+        ids: Sequence[Any],
+        vectors: Any,
+        payloads: Optional[Sequence[Any]] = None,
+    ) -> int:
+        """Insert or replace vectors (one row per id). Returns number written."""
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        matrix = _normalize(matrix)
+        payloads = list(payloads) if payloads is not None else [None] * len(ids)
+        with self._lock:
+            for item_id, row, payload in zip(ids, matrix, payloads):
+                item_id = str(item_id)
+                slot = self._slots.get(item_id)
+                if slot is None:
+                    slot = self._free.pop() if self._free else len(self._ids)
+                    if slot == len(self._ids):
+                        self._ids.append(None)
+                        self._payloads.append(None)
+                    if slot >= self.capacity:
+                        self._resize(max(self.capacity * 2, slot + 1))
+                else:
+                    self._unassign(slot)
+                self._matrix[slot] = row
+                self._alive[slot] = True
+                self._ids[slot] = item_id
+                self._payloads[slot] = payload
+                self._slots[item_id] = slot
+                self._assign_slot(slot)
+                self._log({"op": "add", "id": item_id, "slot": slot, "payload": payload})
+        return len(ids)
+
+    def delete(self, item_id: Any) -> bool:
+        with self._lock:
+            slot = self._slots.pop(str(item_id), None)
+            if slot is None:
+                return False
+            self._unassign(slot)
+            self._alive[slot] = False
+            self._ids[slot] = None
+            self._payloads[slot] = None
+            self._free.append(slot)
+            self._log({"op": "del", "id": str(item_id)})
+            return True
+
+    def add_knowledge_items(self, items: Iterable[Any], embed=None) -> int:
+        """Load `KnowledgeItem`-like rows (objects or dicts with id/title/content/embedding).
+
+        Stored embeddings (f16/base64, JSON or CSV strings) are decoded; rows
+        without one are embedded with `embed(text)` or skipped if it is None.
+        """
+        from dark8_core.search.vector import decode_embedding
+
+        ids, vectors, payloads = [], [], []
+        for item in items:
+            get = item.get if isinstance(item, dict) else (lambda k, _i=item: getattr(_i, k, None))
+            vec = decode_embedding(get("embedding"))
+            text = " ".join(x for x in (get("title"), get("content")) if x)
+            if vec is None:
+                if embed is None:
+                    continue
+                vec = embed(text)
+            if len(vec) != self.dim:
+                continue
+            ids.append(f"knowledge:{get('id')}")
+            vectors.append(vec)
+            payloads.append({"text": text, "type": get("type"), "title": get("title"), "doc_id": get("id")})
+        return self.add_many(ids, vectors, payloads) if ids else 0
+
+    def flush(self) -> None:
+        with self._lock:
+            if isinstance(self._matrix, np.memmap):
+                self._matrix.flush()
+            if self._journal is not None:
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+
+    def compact(self) -> None:
+        """Rewrite the journal with only the live entries."""
+        if self.path is None:
+            return
+        with self._lock:
+            self.flush()
+            tmp = self.path / (_JOURNAL + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(json.dumps({"op": "dim", "dim": self.dim}) + "\n")
+                for slot, item_id in enumerate(self._ids):
+                    if item_id is not None:
+                        entry = {"op": "add", "id": item_id, "slot": slot, "payload": self._payloads[slot]}
+                        fh.write(json.dumps(entry, default=str) + "\n")
+            self._journal.close()
+            os.replace(tmp, self.path / _JOURNAL)
+            self._journal = open(self.path / _JOURNAL, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._journal is None:
+                return
+            self.compact()
+            self._journal.close()
+            self._journal = None
+            if isinstance(self._matrix, np.memmap):
+                self._matrix.flush()
+
+    # -- IVF -------------------------------------------------------------------
+
+    def _assign_slot(self, slot: int) -> None:
+        if self._lists is None:
+            return
+        c = int(np.argmax(self._centroids @ self._matrix[slot]))
+        self._lists[c].append(slot)
+        self._assign[slot] = c
+
+    def _unassign(self, slot: int) -> None:
+        if self._lists is None:
+            return
+        c = self._assign.pop(slot, None)
+        if c is not None:
+            self._lists[c].remove(slot)
+
+    def _train(self, live: np.ndarray, iterations: int = 10) -> None:
+        nlist = int(min(4096, max(1, np.sqrt(live.shape[0]))))
+        rng = np.random.default_rng(0)
+        sample = live[rng.choice(live.shape[0], size=min(live.shape[0], nlist * 64), replace=False)]
+        data = np.asarray(self._matrix[np.sort(sample)])
+        centroids = data[rng.choice(data.shape[0], size=nlist, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+        self._centroids = centroids.astype(np.float32)
+        if self.path is not None:
+            np.save(self.path / _CENTROIDS, self._centroids)
+
+    def _ensure_ivf(self) -> None:
+        live = np.flatnonzero(self._alive[: len(self._ids)])
+        stale = self._centroids is None or live.shape[0] > 2 * max(self._trained_on, 1)
+        if stale:
+            self._train(live)
+            self._trained_on = live.shape[0]
+            self._lists = None
+        if self._lists is None:
+            lists: List[List[int]] = [[] for _ in range(self._centroids.shape[0])]
+            assign: Dict[int, int] = {}
+            for start in range(0, live.shape[0], 65536):
+                chunk = live[start : start + 65536]
+                labels = np.argmax(np.asarray(self._matrix[chunk]) @ self._centroids.T, axis=1)
+                for slot, c in zip(chunk.tolist(), labels.tolist()):
+                    lists[c].append(slot)
+                    assign[slot] = c
+            self._lists, self._assign = lists, assign
+
+    # -- search ----------------------------------------------------------------
+
+    def search(self, query: Sequence[float], k: int = 5) -> List[Tuple[str, float, Any]]:
+        """Top-k (id, cosine similarity, payload) for one query vector."""
+        return self.search_many([query], k)[0]
+
+    def search_many(self, queries: Any, k: int = 5) -> List[List[Tuple[str, float, Any]]]:
+        """Top-k matches for each row of `queries`, computed in one batch."""
+        q = _normalize(np.asarray(queries, dtype=np.float32).reshape(-1, self.dim))
+        with self._lock:
+            n = len(self._ids)
+            if not self._slots or k <= 0:
+                return [[] for _ in range(q.shape[0])]
+            if len(self._slots) < self.exact_threshold:
+                scores = q @ self._matrix[:n].T
+                scores[:, ~self._alive[:n]] = -np.inf
+                return [self._hits(np.arange(n), row, k) for row in scores]
+            self._ensure_ivf()
+            out = []
+            nprobe = min(self.nprobe, self._centroids.shape[0])
+            for row in q:
+                probe = _top_k(self._centroids @ row, nprobe)
+                cand = np.fromiter(
+                    (slot for c in probe for slot in self._lists[c]), dtype=np.int64
+                )
+                if cand.size == 0:
+                    out.append([])
+                    continue
+                out.append(self._hits(cand, np.asarray(self._matrix[cand]) @ row, k))
+            return out
+
+    def _hits(self, slots: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[str, float, Any]]:
+        hits = []
+        for i in _top_k(scores, min(k, scores.shape[0])):
+            if not np.isfinite(scores[i]):
+                break
+            slot = int(slots[i])
+            hits.append((self._ids[slot], float(scores[i]), self._payloads[slot]))
+        return hits
+
+
+__all__ = ["VectorStore"]
@@ -4,10 +4,11 @@ Monitor and optimize system performance.
 """
 
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict
 
 import psutil
 
+from dark8_core.llm.cache import LLMCache, get_llm_cache
 from dark8_core.logger import logger
 
 
@@ -84,68 +85,12 @@ class SystemMonitor:
         }
 
 
-class LLMResponseCache:
-    """Cache LLM responses for fast retrieval"""
+class LLMResponseCache(LLMCache):
+    """Cache LLM responses for fast retrieval (in-memory tiers of LLMCache)"""
 
     def __init__(self, max_size: int = 1000):
-        self.cache: Dict[str, tuple] = {}
+        super().__init__(max_memory=max_size)
         self.max_size = max_size
-        self.hits = 0
-        self.misses = 0
-
-    def get(self, prompt: str) -> Optional[str]:
-        """Retrieve cached response"""
-
-        key = self._hash_prompt(prompt)
-
-        if key in self.cache:
-            response, timestamp = self.cache[key]
-            self.hits += 1
-            logger.debug(f"✓ Cache hit (total: {self.hits})")
-            return response
-
-        self.misses += 1
-        return None
-
-    def put(self, prompt: str, response: str):
-        """Store response in cache"""
-
-        key = self._hash_prompt(prompt)
-
-        # Simple eviction: remove oldest when full
-        if len(self.cache) >= self.max_size:
-            oldest_key = min(self.cache, key=lambda k: self.cache[k][1])
-            del self.cache[oldest_key]
-            logger.debug("Cache evicted oldest entry")
-
-        import time
-
-        self.cache[key] = (response, time.time())
-
-    @staticmethod
-    def _hash_prompt(prompt: str) -> str:
-        """Hash prompt for cache key"""
-        import hashlib
-
-        return hashlib.sha256(prompt.encode()).hexdigest()[:16]
-
-    def get_stats(self) -> Dict:
-        """Get cache statistics"""
-        total = self.hits + self.misses
-        hit_rate = self.hits / total if total > 0 else 0
-
-        return {
-            "size": len(self.cache),
-            "max_size": self.max_size,
-            "hits": self.hits,
-            "misses": self.misses,
-            "hit_rate": f"{hit_rate:.1%}",
-        }
-
-    def clear(self):
-        """Clear cache"""
-        self.cache.clear()
-        logger.info("✓ Cache cleared")
 
 
 class QueryOptimizer:
@@ -178,7 +123,8 @@ class PerformanceOptimizer:
 
     def __init__(self):
         self.system_monitor = SystemMonitor()
-        self.cache = LLMResponseCache()
+        # report on the cache ReasoningEngine actually uses
+        self.cache = get_llm_cache() or LLMResponseCache()
         self.query_optimizer = QueryOptimizer()
 
     def get_optimization_recommendations(self) -> Dict:
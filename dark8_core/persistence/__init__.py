@@ -4,7 +4,7 @@ Database models, migrations, and storage abstractions.
 """
 
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from sqlalchemy import JSON, Column, DateTime, Float, Integer, String, Text, create_engine
 from sqlalchemy.ext.declarative import declarative_base
@@ -107,6 +107,8 @@ class DatabaseManager:
     def __init__(self):
         self.engine = None
         self.SessionLocal = None
+        # called as listener(user_input, intent, confidence, context) after a conversation is saved
+        self._conversation_listeners: List[Callable] = []
         self._init_database()
 
     def _init_database(self):
@@ -176,6 +178,11 @@ class DatabaseManager:
         finally:
             session.close()
 
+    def on_conversation(self, listener: Callable) -> None:
+        """Register a listener notified of every saved conversation"""
+        if listener not in self._conversation_listeners:
+            self._conversation_listeners.append(listener)
+
     def add_conversation(
         self,
         user_input: str,
@@ -199,7 +206,6 @@ class DatabaseManager:
             session.add(conversation)
             session.commit()
             logger.debug(f"Conversation saved: {intent}")
-            return conversation
         except Exception as e:
             session.rollback()
             logger.error(f"Error saving conversation: {e}")
@@ -207,6 +213,13 @@ class DatabaseManager:
         finally:
             session.close()
 
+        for listener in list(self._conversation_listeners):
+            try:
+                listener(user_input, intent, confidence, context or {})
+            except Exception as e:
+                logger.warning(f"Conversation listener failed: {e}")
+        return conversation
+
     def get_conversations(self, limit: int = 50) -> List[Conversation]:
         """Get recent conversations"""
         session = self.get_session()
@@ -1,12 +1,17 @@
 from .engine import SearchEngine
-from .base import SearchResult, SearchSource
+from .base import SearchResult, SearchSource, make_snippet
+from .cache import SearchCache
 from .matcher import FuzzyMatcher
-from .ranking import RankingEngine
+from .ranking import RankingEngine, TopK
 from .indexer import Indexer
+from .catalog import FileCatalog
+from .query import parse_query
+from .vector import VectorSearchSource, decode_embedding, encode_embedding
 from .sources import (
     FileSearchSource,
     DatabaseSearchSource,
     MemorySearchSource,
+    IndexSearchSource,
     PluginSearchSource,
 )
 
@@ -14,11 +19,20 @@ __all__ = [
     "SearchEngine",
     "SearchResult",
     "SearchSource",
+    "make_snippet",
+    "SearchCache",
     "FuzzyMatcher",
     "RankingEngine",
+    "TopK",
     "Indexer",
+    "FileCatalog",
+    "parse_query",
     "FileSearchSource",
     "DatabaseSearchSource",
     "MemorySearchSource",
+    "IndexSearchSource",
     "PluginSearchSource",
+    "VectorSearchSource",
+    "encode_embedding",
+    "decode_embedding",
 ]
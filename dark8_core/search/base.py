@@ -1,16 +1,132 @@
-from dataclasses import dataclass
-from typing import Any, Dict, List
+import re
+from typing import Any, Dict, List, Optional
+
+
+def make_snippet(
+    text: str,
+    query: str = "",
+    offset: Optional[int] = None,
+    width: int = 200,
+    highlight: bool = True,
+) -> str:
+    """Cut the line around a match out of text, with `<b>`-highlighted query hits.
+
+    `offset` is the match position if the caller already knows it; otherwise the
+    first case-insensitive occurrence of query is used (or the start of text).
+    Markup matches the FTS5 snippet() output used by the database sources.
+    """
+    if not text:
+        return ""
+    q = (query or "").strip()
+    if offset is None:
+        offset = text.lower().find(q.lower()) if q else -1
+        if offset < 0:
+            offset = 0
+    start = text.rfind("\n", 0, offset) + 1
+    end = text.find("\n", offset)
+    if end < 0:
+        end = len(text)
+    line = text[start:end]
+    if len(line) > width:
+        # keep the match inside the window, a quarter of it as leading context
+        lo = max(0, min(offset - start - width // 4, len(line) - width))
+        line = line[lo : lo + width]
+    line = line.strip()
+    if highlight and q:
+        line = re.sub(re.escape(q), lambda m: f"<b>{m.group(0)}</b>", line, flags=re.IGNORECASE)
+    return line
 
 
-@dataclass
 class SearchResult:
-    source: str
-    score: float
-    snippet: str
-    metadata: Dict[str, Any]
+    """One hit from a source.
+
+    Besides the final `snippet` a result can carry only a cheap reference to
+    its text (`text` + `query` + `offset`); the snippet is then cut out on first
+    access, i.e. only for results that survive ranking and the top-k trim.
+    `ref` identifies the underlying item (row id, path, ...) for callers.
+    """
+
+    __slots__ = ("source", "score", "metadata", "ref", "_snippet", "_text", "_query", "_offset")
+
+    def __init__(
+        self,
+        source: str,
+        score: float,
+        snippet: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        ref: Any = None,
+        text: Optional[str] = None,
+        query: str = "",
+        offset: Optional[int] = None,
+    ):
+        self.source = source
+        self.score = score
+        self.metadata = metadata if metadata is not None else {}
+        self.ref = ref
+        self._snippet = snippet
+        self._text = text
+        self._query = query
+        self._offset = offset
+
+    @property
+    def snippet(self) -> str:
+        if self._snippet is None:
+            self._snippet = make_snippet(self._text or "", self._query, self._offset)
+            self._text = None
+        return self._snippet
+
+    @snippet.setter
+    def snippet(self, value: str) -> None:
+        self._snippet = value
+        self._text = None
+
+    def with_score(self, score: float) -> "SearchResult":
+        """Copy with a new score; a pending snippet stays pending."""
+        return SearchResult(
+            self.source, score, self._snippet, self.metadata, self.ref, self._text, self._query, self._offset
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"source": self.source, "score": self.score, "snippet": self.snippet, "metadata": self.metadata}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SearchResult):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return (
+            f"SearchResult(source={self.source!r}, score={self.score!r}, "
+            f"snippet={self.snippet!r}, metadata={self.metadata!r})"
+        )
 
 
 class SearchSource:
+    # Sources doing blocking I/O set this and implement search_sync(); SearchEngine
+    # then runs them in its thread pool instead of on the event loop.
+    blocking: bool = False
+    # Sources that set this also accept a `topk` keyword (a ranking.TopK shared by
+    # the whole search), push every result they return into it as they find it, and
+    # may skip candidates (or stop scanning) once nothing can beat topk.threshold.
+    accepts_topk: bool = False
+    # Blocking sources that set this accept a `deadline` keyword (a time.monotonic()
+    # value) and stop scanning once it has passed; the thread cannot be cancelled.
+    accepts_deadline: bool = False
+    # Expensive scans (LIKE over a table, walking a file tree) set this; SearchEngine
+    # starts them only when no database source found anything through its FTS index.
+    fallback: bool = False
+
+    def fingerprint(self) -> str:
+        """Identity of this source's data, used in SearchEngine cache keys.
+
+        Sources that are recreated per call (e.g. extra_sources) should override
+        this with a description of what they search so equal sources share cache entries.
+        """
+        return f"{type(self).__name__}:{id(self)}"
+
+    def search_sync(self, query: str, limit: int = 10) -> List[SearchResult]:
+        raise NotImplementedError()
+
     async def search(self, query: str, limit: int = 10) -> List[SearchResult]:
         """Search the source for query. Return list of SearchResult."""
         raise NotImplementedError()
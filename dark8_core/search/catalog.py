@@ -0,0 +1,165 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from dark8_core.agent.tools import db as db_tools
+
+DEFAULT_EXTS = {".txt", ".md", ".json", ".py"}
+
+
+def _under(path: str, root: str) -> bool:
+    """True if `path` is `root` or lies inside it ("/docs2/a" is not under "/docs")."""
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class FileCatalog:
+    """Persistent, mtime-aware catalog of files stored in a SQLite sidecar.
+
+    Each file is tracked by (path, mtime, size, sha256) and mirrored into the
+    `documents` / `documents_fts` tables of the same database. A rescan only
+    stats the tree and re-reads files whose mtime or size changed; files whose
+    content hash is unchanged are not re-indexed.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        self._ready = False
+
+    def _ensure_schema(self) -> None:
+        if self._ready:
+            return
+        db_tools.ensure_documents_table(self.db_path)
+        db_tools.ensure_fts5(self.db_path)
+        db_tools.run_write(
+            self.db_path,
+            """
+            CREATE TABLE IF NOT EXISTS file_catalog (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                doc_id INTEGER
+            )
+            """,
+        )
+        db_tools.run_write(
+            self.db_path,
+            "CREATE INDEX IF NOT EXISTS idx_file_catalog_doc ON file_catalog(doc_id)",
+        )
+        self._ready = True
+
+    def scan(self, roots: Iterable[str], exts: Optional[set] = None) -> Dict[str, int]:
+        """Bring the catalog up to date with the files under `roots`.
+
+        Returns counters: added, updated, unchanged, removed.
+        """
+        self._ensure_schema()
+        exts = exts or DEFAULT_EXTS
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        known = {
+            r["path"]: r
+            for r in db_tools.run_query_all(
+                self.db_path, "SELECT path, mtime, size, sha256, doc_id FROM file_catalog"
+            )
+        }
+        seen = set()
+        scanned_roots: List[str] = []
+
+        for root in roots:
+            root = Path(root)
+            if not root.exists():
+                continue
+            scanned_roots.append(str(root))
+            candidates = [root] if root.is_file() else root.rglob("*")
+            for p in candidates:
+                if not p.is_file() or p.suffix not in exts:
+                    continue
+                key = str(p)
+                seen.add(key)
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                row = known.get(key)
+                if row and row["mtime"] == st.st_mtime and row["size"] == st.st_size:
+                    stats["unchanged"] += 1
+                    continue
+                self._refresh_file(p, st, row, stats)
+
+        for path, row in known.items():
+            if path in seen or not any(_under(path, r) for r in scanned_roots):
+                continue
+            if not Path(path).exists():
+                if row.get("doc_id") is not None:
+                    db_tools.delete_document(self.db_path, row["doc_id"])
+                db_tools.run_write(self.db_path, "DELETE FROM file_catalog WHERE path = ?", (path,))
+                stats["removed"] += 1
+        return stats
+
+    def _refresh_file(self, p: Path, st, row: Optional[Dict[str, Any]], stats: Dict[str, int]):
+        try:
+            data = p.read_bytes()
+        except Exception:
+            return
+        digest = hashlib.sha256(data).hexdigest()
+        key = str(p)
+        if row and row["sha256"] == digest:
+            # touched but identical content: just remember the new stat
+            db_tools.run_write(
+                self.db_path,
+                "UPDATE file_catalog SET mtime = ?, size = ? WHERE path = ?",
+                (st.st_mtime, st.st_size, key),
+            )
+            stats["unchanged"] += 1
+            return
+
+        text = data.decode("utf-8", errors="ignore")
+        meta = {"title": p.name, "path": key}
+        if row and row.get("doc_id") is not None:
+            db_tools.update_document(self.db_path, row["doc_id"], text, meta)
+            doc_id = row["doc_id"]
+            stats["updated"] += 1
+        else:
+            doc_id = db_tools.insert_document(self.db_path, text, meta)
+            stats["added"] += 1
+        db_tools.run_write(
+            self.db_path,
+            "INSERT OR REPLACE INTO file_catalog (path, mtime, size, sha256, doc_id) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, st.st_mtime, st.st_size, digest, doc_id),
+        )
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """FTS search over cataloged files. Returns dicts with path, doc_id, snippet, score."""
+        self._ensure_schema()
+        weights = None
+        try:
+            from dark8_core.config import config
+
+            weights = getattr(config, "SEARCH_WEIGHTS", None)
+        except Exception:
+            pass
+        hits = db_tools.search_fts(self.db_path, query, limit=limit, weights=weights)
+        if not hits:
+            return []
+        ids = [h["id"] for h in hits]
+        placeholders = ",".join("?" for _ in ids)
+        rows = db_tools.run_query_all(
+            self.db_path,
+            f"SELECT doc_id, path FROM file_catalog WHERE doc_id IN ({placeholders})",
+            tuple(ids),
+        )
+        paths = {r["doc_id"]: r["path"] for r in rows}
+        out = []
+        for h in hits:
+            path = paths.get(h["id"])
+            if path is None:
+                continue
+            out.append({"path": path, "doc_id": h["id"], "snippet": h["snippet"], "score": h["score"]})
+        return out
+
+    def count(self) -> int:
+        self._ensure_schema()
+        row = db_tools.run_query_single(self.db_path, "SELECT COUNT(*) AS n FROM file_catalog")
+        return int(row["n"]) if row else 0
@@ -1,28 +1,78 @@
+import asyncio
+import functools
+import hashlib
+import os
 import time
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from .base import SearchResult, SearchSource
-from .ranking import RankingEngine
+from .cache import SearchCache
+from .ranking import RankingEngine, TopK
 
 try:
-    from dark8_core.search.sources import DatabaseSearchSource
+    from dark8_core.agent.tools.db import add_write_listener
 except Exception:
-    DatabaseSearchSource = None
-
-from dark8_core.config import config
-try:
-    from dark8_core.agent.tools.db import search_fts
-except Exception:
-    search_fts = None
+    add_write_listener = None
 
 
 class SearchEngine:
-    def __init__(self):
+    def __init__(
+        self,
+        source_timeout: float = 2.0,
+        search_timeout: float = 5.0,
+        max_workers: int = 4,
+        cache_max_entries: int = 256,
+        cache_max_bytes: int = 8 * 1024 * 1024,
+        cache_ttl_seconds: float = 30,
+        ranker: Optional[RankingEngine] = None,
+    ):
         self.sources: Dict[str, SearchSource] = {}
-        self._ranker = RankingEngine()
-        # simple in-memory cache: key -> (timestamp, results_dict)
-        self._cache: Dict[Tuple[str, int, bool], Tuple[float, Dict]] = {}
-        self.cache_ttl_seconds = 30
+        # sources score on incomparable scales -> fuse per-source rankings (RRF)
+        self._ranker = ranker if ranker is not None else RankingEngine(method="rrf")
+        # bounded LRU+TTL cache keyed on (query, limit, fuzzy, source fingerprint)
+        self._cache = SearchCache(
+            max_entries=cache_max_entries, max_bytes=cache_max_bytes, ttl_seconds=cache_ttl_seconds
+        )
+        # drop cached answers when documents in a searched DB change
+        if add_write_listener is not None:
+            add_write_listener(self._on_db_write)
+        # per-source deadline and overall deadline for one search() call (seconds)
+        self.source_timeout = source_timeout
+        self.search_timeout = search_timeout
+        # bounded pool for sources doing blocking I/O (files, SQLite)
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def cache_ttl_seconds(self) -> float:
+        return self._cache.ttl_seconds
+
+    @cache_ttl_seconds.setter
+    def cache_ttl_seconds(self, value: float) -> None:
+        self._cache.ttl_seconds = value
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and current size of the result cache."""
+        return self._cache.stats()
+
+    def _on_db_write(self, db_path: str) -> None:
+        self._cache.invalidate(f"db:{os.path.abspath(db_path)}")
+
+    def _cache_identity(self, extra_sources: list | None) -> Tuple[str, List[str]]:
+        """Return (fingerprint of the source set, cache tags for the DBs it reads)."""
+        parts = sorted(f"{name}={src.fingerprint()}" for name, src in self.sources.items())
+        parts += sorted(f"extra={src.fingerprint()}" for src in (extra_sources or []))
+        tags = []
+        for src in list(self.sources.values()) + list(extra_sources or []):
+            db_path = getattr(src, "db_path", None)
+            catalog = getattr(src, "catalog", None)
+            if catalog is not None:
+                db_path = catalog.db_path
+            if db_path:
+                tags.append(f"db:{os.path.abspath(db_path)}")
+        digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+        return digest, tags
 
     def register_source(self, name: str, source: SearchSource) -> None:
         self.sources[name] = source
@@ -31,87 +81,174 @@ class SearchEngine:
         if name in self.sources:
             del self.sources[name]
 
+    def close(self) -> None:
+        """Release the blocking-source thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="dark8-search"
+            )
+        return self._executor
+
+    async def _run_blocking(self, func, *args):
+        # a job still queued when its caller gives up is cancelled with it
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    async def _query_source(
+        self,
+        src: SearchSource,
+        query: str,
+        limit: int,
+        topk: Optional[TopK] = None,
+        deadline: Optional[float] = None,
+        **kwargs,
+    ) -> List[SearchResult]:
+        pushes = topk is not None and getattr(src, "accepts_topk", False)
+        if pushes:
+            kwargs["topk"] = topk
+        if getattr(src, "blocking", False):
+            if getattr(src, "accepts_deadline", False):
+                # a running thread cannot be cancelled: let the scan itself give up in time
+                job_deadline = time.monotonic() + self.source_timeout
+                kwargs["deadline"] = job_deadline if deadline is None else min(job_deadline, deadline)
+            coro = self._run_blocking(functools.partial(src.search_sync, query, limit, **kwargs))
+        else:
+            coro = src.search(query, limit=limit, **kwargs)
+        results = await asyncio.wait_for(coro, timeout=self.source_timeout)
+        if topk is not None and results and not pushes:
+            # raise the running threshold for sources still in flight
+            topk.push_many(results)
+        return results
+
+    async def _query_fts(self, src, query: str, limit: int) -> List[SearchResult]:
+        coro = self._run_blocking(src.search_fts_sync, query, limit)
+        return await asyncio.wait_for(coro, timeout=self.source_timeout)
+
+    async def _query_fuzzy(self, src, query: str, limit: int) -> List[SearchResult]:
+        coro = self._run_blocking(src.search_fuzzy_sync, query, limit)
+        return await asyncio.wait_for(coro, timeout=self.source_timeout)
+
+    async def _gather(
+        self, jobs: Dict[str, "asyncio.Future"], timeout: float
+    ) -> Tuple[Dict[str, List], List[str]]:
+        """Await jobs concurrently for at most `timeout` seconds.
+
+        Returns (results per job name, names of jobs that timed out). Failed jobs
+        are dropped silently - one broken source must not break the search.
+        """
+        if not jobs:
+            return {}, []
+        tasks = {asyncio.ensure_future(coro): name for name, coro in jobs.items()}
+        done, pending = await asyncio.wait(tasks, timeout=max(0.0, timeout))
+        timed_out = []
+        for task in pending:
+            task.cancel()
+            timed_out.append(tasks[task])
+        out: Dict[str, List] = {}
+        for task in done:
+            name = tasks[task]
+            if task.cancelled():
+                continue
+            exc = task.exception()
+            if isinstance(exc, asyncio.TimeoutError):
+                timed_out.append(name)
+            elif exc is None:
+                out[name] = task.result() or []
+        # keep cancelled tasks from warning about never-retrieved exceptions
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        return out, sorted(timed_out)
+
     async def search(
         self, query: str, limit: int = 10, fuzzy: bool = True, extra_sources: list | None = None
     ) -> Dict:
         """Run search across registered sources, aggregate and rank results.
 
+        Each source compiles the parsed query to its own native form. Database
+        FTS5 lookups and the cheap sources run first, concurrently; the expensive
+        fallbacks (LIKE scans, walking file trees) start only when no FTS index
+        matched. With `fuzzy`, when nothing matches as typed (e.g. a misspelling),
+        database sources finally run a trigram-prefiltered fuzzy lookup (only
+        for databases that opted into the trigram index). Each job gets `source_timeout` seconds and the whole call
+        `search_timeout` seconds. Sources that miss the deadline are listed in
+        `timed_out` and the remaining results are returned as partial results;
+        blocking scans are told the deadline and stop at it, so they do not keep
+        the thread pool busy after the search has moved on.
+
         extra_sources: optional list of SearchSource instances to include for this call only.
         """
         # Validate query
         if not query or not isinstance(query, str):
             return {"success": False, "results": [], "error": "invalid query"}
-        # cache key is based on query + limit + fuzzy - sources are assumed stable for TTL
-        cache_key = (query or "", int(limit), bool(fuzzy))
-        now = time.time()
+        # cache key covers the source set too, so different extra_sources never collide
+        fingerprint, cache_tags = self._cache_identity(extra_sources)
+        cache_key = (query or "", int(limit), bool(fuzzy), fingerprint)
         cached = self._cache.get(cache_key)
-        if cached:
-            ts, val = cached
-            if now - ts <= self.cache_ttl_seconds:
-                return val
+        if cached is not None:
+            return cached
+
+        deadline = time.monotonic() + self.search_timeout
+        named = list(self.sources.items())
+        named += [(f"extra:{i}:{type(src).__name__}", src) for i, src in enumerate(extra_sources or [])]
+
+        # raw scores are compared directly -> one running top-k shared by all sources,
+        # which lets later scans skip what cannot make the cut. Fused rankings compare
+        # per-source ranks, and each source already stops at `limit` hits: no threshold.
+        topk = TopK(limit) if self._ranker.method == "score" else None
+        has_fts = {name for name, src in named if hasattr(src, "search_fts_sync")}
+        first_jobs = {name: self._query_fts(src, query, limit) for name, src in named if name in has_fts}
+        first_jobs.update(
+            (name, self._query_source(src, query, limit, topk, deadline))
+            for name, src in named
+            if not getattr(src, "fallback", False)
+        )
+        gathered, timed_out = await self._gather(first_jobs, deadline - time.monotonic())
+
+        if not any(gathered.get(name) for name in has_fts):
+            # no FTS index matched: now it is worth scanning
+            fallback_jobs = {
+                name: self._query_source(
+                    src, query, limit, topk, deadline, **({"fts": False} if name in has_fts else {})
+                )
+                for name, src in named
+                if getattr(src, "fallback", False)
+            }
+            more, more_timed_out = await self._gather(fallback_jobs, deadline - time.monotonic())
+            gathered.update(more)
+            timed_out = sorted(set(timed_out) | set(more_timed_out))
+
+        if fuzzy and not any(gathered.values()):
+            # nothing matched as typed (e.g. a misspelling): trigram-prefiltered fuzzy lookup
+            fuzzy_jobs = {
+                name: self._query_fuzzy(src, query, limit)
+                for name, src in named
+                if hasattr(src, "search_fuzzy_sync") and getattr(src, "db_path", None)
+            }
+            more, fuzzy_timed_out = await self._gather(fuzzy_jobs, deadline - time.monotonic())
+            gathered.update(more)
+            # a source answered by its fuzzy lookup is no longer missing
+            timed_out = sorted((set(timed_out) - set(more)) | set(fuzzy_timed_out))
 
         results: List[SearchResult] = []
-        # First, attempt FTS5 search on any registered DatabaseSearchSource
-        fts_results: List[SearchResult] = []
-        if search_fts is not None and DatabaseSearchSource is not None:
-            for name, src in self.sources.items():
-                try:
-                    if isinstance(src, DatabaseSearchSource) and getattr(src, "db_path", None):
-                        weights = getattr(config, "SEARCH_WEIGHTS", (1.0, 1.0, 1.0))
-                        fts_rows = search_fts(src.db_path, query, limit=limit, weights=weights)
-                        # search_fts is sync, might return list of dicts
-                        if hasattr(fts_rows, "__await__"):
-                            fts_rows = await fts_rows
-                        for r in fts_rows:
-                            # prefer FTS results with high score
-                            res = SearchResult(
-                                source="db_fts",
-                                score=float(r.get("score", 1.0) or 1.0),
-                                snippet=r.get("snippet", ""),
-                                metadata={"row_id": r.get("id")},
-                            )
-                            fts_results.append(res)
-                except Exception:
-                    continue
-
-        if fts_results:
-            ranked = self._ranker.rank(fts_results)
-            trimmed = ranked[:limit]
-            out = {"success": True, "results": [r.__dict__ for r in trimmed]}
-            try:
-                self._cache[cache_key] = (now, out)
-            except Exception:
-                pass
-            return out
-        # iterate registered sources first
-        for name, src in self.sources.items():
-            try:
-                src_results = await src.search(query, limit=limit)
-                results.extend(src_results)
-            except Exception:
-                # individual source failures should not break overall search
-                continue
-
-        # then iterate any extra ephemeral sources provided
-        if extra_sources:
-            for src in extra_sources:
-                try:
-                    src_results = await src.search(query, limit=limit)
-                    results.extend(src_results)
-                except Exception:
-                    continue
-
-        # Rank aggregated results
-        ranked = self._ranker.rank(results)
-
-        # Trim to limit
-        trimmed = ranked[:limit]
-
-        out = {"success": True, "results": [r.__dict__ for r in trimmed]}
-        # store in cache
-        try:
-            self._cache[cache_key] = (now, out)
-        except Exception:
-            pass
+        for name, _src in named:
+            results.extend(gathered.get(name) or [])
+
+        # Rank aggregated results, selecting only the top `limit` (bounded heap)
+        trimmed = self._ranker.rank(results, limit=limit)
+
+        out = {
+            "success": True,
+            "results": [r.to_dict() for r in trimmed],
+            "partial": bool(timed_out),
+            "timed_out": timed_out,
+        }
+        # store in cache - partial answers are not cached so a retry can complete them
+        if not timed_out:
+            self._cache.put(cache_key, out, tags=cache_tags)
 
         return out
@@ -1,11 +1,156 @@
-class Indexer:
-    def __init__(self):
-        pass
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
 
-    def index_document(self, doc_id: str, text: str):
-        # placeholder for indexing
-        raise NotImplementedError()
 
-    def search(self, query: str, limit: int = 10):
-        # placeholder for index search
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens (unicode aware, keeps Polish letters)."""
+    if not text:
         return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+class Indexer:
+    """In-process inverted index with BM25 scoring.
+
+    postings: term -> {doc_id: term frequency}
+    Documents can be added, replaced (index_document on an existing id) and
+    removed incrementally; corpus statistics are kept up to date on every change.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, snippet_chars: int = 200):
+        self.k1 = k1
+        self.b = b
+        self.snippet_chars = snippet_chars
+        self._postings: Dict[str, Dict[str, int]] = {}
+        # doc_id -> {"length": int, "terms": tuple, "metadata": dict, "snippet": str}
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return str(doc_id) in self._docs
+
+    @property
+    def avg_doc_length(self) -> float:
+        if not self._docs:
+            return 0.0
+        return self._total_length / len(self._docs)
+
+    def index_document(
+        self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Add a document, or replace it if doc_id is already indexed."""
+        doc_id = str(doc_id)
+        tokens = tokenize(text)
+        freqs = Counter(tokens)
+        with self._lock:
+            if doc_id in self._docs:
+                self._remove_locked(doc_id)
+            for term, tf in freqs.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            self._docs[doc_id] = {
+                "length": len(tokens),
+                "terms": tuple(freqs),
+                "metadata": dict(metadata or {}),
+                "snippet": (text or "")[: self.snippet_chars],
+            }
+            self._total_length += len(tokens)
+
+    def update_document(
+        self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.index_document(doc_id, text, metadata)
+
+    def remove_document(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._remove_locked(str(doc_id))
+
+    def _remove_locked(self, doc_id: str) -> bool:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return False
+        for term in doc["terms"]:
+            plist = self._postings.get(term)
+            if plist is None:
+                continue
+            plist.pop(doc_id, None)
+            if not plist:
+                del self._postings[term]
+        self._total_length -= doc["length"]
+        return True
+
+    def index_file(self, path: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Index a file using its path as doc_id. Returns False if it cannot be read."""
+        p = Path(path)
+        try:
+            text = p.read_text(errors="ignore")
+        except Exception:
+            return False
+        meta = {"path": str(p)}
+        meta.update(metadata or {})
+        self.index_document(str(p), text, meta)
+        return True
+
+    def index_paths(self, paths: Iterable[str], exts: Optional[set] = None) -> int:
+        """Walk roots once and index every matching file. Returns number of files indexed."""
+        exts = exts or {".txt", ".md", ".json", ".py"}
+        count = 0
+        for root in paths:
+            root = Path(root)
+            if not root.exists():
+                continue
+            candidates = [root] if root.is_file() else root.rglob("*")
+            for p in candidates:
+                if p.is_file() and p.suffix in exts and self.index_file(str(p)):
+                    count += 1
+        return count
+
+    def idf(self, term: str) -> float:
+        n = len(self._docs)
+        df = len(self._postings.get(term, ()))
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Return up to `limit` (doc_id, bm25_score) pairs, best first."""
+        terms = set(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+        with self._lock:
+            if not self._docs:
+                return []
+            avgdl = self.avg_doc_length or 1.0
+            k1, b = self.k1, self.b
+            scores: Dict[str, float] = {}
+            for term in terms:
+                plist = self._postings.get(term)
+                if not plist:
+                    continue
+                idf = self.idf(term)
+                for doc_id, tf in plist.items():
+                    dl = self._docs[doc_id]["length"]
+                    denom = tf + k1 * (1.0 - b + b * dl / avgdl)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1.0) / denom
+        return heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+
+    def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Return stored metadata and preview snippet for doc_id."""
+        doc = self._docs.get(str(doc_id))
+        if doc is None:
+            return None
+        return {"metadata": dict(doc["metadata"]), "snippet": doc["snippet"]}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._total_length = 0
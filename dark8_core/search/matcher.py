@@ -1,31 +1,81 @@
+from typing import List, Optional, Sequence
+
+
 class FuzzyMatcher:
     def __init__(self):
         # Try to use rapidfuzz if available for better scoring
         try:
-            from rapidfuzz import fuzz  # type: ignore
+            from rapidfuzz import fuzz, process  # type: ignore
 
             self._fuzz = fuzz
+            self._process = process
             self._use_rapidfuzz = True
         except Exception:
             self._fuzz = None
+            self._process = None
             self._use_rapidfuzz = False
 
-    def _levenshtein_distance(self, a: str, b: str) -> int:
-        # classic DP Levenshtein distance
+    def _levenshtein_distance(self, a: str, b: str, max_distance: Optional[int] = None) -> int:
+        """Levenshtein distance using two rows and an optional band.
+
+        With `max_distance` only cells within that diagonal band are computed and
+        the scan stops as soon as a whole row exceeds it; any distance above the
+        cutoff is reported as max_distance + 1.
+        """
+        if a == b:
+            return 0
+        # iterate rows over the longer string, keep the shorter one as columns
+        if len(a) > len(b):
+            a, b = b, a
         m, n = len(a), len(b)
+        k = max_distance if max_distance is not None else n
+        if n - m > k:
+            return k + 1
         if m == 0:
             return n
-        if n == 0:
-            return m
-        dp = [list(range(n + 1))]
-        for i in range(1, m + 1):
-            row = [i] + [0] * n
-            ai = a[i - 1]
-            for j in range(1, n + 1):
-                cost = 0 if ai == b[j - 1] else 1
-                row[j] = min(dp[i - 1][j] + 1, row[j - 1] + 1, dp[i - 1][j - 1] + cost)
-            dp.append(row)
-        return dp[m][n]
+        over = k + 1
+        prev = [j if j <= k else over for j in range(m + 1)]
+        for i in range(1, n + 1):
+            bi = b[i - 1]
+            lo = max(1, i - k)
+            hi = min(m, i + k)
+            cur = [over] * (m + 1)
+            cur[0] = i if i <= k else over
+            row_min = cur[0]
+            for j in range(lo, hi + 1):
+                cost = 0 if a[j - 1] == bi else 1
+                v = prev[j - 1] + cost
+                if prev[j] + 1 < v:
+                    v = prev[j] + 1
+                if cur[j - 1] + 1 < v:
+                    v = cur[j - 1] + 1
+                if v > over:
+                    v = over
+                cur[j] = v
+                if v < row_min:
+                    row_min = v
+            if row_min > k:
+                return over
+            prev = cur
+        return min(prev[m], over)
+
+    def _fallback_score(self, q: str, t: str, score_cutoff: float = 0.0) -> float:
+        # q is already stripped + lowercased
+        t = t.strip().lower()
+        if not q or not t:
+            return 0.0
+        # Fallback heuristics: exact substring -> 1.0
+        if q in t:
+            return 1.0
+        maxlen = max(len(q), len(t))
+        # Levenshtein normalized score; distances beyond the cutoff are not computed
+        max_dist = int((1.0 - score_cutoff) * maxlen) if score_cutoff > 0 else None
+        dist = self._levenshtein_distance(q, t, max_dist)
+        if max_dist is not None and dist > max_dist:
+            return 0.0
+        score = 1.0 - (dist / maxlen)
+        # clamp
+        return max(0.0, min(1.0, score))
 
     def score(self, query: str, text: str) -> float:
         """Return score in range [0.0, 1.0] between query and text.
@@ -46,15 +96,33 @@ class FuzzyMatcher:
             except Exception:
                 pass
 
-        # Fallback heuristics: exact substring -> 1.0
-        if q.lower() in t.lower():
-            return 1.0
+        return self._fallback_score(q.lower(), t)
 
-        # Levenshtein normalized score
-        dist = self._levenshtein_distance(q.lower(), t.lower())
-        maxlen = max(len(q), len(t))
-        if maxlen == 0:
-            return 0.0
-        score = 1.0 - (dist / maxlen)
-        # clamp
-        return max(0.0, min(1.0, score))
+    def score_many(self, query: str, texts: Sequence[str], score_cutoff: float = 0.0) -> List[float]:
+        """Score one query against many texts; same scale as `score`.
+
+        Uses rapidfuzz.process.cdist (vectorised, multi-threaded) when available.
+        Scores below `score_cutoff` are returned as 0.0, which lets the fallback
+        abandon hopeless Levenshtein computations early.
+        """
+        if not texts:
+            return []
+        if not query or not query.strip():
+            return [0.0] * len(texts)
+        q = query.strip()
+
+        if self._use_rapidfuzz and self._process is not None:
+            try:
+                matrix = self._process.cdist(
+                    [q],
+                    [(t or "").strip() for t in texts],
+                    scorer=self._fuzz.token_set_ratio,
+                    score_cutoff=score_cutoff * 100.0,
+                    workers=-1,
+                )
+                return [max(0.0, min(1.0, float(v) / 100.0)) for v in matrix[0]]
+            except Exception:
+                pass
+
+        ql = q.lower()
+        return [self._fallback_score(ql, t or "", score_cutoff) for t in texts]
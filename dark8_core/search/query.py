@@ -0,0 +1,349 @@
+"""Search query parsing.
+
+User input is parsed once into a small AST which every source compiles to its
+cheapest native form: an FTS5 MATCH expression, a LIKE condition for plain
+SQLite tables, or a Python predicate for in-memory and file sources.
+
+Syntax::
+
+    word            term; punctuation inside a word ("config.py", "e-mail") makes
+                    it a phrase for FTS5 and a literal substring elsewhere
+    word*           prefix term (2-3 character prefixes hit the FTS5 prefix= index)
+    "two words"     phrase
+    title:word      field filter (title, content, tags); also title:"a phrase"
+    a AND b, a b    both (adjacent terms are ANDed)
+    a OR b          either
+    NOT a, -a       exclusion
+    ( ... )         grouping
+
+Operators are also accepted in Polish (I, LUB, NIE). Matching is
+case-insensitive and folds Polish diacritics, so "lodz" finds "Łódź".
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple, Union
+
+FIELDS = ("title", "content", "tags")
+
+_FOLD = str.maketrans("ąćęłńóśźżĄĆĘŁŃÓŚŹŻ", "acelnoszzACELNOSZZ")
+_WORD = re.compile(r"\w+")
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"?|(-)(?=\S)|([^\s()"]+))')
+_OPERATORS = {"AND": "AND", "I": "AND", "OR": "OR", "LUB": "OR", "NOT": "NOT", "NIE": "NOT"}
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip Polish diacritics, keeping the string length.
+
+    Offsets into the result are valid in the input. A few characters grow when
+    lowercased (e.g. "İ" -> "i̇"); those are left as they are.
+    """
+    folded = (text or "").translate(_FOLD)
+    lowered = folded.lower()
+    if len(lowered) == len(folded):
+        return lowered
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in folded)
+
+
+@dataclass(frozen=True)
+class Term:
+    text: str
+    prefix: bool = False
+    field: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Phrase:
+    words: Tuple[str, ...]
+    field: Optional[str] = None
+    # the token as typed ("foo.bar") when the words came from splitting one word
+    raw: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Literal text to look for in sources without a tokenizer."""
+        return self.raw if self.raw is not None else " ".join(self.words)
+
+
+@dataclass(frozen=True)
+class And:
+    children: Tuple["Node", ...]
+
+
+@dataclass(frozen=True)
+class Or:
+    children: Tuple["Node", ...]
+
+
+@dataclass(frozen=True)
+class Not:
+    child: "Node"
+
+
+Node = Union[Term, Phrase, And, Or, Not]
+
+
+def _tokens(text: str) -> Iterator[Tuple[str, str]]:
+    pos = 0
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None or m.end() == pos:
+            break
+        pos = m.end()
+        lparen, rparen, phrase, minus, word = m.groups()
+        if lparen:
+            yield "(", lparen
+        elif rparen:
+            yield ")", rparen
+        elif phrase is not None:
+            yield "phrase", phrase
+        elif minus:
+            yield "op", "NOT"
+        elif word:
+            if word in _OPERATORS:
+                yield "op", _OPERATORS[word]
+            else:
+                yield "word", word
+
+
+def _leaf(kind: str, value: str, field: Optional[str]) -> Optional[Node]:
+    # words keep their diacritics (LIKE needs them); compilers fold as needed
+    found = list(_WORD.finditer(value))
+    if not found:
+        return None
+    words = tuple(m.group().lower() for m in found)
+    if kind == "word" and len(words) == 1:
+        return Term(words[0], prefix=value.endswith("*"), field=field)
+    if len(words) == 1:
+        return Term(words[0], field=field)
+    if kind == "word":
+        # "a-b", "config.py": adjacent words in FTS5, the literal text elsewhere
+        raw = value[found[0].start() : found[-1].end()].lower()
+        return Phrase(words, field=field, raw=raw)
+    return Phrase(words, field=field)
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.tokens = list(_tokens(text))
+        self.pos = 0
+
+    def peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> Tuple[str, str]:
+        tok = self.tokens[self.pos]
+        self.pos += 1
+        return tok
+
+    def parse_or(self) -> Optional[Node]:
+        children = [self.parse_and()]
+        while self.peek() == ("op", "OR"):
+            self.take()
+            children.append(self.parse_and())
+        return _combine(Or, children)
+
+    def parse_and(self) -> Optional[Node]:
+        children = []
+        while True:
+            tok = self.peek()
+            if tok is None or tok[0] == ")" or tok == ("op", "OR"):
+                break
+            if tok == ("op", "AND"):
+                self.take()
+                continue
+            children.append(self.parse_unary())
+        return _combine(And, children)
+
+    def parse_unary(self) -> Optional[Node]:
+        if self.peek() == ("op", "NOT"):
+            self.take()
+            child = self.parse_unary()
+            return Not(child) if child is not None else None
+        return self.parse_atom()
+
+    def parse_atom(self) -> Optional[Node]:
+        kind, value = self.take()
+        if kind == "(":
+            node = self.parse_or()
+            if self.peek() is not None and self.peek()[0] == ")":
+                self.take()
+            return node
+        if kind == ")":
+            return None
+        if kind == "word" and ":" in value:
+            field, _, rest = value.partition(":")
+            if field.lower() in FIELDS:
+                if not rest and self.peek() is not None and self.peek()[0] == "phrase":
+                    return _leaf("phrase", self.take()[1], field.lower())
+                return _leaf("word", rest, field.lower())
+        return _leaf(kind, value, None)
+
+
+def _combine(cls, children: List[Optional[Node]]) -> Optional[Node]:
+    flat: List[Node] = []
+    for child in children:
+        if child is None:
+            continue
+        flat.extend(child.children if isinstance(child, cls) else [child])
+    if not flat:
+        return None
+    return flat[0] if len(flat) == 1 else cls(tuple(flat))
+
+
+def parse_query(text: str) -> Optional[Node]:
+    """Parse a user query; None when nothing searchable is left."""
+    if not text or not text.strip():
+        return None
+    parser = _Parser(text)
+    node = parser.parse_or()
+    # stray closing parentheses: keep parsing what follows
+    while parser.peek() is not None:
+        parser.take()
+        node = _combine(And, [node, parser.parse_or()])
+    return node
+
+
+def terms(node: Optional[Node]) -> List[str]:
+    """Positive (non-negated) words of the query, in order."""
+    if node is None or isinstance(node, Not):
+        return []
+    if isinstance(node, Term):
+        return [node.text]
+    if isinstance(node, Phrase):
+        return list(node.words)
+    out: List[str] = []
+    for child in node.children:
+        out.extend(terms(child))
+    return out
+
+
+def plain_text(node: Optional[Node]) -> str:
+    """The positive words joined by spaces, e.g. for fuzzy scoring."""
+    return " ".join(terms(node))
+
+
+# -- FTS5 ---------------------------------------------------------------------
+
+_L_VARIANTS = 3
+# most spellings of one phrase tried before falling back to ANDed words
+_PHRASE_VARIANTS = 8
+
+
+def _l_variants(word: str) -> List[str]:
+    # unicode61 folds most Polish diacritics itself, but not "ł": let an
+    # unaccented "l" in the query match both spellings (bounded expansion)
+    word = fold(word)
+    if not 0 < word.count("l") <= _L_VARIANTS:
+        return [word]
+    variants = [""]
+    for ch in word:
+        variants = [v + c for v in variants for c in (("l", "ł") if ch == "l" else (ch,))]
+    return variants
+
+
+def _fts_word(word: str, prefix: bool = False) -> str:
+    star = "*" if prefix else ""
+    parts = [f'"{v}"{star}' for v in _l_variants(word)]
+    return parts[0] if len(parts) == 1 else "(" + " OR ".join(parts) + ")"
+
+
+def _fts_leaf(node: Union[Term, Phrase]) -> str:
+    if isinstance(node, Term):
+        expr = _fts_word(node.text, node.prefix)
+    else:
+        phrases = [""]
+        for word in node.words:
+            phrases = [f"{p} {v}".strip() for p in phrases for v in _l_variants(word)]
+            if len(phrases) > _PHRASE_VARIANTS:
+                break
+        if len(phrases) == 1:
+            expr = f'"{phrases[0]}"'
+        elif len(phrases) <= _PHRASE_VARIANTS:
+            # one phrase per spelling keeps word order and adjacency
+            expr = "(" + " OR ".join(f'"{p}"' for p in phrases) + ")"
+        else:
+            # too many spellings: require all words instead
+            expr = "(" + " AND ".join(_fts_word(w) for w in node.words) + ")"
+    return f"{node.field} : {expr}" if node.field else expr
+
+
+def to_fts5(node: Optional[Node]) -> Optional[str]:
+    """Compile to an FTS5 MATCH expression; None if it cannot be expressed.
+
+    FTS5 has no unary NOT, so a query made only of exclusions (e.g. "-foo")
+    returns None.
+    """
+    if node is None:
+        return None
+    if isinstance(node, (Term, Phrase)):
+        return _fts_leaf(node)
+    if isinstance(node, Not):
+        return None
+    if isinstance(node, Or):
+        parts = [to_fts5(c) for c in node.children]
+        if any(p is None for p in parts):
+            return None
+        return "(" + " OR ".join(parts) + ")"
+    positive = [to_fts5(c) for c in node.children if not isinstance(c, Not)]
+    negative = [to_fts5(c.child) for c in node.children if isinstance(c, Not)]
+    if not positive or any(p is None for p in positive + negative):
+        return None
+    expr = "(" + " AND ".join(positive) + ")"
+    for neg in negative:
+        expr = f"({expr} NOT {neg})"
+    return expr
+
+
+# -- SQL LIKE -----------------------------------------------------------------
+
+
+def to_like(node: Optional[Node], column: str = "content") -> Optional[Tuple[str, list]]:
+    """Compile to a WHERE clause of LIKE tests for tables without an FTS index.
+
+    Terms match as substrings; diacritics are matched literally (SQLite LIKE
+    only folds ASCII case). Returns (sql, params) or None.
+    """
+    if node is None:
+        return None
+    if isinstance(node, (Term, Phrase)):
+        col = node.field or column
+        escaped = node.text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"{col} LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+    if isinstance(node, Not):
+        inner = to_like(node.child, column)
+        return (f"NOT ({inner[0]})", inner[1]) if inner else None
+    joiner = " OR " if isinstance(node, Or) else " AND "
+    parts = [to_like(c, column) for c in node.children]
+    parts = [p for p in parts if p is not None]
+    if not parts:
+        return None
+    return "(" + joiner.join(p[0] for p in parts) + ")", [v for p in parts for v in p[1]]
+
+
+# -- Python -------------------------------------------------------------------
+
+
+def matches(node: Optional[Node], folded_text: str) -> bool:
+    """Evaluate the query against text already passed through `fold`.
+
+    Field filters are ignored: plain texts have no fields.
+    """
+    if node is None:
+        return False
+    if isinstance(node, Term):
+        return fold(node.text) in folded_text
+    if isinstance(node, Phrase):
+        return fold(node.text) in folded_text
+    if isinstance(node, Not):
+        return not matches(node.child, folded_text)
+    if isinstance(node, Or):
+        return any(matches(c, folded_text) for c in node.children)
+    return all(matches(c, folded_text) for c in node.children)
+
+
+def first_match(node: Optional[Node], folded_text: str) -> int:
+    """Offset of the earliest positive term in folded text, -1 if none occurs."""
+    found = [folded_text.find(fold(t)) for t in terms(node)]
+    found = [f for f in found if f >= 0]
+    return min(found) if found else -1
@@ -1,12 +1,172 @@
-from typing import List
+import heapq
+import itertools
+import threading
+from typing import Dict, Hashable, Iterable, List, Optional
 
 from .base import SearchResult
 
 
-class RankingEngine:
-    def __init__(self):
-        pass
+def result_key(r: SearchResult) -> Hashable:
+    """Identity of the underlying item, so hits for it from different sources fuse."""
+    meta = r.metadata or {}
+    if meta.get("path"):
+        return ("path", str(meta["path"]))
+    if meta.get("row_id") is not None:
+        # row ids are only unique within one database
+        return ("row", meta.get("db_path") or r.source, meta["row_id"])
+    if meta.get("doc_id") is not None:
+        return ("doc", str(meta["doc_id"]))
+    return ("snippet", r.source, r.snippet)
+
+
+class TopK:
+    """Bounded min-heap keeping the k best results seen so far.
+
+    `threshold` is the score a new result must beat to enter (the current k-th
+    best, or -inf while fewer than k results are held). Sources given a TopK can
+    use it to stop early, e.g. skip candidates whose best possible score can't
+    beat it or pass it as `score_cutoff` to the matcher. Thread-safe, since
+    blocking sources push from the search thread pool.
+    """
+
+    def __init__(self, k: int):
+        self.k = max(0, int(k))
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def full(self) -> bool:
+        return len(self._heap) >= self.k
+
+    @property
+    def threshold(self) -> float:
+        heap = self._heap
+        return heap[0][0] if self.k and len(heap) >= self.k else float("-inf")
+
+    def accepts(self, score: float) -> bool:
+        return self.k > 0 and score > self.threshold
+
+    def push(self, result: SearchResult) -> bool:
+        """Offer a result; returns True if it is (for now) among the top k."""
+        if self.k == 0:
+            return False
+        entry = (result.score, next(self._seq), result)
+        with self._lock:
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, entry)
+                return True
+            if result.score > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+                return True
+        return False
+
+    def push_many(self, results: Iterable[SearchResult]) -> None:
+        for r in results:
+            self.push(r)
+
+    def results(self) -> List[SearchResult]:
+        """Held results, best first (ties keep insertion order)."""
+        with self._lock:
+            entries = list(self._heap)
+        entries.sort(key=lambda e: (-e[0], e[1]))
+        return [e[2] for e in entries]
+
 
-    def rank(self, results: List[SearchResult]) -> List[SearchResult]:
-        # simple rank by score descending
+def top_k(results: Iterable[SearchResult], k: Optional[int]) -> List[SearchResult]:
+    """The k highest-scoring results, best first; all of them sorted when k is None."""
+    if k is None:
         return sorted(results, key=lambda r: r.score, reverse=True)
+    heap = TopK(k)
+    heap.push_many(results)
+    return heap.results()
+
+
+class RankingEngine:
+    """Rank aggregated results from several sources.
+
+    Raw scores are not comparable across sources (BM25, rapidfuzz ratios,
+    Levenshtein fractions, cosine similarity), so besides the legacy
+    "score" method (plain sort) two fusion methods are available:
+
+    - "rrf": reciprocal-rank fusion, sum of weight / (rrf_k + rank) over the
+      sources that returned the item; only per-source order matters.
+    - "weighted": per-source min-max normalization, then a weighted sum.
+
+    `weights` maps source name -> weight (default 1.0), e.g. weights tuned
+    offline on relevance judgments. Fused scores are rescaled into [0, 1].
+    With a `limit`, only each source's top `limit` results vote (fusion depth).
+    """
+
+    METHODS = ("score", "rrf", "weighted")
+
+    def __init__(
+        self, method: str = "score", rrf_k: int = 60, weights: Optional[Dict[str, float]] = None
+    ):
+        if method not in self.METHODS:
+            raise ValueError(f"unknown ranking method: {method}")
+        self.method = method
+        self.rrf_k = rrf_k
+        self.weights = dict(weights or {})
+
+    def _by_source(self, results: List[SearchResult]) -> Dict[str, List[SearchResult]]:
+        groups: Dict[str, List[SearchResult]] = {}
+        for r in results:
+            groups.setdefault(r.source, []).append(r)
+        for group in groups.values():
+            group.sort(key=lambda r: r.score, reverse=True)
+        return groups
+
+    def normalize(self, results: List[SearchResult]) -> Dict[int, float]:
+        """Min-max normalize scores within each source. Returns id(result) -> [0, 1]."""
+        out: Dict[int, float] = {}
+        for group in self._by_source(results).values():
+            hi, lo = group[0].score, group[-1].score
+            span = hi - lo
+            for r in group:
+                out[id(r)] = 1.0 if span <= 0 else (r.score - lo) / span
+        return out
+
+    def fuse(self, results: List[SearchResult], limit: Optional[int] = None) -> List[SearchResult]:
+        groups = self._by_source(results)
+        norm = self.normalize(results) if self.method == "weighted" else {}
+        fused: Dict[Hashable, float] = {}
+        best: Dict[Hashable, SearchResult] = {}
+        for source, group in groups.items():
+            w = self.weights.get(source, 1.0)
+            seen = set()
+            for rank, r in enumerate(group, start=1):
+                if limit is not None and rank > limit:
+                    break
+                key = result_key(r)
+                if key in seen:
+                    # a source only votes once per item
+                    continue
+                seen.add(key)
+                if self.method == "rrf":
+                    contrib = w / (self.rrf_k + rank)
+                else:
+                    contrib = w * norm[id(r)]
+                fused[key] = fused.get(key, 0.0) + contrib
+                if key not in best or r.score > best[key].score:
+                    best[key] = r
+
+        # rescale into [0, 1]: an item ranked first by every source scores 1.0
+        total_w = sum(self.weights.get(s, 1.0) for s in groups) or 1.0
+        top = total_w / (self.rrf_k + 1) if self.method == "rrf" else total_w
+        out = []
+        for key, value in fused.items():
+            r = best[key]
+            # keep the winner's lazy snippet unevaluated until after the top-k trim
+            out.append(r.with_score(min(1.0, value / top)))
+        return top_k(out, limit)
+
+    def rank(self, results: List[SearchResult], limit: Optional[int] = None) -> List[SearchResult]:
+        """Rank results best first; with `limit` only the top `limit` are selected (heap, no full sort)."""
+        if self.method == "score":
+            # simple rank by score descending
+            return top_k(results, limit)
+        return self.fuse(results, limit)
@@ -1,91 +1,331 @@
+import asyncio
+import functools
+import os
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from .base import SearchResult, SearchSource
+from .indexer import Indexer
 from .matcher import FuzzyMatcher
+from .query import first_match, fold, matches, parse_query, plain_text, to_like
+from dark8_core.config import config
+
+
+# abspath -> (has a documents_fts table, when that was checked); the index only
+# appears or goes away through migrations, so sqlite_master is read at most this often
+_FTS_RECHECK_SECONDS = 5.0
+_fts_tables: Dict[str, Tuple[bool, float]] = {}
+
+
+def _topk_floor(topk) -> float:
+    """Matcher score_cutoff implied by a shared TopK (0.0 while it is not full)."""
+    if topk is None:
+        return 0.0
+    return min(1.0, max(0.0, topk.threshold))
+
+
+def _beaten(topk) -> bool:
+    """True once a TopK holds k perfect scores: no further candidate can enter."""
+    return topk is not None and topk.full and topk.threshold >= 1.0
+
+
+def _expired(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _line_at(text: str, pos: int) -> str:
+    """The line of text containing position pos, without splitting the whole text."""
+    end = text.find("\n", pos)
+    return text[text.rfind("\n", 0, pos) + 1 : end if end >= 0 else len(text)]
 
 
 class FileSearchSource(SearchSource):
-    def __init__(self, paths: Optional[List[str]] = None, exts: Optional[set] = None):
+    blocking = True
+    accepts_topk = True
+    accepts_deadline = True
+
+    def __init__(
+        self,
+        paths: Optional[List[str]] = None,
+        exts: Optional[set] = None,
+        catalog_path: Optional[str] = None,
+        rescan_interval: float = 2.0,
+    ):
         self.paths = [Path(p) for p in (paths or [])]
         self.exts = exts or {".txt", ".md", ".json", ".py"}
         self._matcher = FuzzyMatcher()
+        # optional persistent catalog (SQLite sidecar); when set, queries go through FTS
+        self.catalog = None
+        if catalog_path:
+            from .catalog import FileCatalog
 
-    async def search(self, query: str, limit: int = 10) -> List[SearchResult]:
-        results = []
+            self.catalog = FileCatalog(catalog_path)
+        self.rescan_interval = rescan_interval
+        self._last_scan = 0.0
+
+    @property
+    def fallback(self) -> bool:
+        # with a catalog queries are FTS lookups; without one every file is read
+        return self.catalog is None
+
+    def fingerprint(self) -> str:
+        catalog = self.catalog.db_path if self.catalog is not None else ""
+        return f"file:{sorted(map(str, self.paths))}:{sorted(self.exts)}:{catalog}"
+
+    def rescan(self) -> dict:
+        """Sync the catalog with the file tree; only changed files are re-read."""
+        if self.catalog is None:
+            return {}
+        stats = self.catalog.scan([str(p) for p in self.paths], self.exts)
+        self._last_scan = time.monotonic()
+        return stats
+
+    async def search(self, query: str, limit: int = 10, topk=None) -> List[SearchResult]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.search_sync, query, limit, topk=topk))
+
+    def search_sync(self, query: str, limit: int = 10, topk=None, deadline=None) -> List[SearchResult]:
+        if self.catalog is not None:
+            return self._search_catalog(query, limit)
+
+        parsed = parse_query(query) if query else None
+        if parsed is None:
+            return []
+        text_query = plain_text(parsed)
+        results: List[SearchResult] = []
+        if _beaten(topk):
+            return results
+        for p in self._walk():
+            if _expired(deadline):
+                break
+            try:
+                text = p.read_text(errors="ignore")
+            except Exception:
+                continue
+            # fold() keeps the length, so positions index the original text
+            folded = fold(text)
+            if not matches(parsed, folded):
+                continue
+            pos = max(0, first_match(parsed, folded))
+            # score the matching line only; the highlighted snippet is cut lazily
+            (score,) = self._matcher.score_many(text_query, [_line_at(text, pos)], score_cutoff=_topk_floor(topk))
+            result = SearchResult(
+                source="file",
+                score=score,
+                metadata={"path": str(p)},
+                ref=(str(p), pos),
+                text=text,
+                query=text_query,
+                offset=pos,
+            )
+            # pushed as found, so the threshold rises while this and other sources scan
+            if topk is None or topk.push(result):
+                results.append(result)
+            if len(results) >= limit or _beaten(topk):
+                # enough hits, or no file can beat a perfect score any more: stop reading
+                break
+        return results
+
+    def _walk(self):
+        """Files under every root with one of the searched extensions."""
         for root in self.paths or []:
             if not root.exists():
                 continue
             for p in root.rglob("*"):
-                if p.is_file() and p.suffix in self.exts:
-                    try:
-                        text = p.read_text(errors="ignore")
-                    except Exception:
-                        continue
-                    if query.lower() in text.lower() or True:
-                        snippet = next(
-                            (line for line in text.splitlines() if query.lower() in line.lower()),
-                            text[:200],
-                        )
-                        score = self._matcher.score(query, snippet)
-                        results.append(
-                            SearchResult(
-                                source="file",
-                                score=score,
-                                snippet=snippet,
-                                metadata={"path": str(p)},
-                            )
-                        )
-                        if len(results) >= limit:
-                            return results
+                if p.suffix in self.exts and p.is_file():
+                    yield p
+
+    def _search_catalog(self, query: str, limit: int) -> List[SearchResult]:
+        if not query:
+            return []
+        if time.monotonic() - self._last_scan >= self.rescan_interval or not self._last_scan:
+            self.rescan()
+        results = []
+        for hit in self.catalog.search(query, limit=limit):
+            # bm25() is negative, lower is better -> map to [0, 1)
+            relevance = max(0.0, -float(hit.get("score") or 0.0))
+            results.append(
+                SearchResult(
+                    source="file",
+                    score=relevance / (relevance + 1.0),
+                    snippet=hit.get("snippet", ""),
+                    metadata={"path": hit["path"], "row_id": hit["doc_id"]},
+                )
+            )
         return results
 
 
 class DatabaseSearchSource(SearchSource):
+    blocking = True
+    accepts_topk = True
+    accepts_deadline = True
+    # the LIKE scan; the FTS lookup (search_fts_sync) runs ahead of it
+    fallback = True
+
     def __init__(self, db_path: str):
         self.db_path = db_path
+        # identifies this database in result metadata, so equal row ids from two DBs stay apart
+        self._db_key = os.path.abspath(db_path)
+        self._matcher = FuzzyMatcher()
 
-    async def search(self, query: str, limit: int = 10) -> List[SearchResult]:
-        from .matcher import FuzzyMatcher
+    def fingerprint(self) -> str:
+        return f"db:{self._db_key}"
 
-        results: List[SearchResult] = []
-        if not query:
-            return results
+    async def search(self, query: str, limit: int = 10, topk=None) -> List[SearchResult]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.search_sync, query, limit, topk=topk))
+
+    def _has_fts(self) -> bool:
+        from dark8_core.agent.tools.db import run_query
+
+        now = time.monotonic()
+        cached = _fts_tables.get(self._db_key)
+        if cached is not None and now - cached[1] < _FTS_RECHECK_SECONDS:
+            return cached[0]
+        res = run_query(self.db_path, "SELECT 1 FROM sqlite_master WHERE type='table' AND name='documents_fts'")
+        found = bool(res.get("success") and res.get("rows"))
+        _fts_tables[self._db_key] = (found, now)
+        return found
+
+    def search_sync(
+        self, query: str, limit: int = 10, topk=None, fts: bool = True, deadline=None
+    ) -> List[SearchResult]:
+        """Compile the parsed query to the cheapest form this database supports.
 
+        With an FTS5 index that is a MATCH (bm25-ranked, source "db_fts"); tables
+        without one, or queries FTS cannot express or does not match, fall back
+        to LIKE tests built from the same query. `fts=False` skips the index, for
+        callers that already ran search_fts_sync. Past `deadline` the LIKE scan
+        is not started.
+        """
+        parsed = parse_query(query) if query else None
+        if parsed is None:
+            return []
         try:
-            # Use centralized DB helper to run the query
-            from dark8_core.agent.tools.db import db_execute
-
-            q = f"%{query}%"
-            sql = "SELECT id, content FROM documents WHERE content LIKE ? LIMIT ?"
-            res = await db_execute({"action": "query", "db_path": self.db_path, "sql": sql, "params": (q, limit)})
-            rows = res.get("rows", []) if res.get("success") else []
-            matcher = FuzzyMatcher()
-            for row in rows:
-                # row is dict from _serialize_rows
-                row_id = row.get("id")
-                content = row.get("content", "")
-
-                snippet = None
-                for line in str(content).splitlines():
-                    if query.lower() in line.lower():
-                        snippet = line.strip()
-                        break
-                if snippet is None:
-                    snippet = (str(content)[:200] + "...") if len(str(content)) > 200 else str(content)
-
-                score = matcher.score(query, content)
-                results.append(
-                    SearchResult(source="db", score=score, snippet=snippet, metadata={"row_id": row_id})
-                )
-                if len(results) >= limit:
-                    break
+            if fts and self._has_fts():
+                hits = self._search_fts(parsed, limit)
+                if hits:
+                    return hits
+            if _expired(deadline):
+                return []
+            return self._search_like(parsed, limit, topk)
         except Exception:
             # Don't raise in search, just return what we have
-            pass
+            return []
+
+    def search_fts_sync(self, query: str, limit: int = 10) -> List[SearchResult]:
+        """FTS5 hits only; empty when there is no index or it matches nothing."""
+        parsed = parse_query(query) if query else None
+        if parsed is None:
+            return []
+        try:
+            return self._search_fts(parsed, limit) if self._has_fts() else []
+        except Exception:
+            return []
+
+    def _search_fts(self, parsed, limit: int) -> List[SearchResult]:
+        from dark8_core.agent.tools.db import search_fts
+
+        weights = getattr(config, "SEARCH_WEIGHTS", (1.0, 1.0, 1.0))
+        out = []
+        for r in search_fts(self.db_path, parsed, limit=limit, weights=weights):
+            # bm25() is negative and lower is better -> higher-is-better relevance in [0, 1)
+            bm25 = float(r.get("score") or 0.0)
+            relevance = max(0.0, -bm25)
+            out.append(
+                SearchResult(
+                    source="db_fts",
+                    score=relevance / (relevance + 1.0),
+                    snippet=r.get("snippet", ""),
+                    metadata={"row_id": r.get("id"), "db_path": self._db_key, "bm25": bm25},
+                    ref=r.get("id"),
+                )
+            )
+        return out
 
+    def _search_like(self, parsed, limit: int, topk=None) -> List[SearchResult]:
+        # Use centralized DB helper to run the query
+        from dark8_core.agent.tools.db import run_query
+
+        compiled = to_like(parsed)
+        if compiled is None:
+            return []
+        where, params = compiled
+        sql = f"SELECT id, content FROM documents WHERE {where} LIMIT ?"
+        res = run_query(self.db_path, sql, (*params, limit))
+        rows = (res.get("rows", []) if res.get("success") else [])[:limit]
+        contents = [str(row.get("content", "")) for row in rows]
+        text = plain_text(parsed)
+        # candidates that cannot beat the running top-k threshold are cut short
+        scores = self._matcher.score_many(text, contents, score_cutoff=_topk_floor(topk))
+        results: List[SearchResult] = []
+        for row, content, score in zip(rows, contents, scores):
+            # row is dict from _serialize_rows; snippet is extracted only if the hit is kept
+            result = SearchResult(
+                source="db",
+                score=score,
+                metadata={"row_id": row.get("id"), "db_path": self._db_key},
+                ref=row.get("id"),
+                text=content,
+                query=text,
+            )
+            if topk is None or topk.push(result):
+                results.append(result)
         return results
 
+    def search_fuzzy_sync(
+        self, query: str, limit: int = 10, min_score: float = 0.5, candidates: int = 50
+    ) -> List[SearchResult]:
+        """Typo-tolerant search: trigram prefilter in SQLite, fuzzy scoring in Python.
+
+        The trigram index narrows the table to `max(candidates, limit)` rows that
+        share the most character trigrams with the query; only those are scored.
+        Each row is scored on its best-matching window of words (as many words
+        as the query has), so long documents are not penalized for their length.
+        """
+        results: List[SearchResult] = []
+        if not query or not query.strip():
+            return results
+        try:
+            from dark8_core.agent.tools.db import search_trigram, trigrams
+
+            rows = search_trigram(self.db_path, query, limit=max(candidates, limit))
+        except Exception:
+            return results
+        if not rows:
+            return results
+
+        q_grams = trigrams(query)
+        n_words = max(1, len(query.split()))
+        windows, snippets = [], []
+        for row in rows:
+            content = str(row.get("content") or "")
+            line = max(
+                (ln for ln in content.splitlines() if ln.strip()),
+                key=lambda ln: len(q_grams & trigrams(ln)),
+                default="",
+            )
+            words = line.split()
+            spans = [" ".join(words[i : i + n_words]) for i in range(max(1, len(words) - n_words + 1))]
+            windows.append(max(spans, key=lambda w: len(q_grams & trigrams(w))))
+            snippets.append(line.strip()[:200])
+
+        scores = self._matcher.score_many(query, windows, score_cutoff=min_score)
+        for row, snippet, score in zip(rows, snippets, scores):
+            if score >= min_score and score > 0:
+                results.append(
+                    SearchResult(
+                        source="db",
+                        score=score,
+                        snippet=snippet,
+                        metadata={"row_id": row.get("id"), "db_path": self._db_key},
+                        ref=row.get("id"),
+                    )
+                )
+        results.sort(key=lambda r: r.score, reverse=True)
+        return results[:limit]
+
 
 class MemorySearchSource(SearchSource):
     def __init__(self, memory):
@@ -94,19 +334,47 @@ class MemorySearchSource(SearchSource):
 
     async def search(self, query: str, limit: int = 10) -> List[SearchResult]:
         results = []
-        for turn in getattr(self.memory, "conversation_history", []):
-            text = f"{turn.get('user','')} {turn.get('ai','')}"
-            if True:
-                s = self._matcher.score(query, text)
-                if s > 0:
-                    results.append(
-                        SearchResult(source="memory", score=s, snippet=text[:200], metadata={})
-                    )
+        texts = [
+            f"{turn.get('user','')} {turn.get('ai','')}"
+            for turn in getattr(self.memory, "conversation_history", [])
+        ]
+        for text, s in zip(texts, self._matcher.score_many(query, texts)):
+            if s > 0:
+                results.append(SearchResult(source="memory", score=s, metadata={}, text=text, query=query))
                 if len(results) >= limit:
                     break
         return results
 
 
+class IndexSearchSource(SearchSource):
+    """Search an in-process `Indexer` (BM25) instead of walking the disk per query."""
+
+    def __init__(self, indexer: Optional[Indexer] = None, source: str = "index"):
+        self.indexer = indexer if indexer is not None else Indexer()
+        self.source = source
+
+    async def search(self, query: str, limit: int = 10) -> List[SearchResult]:
+        results: List[SearchResult] = []
+        if not query:
+            return results
+        for doc_id, bm25 in self.indexer.search(query, limit=limit):
+            doc = self.indexer.get_document(doc_id) or {}
+            meta = dict(doc.get("metadata") or {})
+            meta.setdefault("doc_id", doc_id)
+            meta["bm25"] = bm25
+            results.append(
+                SearchResult(
+                    source=self.source,
+                    # squash unbounded BM25 into [0, 1) to stay comparable with fuzzy scores
+                    score=bm25 / (bm25 + 1.0),
+                    snippet=doc.get("snippet", ""),
+                    metadata=meta,
+                    ref=doc_id,
+                )
+            )
+        return results
+
+
 class PluginSearchSource(SearchSource):
     def __init__(self, func):
         self.func = func
@@ -0,0 +1,153 @@
+import asyncio
+import base64
+import functools
+import json
+import struct
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from .base import SearchResult, SearchSource
+
+if TYPE_CHECKING:  # numpy is only needed once vectors are added
+    import numpy as np
+
+    from dark8_core.nlp.vector_store import VectorStore
+
+# text -> embedding; BERTPolishLoader.get_embedding returns a read-only float32 array
+Embedder = Callable[[str], Union[Sequence[float], "np.ndarray"]]
+
+_F16_PREFIX = "f16:"
+
+
+def encode_embedding(vec: Sequence[float]) -> str:
+    """Serialize an embedding compactly for `KnowledgeItem.embedding` (String(4096)).
+
+    Uses little-endian float16 + base64: a 768-dim vector takes 2052 chars.
+    """
+    raw = struct.pack(f"<{len(vec)}e", *vec)
+    return _F16_PREFIX + base64.b64encode(raw).decode("ascii")
+
+
+def decode_embedding(value: Any) -> Optional[List[float]]:
+    """Parse an embedding stored as f16/base64, a JSON list or comma-separated floats."""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return [float(x) for x in value]
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        if text.startswith(_F16_PREFIX):
+            raw = base64.b64decode(text[len(_F16_PREFIX):])
+            return list(struct.unpack(f"<{len(raw) // 2}e", raw))
+        if text.startswith("["):
+            return [float(x) for x in json.loads(text)]
+        return [float(x) for x in text.split(",")]
+    except Exception:
+        return None
+
+
+def _default_embedder() -> Embedder:
+    from dark8_core.nlp.bert import BERTPolishLoader
+
+    return BERTPolishLoader().get_embedding
+
+
+class VectorSearchSource(SearchSource):
+    """Dense-vector recall stage: cosine similarity between query and item embeddings.
+
+    Items are (id, text, embedding, metadata), held in a `VectorStore` (pass
+    one to share or persist it; otherwise an in-memory store is created with
+    the dimension of the first vector). `embed` turns the query into a vector
+    and must use the same model the item embeddings were built with.
+    Embedding the query is CPU-bound (BERT), so the source is blocking and
+    runs off the event loop.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        embed: Optional[Embedder] = None,
+        min_similarity: float = 0.0,
+        source: str = "vector",
+        store: Optional["VectorStore"] = None,
+    ):
+        self._embed = embed
+        self.min_similarity = min_similarity
+        self.source = source
+        self.store = store
+        self._lock = threading.Lock()
+
+    @property
+    def embed(self) -> Embedder:
+        if self._embed is None:
+            self._embed = _default_embedder()
+        return self._embed
+
+    def __len__(self) -> int:
+        return len(self.store) if self.store is not None else 0
+
+    def _store_for(self, dim: int) -> "VectorStore":
+        with self._lock:
+            if self.store is None:
+                from dark8_core.nlp.vector_store import VectorStore
+
+                self.store = VectorStore(dim=dim)
+            return self.store
+
+    def add(
+        self,
+        item_id: Any,
+        text: str,
+        embedding: Optional[Sequence[float]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        vec = embedding if embedding is not None else self.embed(text)
+        payload = dict(metadata or {})
+        payload["text"] = text or ""
+        self._store_for(len(vec)).add(item_id, vec, payload)
+
+    def add_knowledge_items(self, items: Iterable[Any]) -> int:
+        """Load `KnowledgeItem`-like rows (id, title, content, embedding). Returns count added.
+
+        Rows without a stored embedding are embedded on the fly.
+        """
+        items = list(items)
+        if not items:
+            return 0
+        if self.store is None:
+            first = items[0]
+            get = first.get if isinstance(first, dict) else (lambda k: getattr(first, k, None))
+            vec = decode_embedding(get("embedding"))
+            if vec is None:
+                vec = self.embed(" ".join(x for x in (get("title"), get("content")) if x))
+            self._store_for(len(vec))
+        return self.store.add_knowledge_items(items, embed=self.embed)
+
+    async def search(self, query: str, limit: int = 10) -> List[SearchResult]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.search_sync, query, limit))
+
+    def search_sync(self, query: str, limit: int = 10) -> List[SearchResult]:
+        if not query or not len(self):
+            return []
+        results = []
+        for item_id, score, payload in self.store.search(self.embed(query), k=limit):
+            if score < self.min_similarity:
+                break
+            meta = dict(payload or {})
+            text = meta.pop("text", "")
+            meta.setdefault("doc_id", item_id)
+            results.append(
+                SearchResult(
+                    source=self.source,
+                    score=max(0.0, float(score)),
+                    metadata=meta,
+                    ref=item_id,
+                    text=text,
+                    query=query,
+                )
+            )
+        return results
@@ -13,6 +13,7 @@ from dark8_core.agent import get_agent
 from dark8_core.config import config
 from dark8_core.logger import logger
 from dark8_core.nlp import get_nlp_engine
+from dark8_core.nlp.onnx_intents import get_intent_service, pipeline_intent
 
 # Create FastAPI app
 app = FastAPI(
@@ -24,6 +25,26 @@ app = FastAPI(
 # Initialize components
 nlp = get_nlp_engine()
 agent = get_agent()
+# batched ONNX intent model (None unless NLP_ONNX_MODEL_DIR is configured)
+intent_service = get_intent_service()
+
+
+async def understand(text: str) -> Dict:
+    """Keyword NLP pipeline, with the intent taken from the ONNX model when it is confident.
+
+    Model labels are mapped onto pipeline intents; one without a pipeline
+    counterpart leaves the keyword intent in place.
+    """
+    result = nlp.understand(text)
+    if intent_service is not None:
+        try:
+            label, confidence = await intent_service.classify(text)
+            intent = pipeline_intent(label)
+            if intent is not None and confidence >= config.NLP_INTENT_THRESHOLD:
+                result = {**result, "intent": intent, "confidence": confidence}
+        except Exception as e:
+            logger.warning(f"ONNX intent inference failed: {e}")
+    return result
 
 
 # ============================================================================
@@ -101,7 +122,7 @@ async def status():
 async def nlp_analyze(request: CommandRequest):
     """Analyze Polish text with NLP"""
     try:
-        result = nlp.understand(request.text)
+        result = await understand(request.text)
         return NLPResult(
             intent=result["intent"],
             confidence=result["confidence"],
@@ -127,7 +148,7 @@ async def agent_command(request: CommandRequest):
         start = time.time()
 
         # Analyze with NLP
-        nlp_result = nlp.understand(request.text)
+        nlp_result = await understand(request.text)
 
         # Execute with agent
         response = await agent.process_command(request.text, nlp_result)
@@ -1,5 +1,7 @@
 import requests
 
+from dark8_core.llm.gateway import GatewayBusy, GatewayTimeout, get_gateway
+
 # ---------------------------------------------------------
 # DARK8‑OS API — Kernel v3
 # Centralny moduł komunikacji z backendem LLM (Ollama)
@@ -12,14 +14,20 @@ TIMEOUT = 120
 def _call_ollama(model: str, prompt: str) -> str:
     """
     Niskopoziomowe wywołanie backendu LLM.
+    Przechodzi przez wspólną bramkę LLM (priorytet z llm_priority()).
     """
     payload = {"model": model, "prompt": prompt, "stream": False}
 
     try:
-        response = requests.post(OLLAMA_URL, json=payload, timeout=TIMEOUT)
+        with get_gateway().slot(model, timeout=TIMEOUT):
+            response = requests.post(OLLAMA_URL, json=payload, timeout=TIMEOUT)
         response.raise_for_status()
         data = response.json()
         return data.get("response", "")
+    except GatewayBusy as e:
+        return f"[OS-API BUSY] {e}"
+    except GatewayTimeout as e:
+        return f"[OS-API QUEUE TIMEOUT] {e}"
     except Exception as e:
         return f"[OS-API ERROR] {e}"
 
@@ -3,7 +3,7 @@
 
 import re
 
-from dark8_mark01.dark8_learning import merge_learned_intents
+from dark8_mark01.dark8_learning import merge_learned_intents, on_new_form
 
 INTENT_PATTERNS = [
     # DIAGNOSTYKA
@@ -90,6 +90,70 @@ INTENT_PATTERNS = [
 INTENT_PATTERNS = merge_learned_intents(INTENT_PATTERNS)
 
 
+# odwołania wsteczne (\1, (?P=nazwa)) i globalne flagi ((?i)) zmieniają znaczenie
+# albo psują regex po wklejeniu do wspólnego wzorca
+_NIELOKALNE = re.compile(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)")
+
+
+def _fragment(wzorzec):
+    """Wzorzec gotowy do wklejenia we wspólny regex; w razie wątpliwości dosłownie."""
+    try:
+        re.compile(wzorzec)
+    except re.error:
+        # wyuczona forma, która nie jest poprawnym regexem -> dosłownie
+        return re.escape(wzorzec)
+    if _NIELOKALNE.search(wzorzec):
+        return re.escape(wzorzec)
+    return wzorzec
+
+
+def _kompiluj(intent_patterns):
+    """
+    Składa wszystkie wzorce w jeden regex z nazwanymi grupami _0, _1, ...
+    (w kolejności deklaracji). Każda alternatywa siedzi w lookahead, więc
+    jedno przejście po tekście znajduje na każdej pozycji pierwszy pasujący
+    wzorzec - a minimum po pozycjach to pierwszy wzorzec pasujący gdziekolwiek,
+    dokładnie jak przy osobnych re.search po kolei.
+    """
+    typy = []
+    formy = []
+    for intent in intent_patterns:
+        for wzorzec in intent["wzorce"]:
+            formy.append(wzorzec)
+            typy.append(intent["typ"])
+    if not formy:
+        return None, typy
+
+    alternatywy = [f"(?P<_{i}>{_fragment(w)})" for i, w in enumerate(formy)]
+    try:
+        return re.compile("(?=" + "|".join(alternatywy) + ")"), typy
+    except re.error:
+        pass
+    # coś psuje dopiero wspólny regex (np. powtórzona nazwa grupy):
+    # dokładamy alternatywy po kolei, a winną formę bierzemy dosłownie
+    poprawne = []
+    for i, alternatywa in enumerate(alternatywy):
+        try:
+            re.compile("(?=" + "|".join(poprawne + [alternatywa]) + ")")
+        except re.error:
+            alternatywa = f"(?P<_{i}>{re.escape(formy[i])})"
+        poprawne.append(alternatywa)
+    return re.compile("(?=" + "|".join(poprawne) + ")"), typy
+
+
+_WZORZEC, _TYPY = _kompiluj(INTENT_PATTERNS)
+
+
+def przebuduj_wzorce():
+    """Ponownie łączy wyuczone formy i kompiluje wspólny regex."""
+    global INTENT_PATTERNS, _WZORZEC, _TYPY
+    INTENT_PATTERNS = merge_learned_intents(INTENT_PATTERNS)
+    _WZORZEC, _TYPY = _kompiluj(INTENT_PATTERNS)
+
+
+on_new_form(lambda tekst, typ: przebuduj_wzorce())
+
+
 def rozpoznaj_intencje(tekst: str) -> dict | None:
     """
     Zwraca słownik z intencją, np.:
@@ -97,11 +161,17 @@ def rozpoznaj_intencje(tekst: str) -> dict | None:
     albo None, jeśli nic nie pasuje.
     """
     low = tekst.lower().strip()
+    if _WZORZEC is None:
+        return None
 
-    for intent in INTENT_PATTERNS:
-        typ = intent["typ"]
-        for wzorzec in intent["wzorce"]:
-            if re.search(wzorzec, low):
-                return {"typ": typ}
+    najlepszy = None
+    for m in _WZORZEC.finditer(low):
+        idx = int(m.lastgroup[1:])
+        if najlepszy is None or idx < najlepszy:
+            najlepszy = idx
+            if idx == 0:
+                break
 
-    return None
+    if najlepszy is None:
+        return None
+    return {"typ": _TYPY[najlepszy]}
@@ -6,6 +6,15 @@ import os
 
 LEARNING_FILE = os.path.join(os.path.dirname(__file__), "learned_intents.json")
 
+# Funkcje wywoływane po nauczeniu nowej formy: callback(tekst, typ)
+_NEW_FORM_LISTENERS = []
+
+
+def on_new_form(callback):
+    """Rejestruje funkcję wywoływaną po każdym learn_new_form (np. przebudowa wzorców)."""
+    if callback not in _NEW_FORM_LISTENERS:
+        _NEW_FORM_LISTENERS.append(callback)
+
 
 def load_learned_intents():
     """Wczytuje wyuczone formy komend z pliku JSON."""
@@ -39,6 +48,9 @@ def learn_new_form(tekst: str, typ: str):
 
     save_learned_intents(data)
 
+    for callback in list(_NEW_FORM_LISTENERS):
+        callback(tekst, typ)
+
 
 def merge_learned_intents(intents_patterns):
     """
@@ -2,6 +2,8 @@ import os
 
 from dark8_llm_os_api import llm_analysis_task
 
+from dark8_core.llm.gateway import llm_priority
+
 MAX_FILE_CHARS = 8000
 MAX_FILES = 80
 
@@ -35,6 +37,7 @@ def analyze_dark8_project(root_dir):
     - analiza plik po pliku
     - każdy plik ma osobny prompt
     - używa OS API → llm_analysis_task()
+    - zapytania idą z priorytetem "background", więc czat nie czeka za snapshotem
     """
 
     py_files = _collect_python_files(root_dir)
@@ -73,7 +76,8 @@ Kod pliku:
 {code}
 """
 
-        result = llm_analysis_task(prompt)
+        with llm_priority("background"):
+            result = llm_analysis_task(prompt)
 
         block = (
             "============================================\n"
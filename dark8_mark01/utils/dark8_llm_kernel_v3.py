@@ -1,8 +1,13 @@
 import json
+import math
+import threading
+import time
 from typing import Literal, Optional
 
 import requests
 
+from dark8_core.llm.gateway import GatewayBusy, GatewayTimeout, get_gateway
+
 OLLAMA_HOST = "http://127.0.0.1:11434"
 
 # Rejestr modeli, którymi kernel może zarządzać
@@ -13,6 +18,15 @@ LLM_MODELS: dict[LLMModelName, str] = {
     "qwen_boost": "qwen2.5:1.5b",
 }
 
+# Względny koszt modelu (rozmiar / zużycie GPU-CPU) - router wybiera najtańszy,
+# który mieści się w budżecie czasu
+MODEL_COST: dict[LLMModelName, float] = {
+    "llama_main": 1.0,
+    "qwen_boost": 1.5,
+}
+
+DEFAULT_TIMEOUT = 120.0
+
 
 class LLMKernelError(Exception):
     """Błąd warstwy kernela LLM (do logów / auto-fix / watchdog)."""
@@ -20,12 +34,39 @@ class LLMKernelError(Exception):
     pass
 
 
+class LLMKernelTimeout(LLMKernelError):
+    """Model nie odpowiedział w limicie czasu (router przechodzi na inny model)."""
+
+    pass
+
+
+class LLMKernelBusy(LLMKernelError):
+    """Bramka LLM odrzuciła zapytanie (pełna kolejka / brak slotu) - to nie błąd modelu."""
+
+    pass
+
+
 def _ollama_generate_raw(
-    model: str, prompt: str, system_prompt: Optional[str] = None, timeout: Optional[float] = 120.0
+    model: str, prompt: str, system_prompt: Optional[str] = None, timeout: Optional[float] = DEFAULT_TIMEOUT
 ) -> str:
+    """Sama odpowiedź tekstowa modelu (patrz _ollama_generate)."""
+    return _ollama_generate(model, prompt, system_prompt, timeout)[0]
+
+
+def _ollama_generate(
+    model: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    timing: Optional[dict] = None,
+) -> tuple[str, dict]:
     """
-    Niski poziom: bezpośrednie wywołanie /api/generate.
+    Niski poziom: bezpośrednie wywołanie /api/generate; zwraca (tekst, pełna odpowiedź JSON).
     - timeout w sekundach (None = brak limitu, ale lepiej mieć twardy limit)
+    - przechodzi przez wspólną bramkę LLM (limit równoległych zapytań na model,
+      priorytet z llm_priority(), domyślnie "agent"); timeout obejmuje
+      łącznie czekanie w kolejce i samo zapytanie
+    - `timing["started"]` dostaje chwilę przyjęcia przez bramkę (bez czasu w kolejce)
     """
     url = f"{OLLAMA_HOST}/api/generate"
 
@@ -38,11 +79,22 @@ def _ollama_generate_raw(
     if system_prompt:
         payload["system"] = system_prompt
 
+    deadline = None if timeout is None else time.monotonic() + timeout
     try:
-        resp = requests.post(url, json=payload, timeout=timeout)
+        with get_gateway().slot(model, timeout=timeout):
+            if timing is not None:
+                timing["started"] = time.monotonic()
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise GatewayTimeout(f"No LLM slot for {model} within {timeout}s")
+            resp = requests.post(url, json=payload, timeout=remaining)
         resp.raise_for_status()
+    except GatewayBusy as e:
+        raise LLMKernelBusy(f"[LLM BUSY] Kolejka do modelu '{model}' jest pełna: {e}") from e
+    except GatewayTimeout as e:
+        raise LLMKernelBusy(f"[LLM QUEUE TIMEOUT] Model '{model}' - brak wolnego slotu: {e}") from e
     except requests.exceptions.Timeout as e:
-        raise LLMKernelError(f"[LLM TIMEOUT] Model '{model}' przekroczył limit czasu: {e}") from e
+        raise LLMKernelTimeout(f"[LLM TIMEOUT] Model '{model}' przekroczył limit czasu: {e}") from e
     except requests.exceptions.ConnectionError as e:
         raise LLMKernelError(
             f"[LLM CONNECTION] Brak połączenia z Ollama na {OLLAMA_HOST}: {e}"
@@ -55,55 +107,216 @@ def _ollama_generate_raw(
     except json.JSONDecodeError as e:
         raise LLMKernelError("[LLM ERROR] Nieprawidłowa odpowiedź JSON z Ollama.") from e
 
-    return (data.get("response") or "").strip()
+    return (data.get("response") or "").strip(), data
+
+
+class ModelRouter:
+    """
+    Router modeli z wykładniczo wygaszanymi statystykami.
+
+    Dla każdego modelu trzyma ostatnie próbki (czas, opóźnienie, tokeny/s,
+    błąd); waga próbki maleje o połowę co `half_life` sekund, więc p50/p95,
+    tokeny/s i odsetek błędów odzwierciedlają bieżący stan serwera.
+    """
+
+    # słowa sugerujące dłuższe rozumowanie -> większy model
+    REASONING_HINTS = (
+        "analiz",
+        "wyjaśnij",
+        "dlaczego",
+        "krok po kroku",
+        "zaproponuj",
+        "refaktoryz",
+        "popraw",
+        "explain",
+        "analyze",
+        "step by step",
+        "why",
+    )
+    SHORT_PROMPT_CHARS = 600
+    LONG_PROMPT_CHARS = 2000
+
+    def __init__(
+        self,
+        models: Optional[dict] = None,
+        costs: Optional[dict] = None,
+        half_life: float = 300.0,
+        max_samples: int = 256,
+        max_error_rate: float = 0.5,
+    ):
+        self.models = dict(models or LLM_MODELS)
+        self.costs = dict(costs or MODEL_COST)
+        self.half_life = half_life
+        self.max_samples = max_samples
+        self.max_error_rate = max_error_rate
+        # nazwa -> lista (czas, opóźnienie | None, tokeny/s | None, błąd)
+        self._samples: dict[str, list[tuple[float, Optional[float], Optional[float], bool]]] = {
+            name: [] for name in self.models
+        }
+        self._lock = threading.Lock()
+
+    # -- statystyki ----------------------------------------------------------
+
+    def record(
+        self,
+        name: str,
+        latency: Optional[float],
+        ok: bool = True,
+        tokens_per_sec: Optional[float] = None,
+    ) -> None:
+        """Zapisuje wynik jednego wywołania (latency=None gdy nie ma sensu, np. brak połączenia)."""
+        with self._lock:
+            samples = self._samples.setdefault(name, [])
+            samples.append((time.monotonic(), latency, tokens_per_sec, not ok))
+            if len(samples) > self.max_samples:
+                del samples[: len(samples) - self.max_samples]
+
+    def _weights(self, samples, now: float) -> list[float]:
+        return [0.5 ** ((now - t) / self.half_life) for t, *_ in samples]
+
+    @staticmethod
+    def _weighted_quantile(pairs: list[tuple[float, float]], q: float) -> Optional[float]:
+        if not pairs:
+            return None
+        pairs = sorted(pairs)
+        total = sum(w for _, w in pairs)
+        acc = 0.0
+        for value, w in pairs:
+            acc += w
+            if acc >= q * total:
+                return value
+        return pairs[-1][0]
+
+    def stats(self, name: str) -> dict:
+        """p50/p95 opóźnienia [s], tokeny/s i odsetek błędów (ważone wiekiem próbek)."""
+        with self._lock:
+            samples = list(self._samples.get(name, []))
+        now = time.monotonic()
+        weights = self._weights(samples, now)
+        latencies = [(s[1], w) for s, w in zip(samples, weights) if s[1] is not None]
+        rates = [(s[2], w) for s, w in zip(samples, weights) if s[2] is not None]
+        total = sum(weights)
+        return {
+            "samples": len(samples),
+            "p50": self._weighted_quantile(latencies, 0.50),
+            "p95": self._weighted_quantile(latencies, 0.95),
+            "tokens_per_sec": (sum(r * w for r, w in rates) / sum(w for _, w in rates)) if rates else None,
+            "error_rate": (sum(w for s, w in zip(samples, weights) if s[3]) / total) if total else 0.0,
+        }
+
+    # -- wybór modelu ----------------------------------------------------------
+
+    def prompt_kind(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        """'short' (klasyfikacja, krótkie polecenie) albo 'long' (rozumowanie, duży kontekst)."""
+        size = len(prompt) + len(system_prompt or "")
+        if size >= self.LONG_PROMPT_CHARS:
+            return "long"
+        low = prompt.lower()
+        if size > self.SHORT_PROMPT_CHARS or any(h in low for h in self.REASONING_HINTS):
+            return "long"
+        return "short"
+
+    def route(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        latency_budget: Optional[float] = None,
+        preferred: Optional[LLMModelName] = None,
+    ) -> list[LLMModelName]:
+        """
+        Kolejność modeli do wypróbowania:
+        - krótkie prompty: od najtańszego, długie: od najdroższego (największego),
+        - `preferred` (jawny wybór wywołującego) zawsze na początku,
+          nawet gdy jego statystyki są słabe,
+        - pozostałe modele, których p95 przekracza budżet albo które często
+          zawodzą, trafiają na koniec (zostają jako failover).
+        Model bez statystyk uznajemy za mieszczący się w budżecie.
+        """
+        kind = self.prompt_kind(prompt, system_prompt)
+        names = sorted(self.models, key=lambda n: self.costs.get(n, math.inf), reverse=(kind == "long"))
+        pinned = []
+        if preferred in names:
+            names.remove(preferred)
+            pinned.append(preferred)
+
+        good, degraded = [], []
+        for name in names:
+            st = self.stats(name)
+            too_slow = latency_budget is not None and st["p95"] is not None and st["p95"] > latency_budget
+            failing = st["samples"] >= 3 and st["error_rate"] > self.max_error_rate
+            (degraded if (too_slow or failing) else good).append(name)
+        return pinned + good + degraded
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_router() -> ModelRouter:
+    """Wspólny router kernela (statystyki zbierane przez cały proces)."""
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
+
+
+def _tokens_per_sec(data: dict, text: str, latency: float) -> Optional[float]:
+    # Ollama podaje eval_count i eval_duration (ns); bez nich - przybliżenie słowami
+    count, duration = data.get("eval_count"), data.get("eval_duration")
+    if count and duration:
+        return count / (duration / 1e9)
+    if latency > 0 and text:
+        return len(text.split()) / latency
+    return None
 
 
 def llm_kernel_generate(
     prompt: str,
     system_prompt: Optional[str] = None,
-    model_name: LLMModelName = "llama_main",
+    model_name: Optional[LLMModelName] = None,
     allow_fallback: bool = True,
+    latency_budget: Optional[float] = None,
 ) -> str:
     """
     Główna funkcja kernela v3:
-    - wybiera model po nazwie logicznej (llama_main / qwen_boost),
-    - obsługuje błędy,
-    - opcjonalnie robi fallback na inny model.
+    - model_name=None: router wybiera model (krótkie prompty -> mały model,
+      długie rozumowanie -> większy; najtańszy mieszczący się w latency_budget),
+    - model_name podany: ten model idzie pierwszy, reszta jako fallback
+      (allow_fallback=False: tylko on),
+    - latency_budget [s] jest też twardym timeoutem pojedynczej próby,
+      więc zawieszony model oddaje zapytanie następnemu,
+    - każde wywołanie aktualizuje statystyki routera (poza odrzuceniem
+      przez bramkę - pełna kolejka nie świadczy o stanie modelu); opóźnienie
+      liczone jest od przyjęcia przez bramkę, bez czasu w kolejce.
     """
-    if model_name not in LLM_MODELS:
+    if model_name is not None and model_name not in LLM_MODELS:
         raise LLMKernelError(f"[LLM CONFIG] Nieznany model logiczny: {model_name}")
 
-    primary_model = LLM_MODELS[model_name]
-
-    # 1. Próba z modelem głównym
-    try:
-        return _ollama_generate_raw(primary_model, prompt, system_prompt)
-    except LLMKernelError as e_primary:
-        # Jeśli fallback wyłączony → od razu błąd w górę
-        if not allow_fallback:
-            raise
-
-        # 2. Fallback: jeśli prosiliśmy o qwen_boost → spróbuj llama_main
-        #    jeśli prosiliśmy o llama_main → spróbuj qwen_boost
-        fallback_model_name: Optional[LLMModelName] = None
-        if model_name == "qwen_boost":
-            fallback_model_name = "llama_main"
-        elif model_name == "llama_main":
-            fallback_model_name = "qwen_boost"
-
-        if not fallback_model_name:
-            # Teoretycznie nie powinno się zdarzyć, ale na wszelki wypadek:
-            raise LLMKernelError(
-                f"[LLM FALLBACK] Nie udało się użyć modelu '{primary_model}', brak fallbacku. Szczegóły: {e_primary}"
-            ) from e_primary
-
-        fallback_model = LLM_MODELS[fallback_model_name]
+    router = get_router()
+    candidates = router.route(prompt, system_prompt, latency_budget, preferred=model_name)
+    if not allow_fallback:
+        candidates = candidates[:1]
+    timeout = latency_budget if latency_budget is not None else DEFAULT_TIMEOUT
 
+    errors: list[str] = []
+    for name in candidates:
+        model = LLM_MODELS[name]
+        started = time.monotonic()
+        timing: dict = {}
         try:
-            return _ollama_generate_raw(fallback_model, prompt, system_prompt)
-        except LLMKernelError as e_fallback:
-            # Oba modele padły → zwracamy złożony błąd
-            raise LLMKernelError(
-                f"[LLM DOUBLE FAIL] Model główny '{primary_model}' i fallback '{fallback_model}' zawiodły.\n"
-                f"Primary error: {e_primary}\nFallback error: {e_fallback}"
-            ) from e_fallback
+            text, data = _ollama_generate(model, prompt, system_prompt, timeout=timeout, timing=timing)
+        except LLMKernelError as e:
+            elapsed = time.monotonic() - timing.get("started", started)
+            if not isinstance(e, LLMKernelBusy):
+                # timeout to też informacja o opóźnieniu; szybki błąd połączenia - nie
+                router.record(name, elapsed if isinstance(e, LLMKernelTimeout) else None, ok=False)
+            if len(candidates) == 1:
+                raise
+            errors.append(f"{model}: {e}")
+            continue
+        elapsed = time.monotonic() - timing.get("started", started)
+        router.record(name, elapsed, ok=True, tokens_per_sec=_tokens_per_sec(data, text, elapsed))
+        return text
+
+    raise LLMKernelError(
+        "[LLM ALL FAILED] Żaden model nie odpowiedział:\n" + "\n".join(errors)
+    )
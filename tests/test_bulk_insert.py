@@ -18,3 +18,44 @@ def test_bulk_insert_and_search(tmp_path):
     # ensure can search
     results = db_tools.search_fts(db_path, "quick", limit=5)
     assert any(r["id"] for r in results)
+
+
+def test_ingest_streams_generator_in_batches(tmp_path):
+    db_path = str(tmp_path / "ingest.db")
+    progress = []
+
+    def gen():
+        for i in range(2500):
+            yield (f"document number {i} zebra" if i == 1234 else f"document number {i}", {"i": i})
+
+    res = db_tools.ingest_documents(db_path, gen(), batch_size=1000, progress=progress.append)
+    assert res["success"] is True
+    assert res["inserted"] == 2500
+    assert res["batches"] == 3
+    assert [p["inserted"] for p in progress] == [1000, 2000, 2500]
+
+    hits = db_tools.search_fts(db_path, "zebra", limit=5)
+    assert len(hits) == 1
+    doc = db_tools.get_document_by_id(db_path, hits[0]["id"])
+    assert doc["metadata"]["i"] == 1234
+
+
+def test_ingest_jsonl_and_directory(tmp_path):
+    db_path = str(tmp_path / "ingest_files.db")
+    jsonl = tmp_path / "corpus.jsonl"
+    jsonl.write_text(
+        '{"content": "first jsonl row", "title": "one"}\n'
+        "not json\n"
+        '{"content": "second jsonl row", "tags": "x"}\n'
+    )
+    res = db_tools.ingest_documents(db_path, db_tools.iter_jsonl_documents(str(jsonl)))
+    assert res["inserted"] == 2
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("markdown walrus")
+    res = db_tools.ingest_documents(db_path, db_tools.iter_directory_documents(str(docs)))
+    assert res["inserted"] == 1
+    assert db_tools.search_fts(db_path, "walrus")
+    # title from metadata is indexed too
+    assert db_tools.search_fts(db_path, "one")
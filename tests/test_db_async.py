@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import pytest
+
+from dark8_core.agent.tools import db as db_tools
+
+SLOW_SQL = (
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < ?) "
+    "SELECT count(*) AS n FROM c"
+)
+
+
+@pytest.mark.asyncio
+async def test_db_execute_does_not_block_loop(tmp_path):
+    db_path = str(tmp_path / "async.db")
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    res, _ = await asyncio.gather(
+        db_tools.db_execute({"db_path": db_path, "sql": SLOW_SQL, "params": (2_000_000,)}),
+        ticker(),
+    )
+    assert res["success"] is True
+    assert res["rows"][0]["n"] == 2_000_000
+    assert ticks == 5
+
+
+@pytest.mark.asyncio
+async def test_db_actions_run_on_dedicated_thread(tmp_path):
+    db_path = str(tmp_path / "thread.db")
+    adb = db_tools.get_async_db(db_path)
+    assert db_tools.get_async_db(db_path) is adb
+
+    assert (await db_tools.db_execute({"action": "bootstrap", "db_path": db_path}))["success"]
+    doc_id = await adb.run(db_tools.insert_document, db_path, "async insert", {})
+    res = await adb.query("SELECT content FROM documents WHERE id = ?", (doc_id,))
+    assert res["rows"][0]["content"] == "async insert"
+    name = await adb.run(lambda: threading.current_thread().name)
+    assert name.startswith("dark8-db")
+
+
+@pytest.mark.asyncio
+async def test_cancel_interrupts_running_query(tmp_path):
+    db_path = str(tmp_path / "cancel.db")
+    adb = db_tools.get_async_db(db_path)
+    task = asyncio.ensure_future(adb.query(SLOW_SQL, (10**10,)))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # the worker thread is free again almost immediately
+    res = await asyncio.wait_for(adb.query("SELECT 1 AS one"), timeout=2)
+    assert res["rows"][0]["one"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelling_queued_call_leaves_running_query_alone(tmp_path):
+    db_path = str(tmp_path / "cancel_queued.db")
+    adb = db_tools.AsyncDatabase(db_path)
+    running = asyncio.ensure_future(adb.query(SLOW_SQL, (3_000_000,)))
+    await asyncio.sleep(0.05)
+    queued = asyncio.ensure_future(adb.query("SELECT 1 AS one"))
+    await asyncio.sleep(0.01)
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+
+    # the other caller's query was not interrupted
+    res = await running
+    assert res["success"] is True
+    assert res["rows"][0]["n"] == 3_000_000
+    await adb.close()
@@ -0,0 +1,92 @@
+import threading
+
+from dark8_core.agent.tools import db as db_tools
+
+
+def test_pool_reuses_connection_per_thread(tmp_path):
+    db_path = str(tmp_path / "pool.db")
+    c1 = db_tools.get_pool().get(db_path)
+    c2 = db_tools.get_pool().get(db_path)
+    assert c1 is c2
+
+    other = {}
+
+    def worker():
+        other["conn"] = db_tools.get_pool().get(db_path)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert other["conn"] is not c1
+    db_tools.close_connections(db_path)
+
+
+def test_pool_pragmas(tmp_path):
+    db_path = str(tmp_path / "pragmas.db")
+    conn = db_tools.get_pool().get(db_path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    db_tools.close_connections(db_path)
+
+
+def test_pool_reopens_replaced_file(tmp_path):
+    db_file = tmp_path / "replaced.db"
+    db_path = str(db_file)
+    doc_id = db_tools.insert_document(db_path, "before replace", {})
+    assert db_tools.get_document_by_id(db_path, doc_id) is not None
+
+    for suffix in ("", "-wal", "-shm"):
+        p = tmp_path / f"replaced.db{suffix}"
+        if p.exists():
+            p.unlink()
+
+    # a fresh database must not be served by the stale cached connection
+    assert db_tools.get_document_by_id(db_path, doc_id) is None
+    new_id = db_tools.insert_document(db_path, "after replace", {})
+    assert db_tools.get_document_by_id(db_path, new_id)["content"] == "after replace"
+    db_tools.close_connections(db_path)
+
+
+def test_failed_write_rolls_back(tmp_path):
+    db_path = str(tmp_path / "rollback.db")
+    db_tools.ensure_documents_table(db_path)
+    res = db_tools.run_write(db_path, "INSERT INTO documents (content) VALUES (NULL)")
+    assert res["success"] is False
+    # connection is still usable and not stuck inside a transaction
+    assert db_tools.get_pool().get(db_path).in_transaction is False
+    assert db_tools.insert_document(db_path, "ok", {}) is not None
+
+
+def test_close_all_reaches_other_threads(tmp_path):
+    db_path = str(tmp_path / "close_all.db")
+    db_tools.insert_document(db_path, "kept", {})
+    started, closed, done = threading.Event(), threading.Event(), {}
+
+    def worker():
+        db_tools.get_pool().get(db_path)
+        started.set()
+        closed.wait()
+        # the old connection was closed from the main thread; a new one is opened
+        done["rows"] = db_tools.run_query(db_path, "SELECT content FROM documents")["rows"]
+
+    t = threading.Thread(target=worker)
+    t.start()
+    started.wait()
+    db_tools.close_connections(db_path)
+    closed.set()
+    t.join()
+    assert done["rows"] == [{"content": "kept"}]
+    db_tools.close_connections(db_path)
+
+
+def test_exited_thread_connections_are_released(tmp_path):
+    import gc
+
+    db_path = str(tmp_path / "exited.db")
+    pool = db_tools.get_pool()
+    before = len(pool._threads)
+    t = threading.Thread(target=lambda: pool.get(db_path))
+    t.start()
+    t.join()
+    gc.collect()
+    assert len(pool._threads) <= before
@@ -0,0 +1,59 @@
+import pytest
+
+from dark8_core.agent.tools import db as db_tools
+
+
+def _seed(db_path, n):
+    db_tools.ingest_documents(db_path, ((f"row {i}", {"i": i}) for i in range(n)), batch_size=500)
+
+
+def test_iter_query_chunks(tmp_path):
+    db_path = str(tmp_path / "stream.db")
+    _seed(db_path, 2500)
+
+    stream = db_tools.iter_query(db_path, "SELECT id, content FROM documents ORDER BY id", chunk_size=1000)
+    sizes = [len(chunk) for chunk in stream]
+    assert sizes == [1000, 1000, 500]
+    assert stream.columns == ["id", "content"]
+
+    first = next(iter(db_tools.iter_query(db_path, "SELECT id, content FROM documents ORDER BY id")))
+    assert first[0] == {"id": 1, "content": "row 0"}
+
+
+def test_tuple_mode(tmp_path):
+    db_path = str(tmp_path / "tuples.db")
+    _seed(db_path, 3)
+
+    res = db_tools.run_query(db_path, "SELECT id, content FROM documents ORDER BY id", as_tuples=True)
+    assert res["columns"] == ["id", "content"]
+    assert res["rows"][0] == (1, "row 0")
+
+    stream = db_tools.iter_query(db_path, "SELECT id FROM documents ORDER BY id", as_tuples=True)
+    assert list(stream.rows()) == [(1,), (2,), (3,)]
+
+
+def test_keyset_pagination(tmp_path):
+    db_path = str(tmp_path / "pages.db")
+    _seed(db_path, 25)
+
+    page1 = db_tools.list_documents(db_path, limit=10)
+    page2 = db_tools.list_documents(db_path, limit=10, before_id=page1[-1]["id"])
+    assert [d["id"] for d in page2] == list(range(15, 5, -1))
+    assert page2 == db_tools.list_documents(db_path, limit=10, offset=10)
+
+    pages = list(db_tools.iter_documents(db_path, page_size=10))
+    assert [len(p) for p in pages] == [10, 10, 5]
+    assert pages[-1][-1]["metadata"] == {"i": 0}
+
+
+@pytest.mark.asyncio
+async def test_async_iter_query(tmp_path):
+    db_path = str(tmp_path / "astream.db")
+    _seed(db_path, 1200)
+
+    total = 0
+    chunks = 0
+    async for chunk in db_tools.aiter_query(db_path, "SELECT id FROM documents", chunk_size=500, as_tuples=True):
+        total += len(chunk)
+        chunks += 1
+    assert (total, chunks) == (1200, 3)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from dark8_core.nlp.bert import BERTPolishLoader, EmbeddingCache
+
+
+def test_embeddings_are_deterministic_float32():
+    loader = BERTPolishLoader()
+    vec = loader.get_embedding("zbuduj aplikację")
+    assert vec.dtype == np.float32 and vec.shape == (768,)
+    assert np.array_equal(vec, BERTPolishLoader().get_embedding("zbuduj aplikację"))
+    assert not np.array_equal(vec, loader.get_embedding("inny tekst"))
+
+
+def test_lru_is_bounded():
+    loader = BERTPolishLoader(cache_size=3)
+    for i in range(10):
+        loader.get_embedding(f"text {i}")
+    assert len(loader.embedding_cache) == 3
+    assert "text 9" in loader.embedding_cache and "text 0" not in loader.embedding_cache
+
+
+def test_get_embeddings_batches_and_dedupes():
+    loader = BERTPolishLoader()
+    matrix = loader.get_embeddings(["a", "b", "a"])
+    assert matrix.shape == (3, 768) and matrix.dtype == np.float32
+    assert np.array_equal(matrix[0], matrix[2])
+    assert np.array_equal(matrix[1], loader.get_embedding("b"))
+    assert loader.get_embeddings([]).shape == (0, 768)
+
+
+def test_disk_spill_survives_eviction_and_restart(tmp_path):
+    spill = str(tmp_path / "emb" / "cache")
+    cache = EmbeddingCache(dim=4, max_entries=1, spill_path=spill, spill_slots=64)
+    cache.put("a", np.array([1, 2, 3, 4]))
+    cache.put("b", np.array([5, 6, 7, 8]))
+    assert len(cache) == 1
+    assert np.array_equal(cache.get("a"), [1, 2, 3, 4])
+    assert cache.stats()["spill_hits"] == 1
+    cache.flush()
+
+    reopened = EmbeddingCache(dim=4, max_entries=1, spill_path=spill, spill_slots=64)
+    assert np.array_equal(reopened.get("b"), [5, 6, 7, 8])
+    assert reopened.get("missing") is None
+
+
+def test_cached_embeddings_are_read_only():
+    loader = BERTPolishLoader()
+    vec = loader.get_embedding("nie zmieniaj")
+    with pytest.raises(ValueError):
+        vec *= 2
+    assert not loader.get_embedding("nie zmieniaj").flags.writeable
+    # callers' arrays are copied, not frozen
+    own = np.ones(768, dtype=np.float32)
+    loader.embedding_cache.put("own", own)
+    assert own.flags.writeable
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from dark8_core.search import FileCatalog, FileSearchSource, SearchEngine
+
+
+def test_catalog_rescan_only_changed(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("alpha catalog file")
+    (docs / "b.md").write_text("beta notes")
+    catalog = FileCatalog(str(tmp_path / "catalog.db"))
+
+    stats = catalog.scan([str(docs)])
+    assert stats["added"] == 2
+    assert catalog.count() == 2
+
+    stats = catalog.scan([str(docs)])
+    assert stats == {"added": 0, "updated": 0, "unchanged": 2, "removed": 0}
+
+    a = docs / "a.txt"
+    a.write_text("alpha catalog file rewritten with gamma")
+    st = a.stat()
+    os.utime(a, (st.st_atime, st.st_mtime + 5))
+    (docs / "b.md").unlink()
+
+    stats = catalog.scan([str(docs)])
+    assert stats["updated"] == 1
+    assert stats["removed"] == 1
+    hits = catalog.search("gamma")
+    assert [h["path"] for h in hits] == [str(a)]
+    assert catalog.search("beta") == []
+
+
+def test_catalog_touch_without_change_is_not_reindexed(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    f = docs / "a.txt"
+    f.write_text("same content")
+    catalog = FileCatalog(str(tmp_path / "catalog.db"))
+    catalog.scan([str(docs)])
+
+    st = f.stat()
+    os.utime(f, (st.st_atime, st.st_mtime + 5))
+    stats = catalog.scan([str(docs)])
+    assert stats["unchanged"] == 1 and stats["updated"] == 0
+
+
+@pytest.mark.asyncio
+async def test_file_source_with_catalog(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "note.txt").write_text("hello catalog search test")
+
+    engine = SearchEngine()
+    fs = FileSearchSource(paths=[str(docs)], catalog_path=str(tmp_path / "catalog.db"))
+    engine.register_source("files", fs)
+
+    res = await engine.search("catalog", limit=5)
+    assert res["success"] is True
+    hits = [r for r in res["results"] if r["source"] == "file"]
+    assert hits and hits[0]["metadata"]["path"].endswith("note.txt")
+
+
+def test_catalog_prune_ignores_sibling_roots(tmp_path):
+    docs, docs2 = tmp_path / "docs", tmp_path / "docs2"
+    docs.mkdir()
+    docs2.mkdir()
+    (docs / "a.txt").write_text("alpha")
+    gone = docs2 / "b.txt"
+    gone.write_text("beta")
+    catalog = FileCatalog(str(tmp_path / "catalog.db"))
+    catalog.scan([str(docs), str(docs2)])
+    gone.unlink()
+
+    # a scan of /docs must not prune entries that belong to /docs2
+    assert catalog.scan([str(docs)])["removed"] == 0
+    assert catalog.count() == 2
+    assert catalog.scan([str(docs2)])["removed"] == 1
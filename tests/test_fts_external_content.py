@@ -0,0 +1,69 @@
+import sqlite3
+
+from dark8_core.agent.tools import db as db_tools
+
+
+def _tables(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    finally:
+        conn.close()
+
+
+def test_fts_is_external_content(tmp_path):
+    db_path = str(tmp_path / "ext.db")
+    doc_id = db_tools.insert_document(db_path, "external content body", {"title": "ext"})
+
+    # no shadow copy of the text: external-content tables have no *_content table
+    assert "documents_fts_content" not in _tables(db_path)
+    assert any(r["id"] == doc_id for r in db_tools.search_fts(db_path, "external"))
+
+
+def test_triggers_sync_update_and_delete(tmp_path):
+    db_path = str(tmp_path / "triggers.db")
+    doc_id = db_tools.insert_document(db_path, "original words", {})
+
+    db_tools.update_document(db_path, doc_id, "replacement words", {"title": "renamed"})
+    assert db_tools.search_fts(db_path, "original") == []
+    assert db_tools.search_fts(db_path, "replacement")[0]["id"] == doc_id
+    assert db_tools.search_fts(db_path, "renamed")[0]["id"] == doc_id
+
+    db_tools.delete_document(db_path, doc_id)
+    assert db_tools.search_fts(db_path, "replacement") == []
+
+
+def test_migrates_standalone_fts(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        CREATE TABLE documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT, content TEXT NOT NULL, tags TEXT, metadata TEXT
+        );
+        CREATE VIRTUAL TABLE documents_fts USING fts5(title, content, tags);
+        INSERT INTO documents (title, content, tags, metadata) VALUES ('old', 'legacy heron', '', '{}');
+        INSERT INTO documents_fts (rowid, title, content, tags) VALUES (1, 'old', 'legacy heron', '');
+        """
+    )
+    conn.commit()
+    conn.close()
+    assert "documents_fts_content" in _tables(db_path)
+
+    res = db_tools.ensure_fts5(db_path)
+    assert res["success"] is True and res["migrated"] is True
+    assert "documents_fts_content" not in _tables(db_path)
+    assert db_tools.search_fts(db_path, "heron")[0]["id"] == 1
+
+    # triggers are active after migration
+    new_id = db_tools.insert_document(db_path, "fresh heron", {})
+    assert {r["id"] for r in db_tools.search_fts(db_path, "heron")} == {1, new_id}
+
+
+def test_fts_optimize_and_merge(tmp_path):
+    db_path = str(tmp_path / "maint.db")
+    db_tools.ingest_documents(db_path, (f"doc {i} maintenance" for i in range(50)), batch_size=10)
+    assert db_tools.optimize_fts(db_path)["action"] == "optimize"
+    assert db_tools.optimize_fts(db_path, merge_pages=100)["action"] == "merge"
+    assert len(db_tools.search_fts(db_path, "maintenance", limit=100)) == 50
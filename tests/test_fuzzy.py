@@ -37,3 +37,27 @@ async def test_fuzzy_ranking(tmp_path):
     assert len(results) >= 1
     # best score first
     assert results[0]["score"] >= results[-1]["score"]
+
+
+def test_score_many_matches_score():
+    m = FuzzyMatcher()
+    texts = ["hello", "well hello there", "this is unrelated text", "", "helo"]
+    assert m.score_many("hello", texts) == [m.score("hello", t) for t in texts]
+    assert m.score_many("hello", []) == []
+    assert m.score_many("", texts) == [0.0] * len(texts)
+
+
+def test_score_many_cutoff():
+    m = FuzzyMatcher()
+    scores = m.score_many("kitten", ["sitting", "kitten", "zzzzzzzzzzzzzzz"], score_cutoff=0.5)
+    assert scores[1] == 1.0
+    assert scores[0] == m.score("kitten", "sitting")  # 1 - 3/7 >= 0.5
+    assert scores[2] == 0.0
+
+
+def test_banded_levenshtein_early_exit():
+    m = FuzzyMatcher()
+    assert m._levenshtein_distance("kitten", "sitting") == 3
+    assert m._levenshtein_distance("kitten", "sitting", max_distance=3) == 3
+    assert m._levenshtein_distance("kitten", "sitting", max_distance=2) == 3  # cutoff + 1
+    assert m._levenshtein_distance("a", "a" * 50, max_distance=5) == 6
@@ -0,0 +1,130 @@
+import threading
+
+import pytest
+
+from dark8_core.search import (
+    RankingEngine,
+    SearchEngine,
+    SearchResult,
+    SearchSource,
+    VectorSearchSource,
+    decode_embedding,
+    encode_embedding,
+)
+
+
+def _r(source, score, path):
+    return SearchResult(source=source, score=score, snippet=path, metadata={"path": path})
+
+
+def test_rrf_fuses_incomparable_scales():
+    # "fts" scores are large, "fuzzy" scores are tiny; raw sorting would only show fts
+    results = [
+        _r("fts", 12.0, "a"),
+        _r("fts", 9.0, "b"),
+        _r("fts", 8.5, "c"),
+        _r("fuzzy", 0.02, "b"),
+        _r("fuzzy", 0.01, "d"),
+    ]
+    ranked = RankingEngine(method="rrf").rank(results)
+    assert ranked[0].metadata["path"] == "b"  # found by both sources
+    assert len(ranked) == 4
+    assert ranked[0].score <= 1.0
+    assert [r.score for r in ranked] == sorted((r.score for r in ranked), reverse=True)
+
+
+def test_weighted_normalized_fusion():
+    results = [_r("a", 100.0, "x"), _r("a", 50.0, "y"), _r("b", 0.9, "y"), _r("b", 0.1, "x")]
+    ranked = RankingEngine(method="weighted", weights={"a": 1.0, "b": 3.0}).rank(results)
+    assert ranked[0].metadata["path"] == "y"
+    assert ranked[0].score == pytest.approx(0.75)
+
+
+def test_score_method_keeps_legacy_sort():
+    results = [_r("a", 0.1, "x"), _r("b", 0.9, "y")]
+    assert [r.metadata["path"] for r in RankingEngine().rank(results)] == ["y", "x"]
+
+
+def test_embedding_codec_fits_knowledge_item_column():
+    vec = [0.5, -0.25, 0.125] * 256
+    encoded = encode_embedding(vec)
+    assert len(encoded) <= 4096
+    assert decode_embedding(encoded) == pytest.approx(vec, abs=1e-3)
+    assert decode_embedding("[1, 2]") == [1.0, 2.0]
+    assert decode_embedding("1,2") == [1.0, 2.0]
+    assert decode_embedding(None) is None
+
+
+class LexicalSource(SearchSource):
+    async def search(self, query: str, limit: int = 10):
+        return [SearchResult(source="lexical", score=7.5, snippet="kb 1", metadata={"doc_id": "1"})]
+
+
+@pytest.mark.asyncio
+async def test_vector_recall_fused_with_lexical():
+    space = {"python": [1.0, 0.0], "snake": [0.9, 0.1], "java": [0.0, 1.0]}
+    vec = VectorSearchSource(embed=lambda text: space.get(text, [0.5, 0.5]))
+    added = vec.add_knowledge_items(
+        [
+            {"id": 1, "title": "python", "content": "", "embedding": encode_embedding([1.0, 0.0])},
+            {"id": 2, "title": "java", "content": "", "embedding": "[0.0, 1.0]"},
+        ]
+    )
+    assert added == 2
+
+    hits = await vec.search("snake", limit=1)
+    assert hits[0].metadata["doc_id"] == 1
+
+    engine = SearchEngine()
+    engine.register_source("lexical", LexicalSource())
+    engine.register_source("vector", vec)
+    res = await engine.search("snake", limit=5)
+    # doc 1 is first for both sources -> fused score 1.0
+    assert res["results"][0]["score"] == pytest.approx(1.0)
+
+
+def test_rrf_keeps_same_row_id_from_different_databases_apart():
+    results = [
+        SearchResult(source="db", score=0.9, snippet="a", metadata={"row_id": 1, "db_path": "/x.db"}),
+        SearchResult(source="db", score=0.8, snippet="b", metadata={"row_id": 1, "db_path": "/y.db"}),
+    ]
+    ranked = RankingEngine(method="rrf").rank(results)
+    assert sorted(r.snippet for r in ranked) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_vector_source_searches_a_shared_store():
+    from dark8_core.nlp.vector_store import VectorStore
+
+    store = VectorStore(dim=2)
+    store.add("a", [1.0, 0.0], {"text": "alpha", "title": "A"})
+    vec = VectorSearchSource(embed=lambda text: [1.0, 0.1], store=store)
+    vec.add("b", "beta", [0.0, 1.0])
+    assert len(vec) == len(store) == 2
+
+    hits = await vec.search("q", limit=2)
+    assert [h.ref for h in hits] == ["a", "b"]
+    assert hits[0].metadata == {"title": "A", "doc_id": "a"}
+    assert hits[0].snippet == "alpha"
+
+
+@pytest.mark.asyncio
+async def test_query_embedding_runs_off_the_event_loop():
+    loop_thread = threading.get_ident()
+    embedded_on = []
+
+    def embed(text):
+        embedded_on.append(threading.get_ident())
+        return [1.0, 0.0]
+
+    vec = VectorSearchSource(embed=embed)
+    vec.add(1, "python", embedding=[1.0, 0.0])
+    engine = SearchEngine()
+    engine.register_source("vector", vec)
+    try:
+        assert (await vec.search("python"))[0].ref == "1"
+        res = await engine.search("python", fuzzy=False)
+        assert res["results"][0]["source"] == "vector"
+    finally:
+        engine.close()
+    assert len(embedded_on) == 2 and loop_thread not in embedded_on
@@ -0,0 +1,55 @@
+import pytest
+
+from dark8_core.search import Indexer, IndexSearchSource, SearchEngine
+
+
+def test_indexer_bm25_ordering():
+    idx = Indexer()
+    idx.index_document("a", "apple apple banana")
+    idx.index_document("b", "apple banana cherry date")
+    idx.index_document("c", "cherry date")
+
+    hits = idx.search("apple", limit=10)
+    assert [doc_id for doc_id, _ in hits] == ["a", "b"]
+    assert hits[0][1] > hits[1][1] > 0
+
+
+def test_indexer_update_and_delete():
+    idx = Indexer()
+    idx.index_document("1", "old content")
+    idx.index_document("1", "new content")
+    assert len(idx) == 1
+    assert idx.search("old") == []
+    assert idx.search("new")[0][0] == "1"
+
+    assert idx.remove_document("1") is True
+    assert idx.remove_document("1") is False
+    assert idx.search("new") == []
+    assert idx.avg_doc_length == 0.0
+
+
+def test_indexer_unicode_tokens():
+    idx = Indexer()
+    idx.index_document("pl", "Zażółć gęślą jaźń")
+    assert idx.search("GĘŚLĄ")[0][0] == "pl"
+
+
+@pytest.mark.asyncio
+async def test_index_source_registered_in_engine(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("inverted index makes search fast")
+    (docs / "b.md").write_text("unrelated notes")
+
+    idx = Indexer()
+    assert idx.index_paths([str(docs)]) == 2
+
+    engine = SearchEngine()
+    engine.register_source("index", IndexSearchSource(idx))
+    res = await engine.search("inverted", limit=5)
+    assert res["success"] is True
+    assert len(res["results"]) == 1
+    hit = res["results"][0]
+    assert hit["source"] == "index"
+    assert hit["metadata"]["path"].endswith("a.txt")
+    assert hit["metadata"]["bm25"] > 0
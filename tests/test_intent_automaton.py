@@ -0,0 +1,72 @@
+from dark8_core.nlp import EntityExtractor, IntentClassifier
+from dark8_core.nlp.keywords import KeywordAutomaton
+
+
+def test_automaton_reports_overlapping_keywords():
+    ac = KeywordAutomaton(["analizuj", "przeanalizuj kod", "kod", "he", "she", "hers"])
+    assert ac.matches("przeanalizuj kod") == {0, 1, 2}
+    assert ac.matches("ushers") == {3, 4, 5}
+    assert ac.matches("nic") == set()
+    assert sorted(ac.iter_matches("she")) == [(3, 3), (3, 4)]
+
+
+def test_classifier_keeps_declaration_order():
+    # "pokaż zawartość" contains LIST_FILES keywords declared before READ_FILE
+    assert IntentClassifier.classify("pokaż zawartość pliku")[0] == "LIST_FILES"
+    assert IntentClassifier.classify("zbuduj i wyszukaj")[0] == "BUILD_APP"
+    assert IntentClassifier.classify("xyz") == ("UNKNOWN", 0.0)
+
+
+def test_classifier_rebuilds_after_change(monkeypatch):
+    monkeypatch.setitem(IntentClassifier.INTENTS, "DEPLOY", ["wdróż"])
+    IntentClassifier.rebuild()
+    try:
+        assert IntentClassifier.classify("wdróż serwis")[0] == "DEPLOY"
+    finally:
+        monkeypatch.undo()
+        IntentClassifier.rebuild()
+    assert IntentClassifier.classify("wdróż serwis")[0] == "UNKNOWN"
+
+
+def test_entity_extractor_order():
+    assert EntityExtractor.extract("napisz w python i javascript z git") == {
+        "LANGUAGE": ["python", "javascript", "java"],
+        "TOOL": ["git"],
+    }
+
+
+def test_rozpoznaj_intencje_rebuilds_on_learned_form(tmp_path, monkeypatch):
+    from dark8_mark01 import dark8_intents_pl, dark8_learning
+
+    monkeypatch.setattr(dark8_learning, "LEARNING_FILE", str(tmp_path / "learned.json"))
+    typ = dark8_intents_pl.INTENT_PATTERNS[0]["typ"]
+    monkeypatch.setattr(
+        dark8_intents_pl, "INTENT_PATTERNS", [dict(i, wzorce=list(i["wzorce"])) for i in dark8_intents_pl.INTENT_PATTERNS]
+    )
+    try:
+        assert dark8_intents_pl.rozpoznaj_intencje("zrób coś (dziwnego") is None
+        # not a valid regex on its own -> matched literally
+        dark8_learning.learn_new_form("zrób coś (dziwnego", typ)
+        assert dark8_intents_pl.rozpoznaj_intencje("Zrób coś (dziwnego") == {"typ": typ}
+    finally:
+        monkeypatch.undo()
+        dark8_intents_pl.przebuduj_wzorce()
+
+
+def test_kompiluj_takes_non_local_forms_literally():
+    from dark8_mark01.dark8_intents_pl import _kompiluj
+
+    wzorzec, typy = _kompiluj(
+        [
+            {"typ": "a", "wzorce": [r"\bstart\b", "(?i)flaga", r"(x)\1"]},
+            {"typ": "b", "wzorce": ["(?P<n>raz)", "(?P<n>dwa)"]},
+        ]
+    )
+    assert typy == ["a", "a", "a", "b", "b"]
+    found = lambda t: {m.lastgroup for m in wzorzec.finditer(t)}
+    assert found("start") == {"_0"}
+    # inline flags and backreferences do not survive the combination -> literal text
+    assert found("(?i)flaga") == {"_1"} and found("flaga") == set()
+    assert found(r"(x)\1") == {"_2"} and found("xx") == set()
+    # a duplicate group name only breaks the combined regex: the later form goes literal
+    assert found("raz") == {"_3"} and found("(?P<n>dwa)") == {"_4"}
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+
+import pytest
+
+from dark8_core.nlp.onnx_intents import IntentBatcher
+
+
+class _EchoClassifier:
+    """Stands in for OnnxIntentClassifier: labels each text by its first word."""
+
+    def __init__(self, fail=False):
+        self.batch_sizes = []
+        self.fail = fail
+        self.threads = set()
+
+    def predict_batch(self, texts):
+        self.threads.add(threading.current_thread().name)
+        self.batch_sizes.append(len(texts))
+        if self.fail:
+            raise RuntimeError("model error")
+        return [(t.split()[0].upper(), 0.9) for t in texts]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch():
+    clf = _EchoClassifier()
+    batcher = IntentBatcher(clf, max_batch=32, window_ms=20)
+    try:
+        texts = [f"intent{i} tekst" for i in range(10)]
+        results = await asyncio.gather(*(batcher.classify(t) for t in texts))
+        assert results == [(f"INTENT{i}", 0.9) for i in range(10)]
+        assert clf.batch_sizes == [10]
+        assert all(name.startswith("dark8-intent") for name in clf.threads)
+    finally:
+        await batcher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batches_are_capped():
+    clf = _EchoClassifier()
+    batcher = IntentBatcher(clf, max_batch=4, window_ms=20)
+    try:
+        await asyncio.gather(*(batcher.classify(f"x{i}") for i in range(10)))
+        assert sum(clf.batch_sizes) == 10 and max(clf.batch_sizes) <= 4
+        assert batcher.stats()["requests"] == 10
+    finally:
+        await batcher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    batcher = IntentBatcher(_EchoClassifier(fail=True), window_ms=5)
+    try:
+        results = await asyncio.gather(batcher.classify("a"), batcher.classify("b"), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+    finally:
+        await batcher.aclose()
+
+
+@pytest.mark.asyncio
+async def test_confident_model_label_still_plans_agent_tasks(monkeypatch):
+    pytest.importorskip("fastapi")
+    from dark8_core.agent import Agent
+    from dark8_core.ui import api
+
+    class _Service:
+        def __init__(self, label):
+            self.label = label
+
+        async def classify(self, text):
+            return self.label, 0.99
+
+    monkeypatch.setattr(api, "intent_service", _Service("SEARCH_FILE"))
+    result = await api.understand("wyświetl pliki z raportem")
+    assert result["intent"] == "SEARCH"
+    assert Agent()._plan_tasks(result["intent"], result["entities"], "wyświetl pliki z raportem")
+
+    # a label with no pipeline counterpart keeps the keyword intent
+    monkeypatch.setattr(api, "intent_service", _Service("SHUTDOWN"))
+    assert (await api.understand("szukaj raportu"))["intent"] == "SEARCH"
+
+
+def test_model_labels_map_onto_pipeline_intents():
+    from dark8_core.agent import Agent
+    from dark8_core.nlp.onnx_intents import pipeline_intent
+
+    assert pipeline_intent("SEARCH_FILE") == "SEARCH"
+    assert pipeline_intent("LIST_DIR") == "LIST_FILES"
+    assert pipeline_intent("SHUTDOWN") is None
+    assert Agent()._plan_tasks(pipeline_intent("SEARCH_FILE"), {}, "znajdź raport")
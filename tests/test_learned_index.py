@@ -0,0 +1,31 @@
+from dark8_core.nlp.learned import LearnedPatternIndex
+
+
+def test_prefix_lookup_prefers_newest():
+    index = LearnedPatternIndex()
+    index.add("Zbuduj  aplikację webową", "BUILD_APP", 0.9)
+    index.add("zbuduj raport", "ANALYZE", 0.7)
+    assert index.lookup("zbuduj aplikację") == ("BUILD_APP", 0.9)
+    assert index.lookup("ZBUDUJ") == ("ANALYZE", 0.7)
+    assert index.lookup("zbuduj x") is None
+    assert index.lookup("") is None
+
+
+def test_relearning_replaces_intent():
+    index = LearnedPatternIndex()
+    index.add("pokaż pliki", "LIST_FILES", 0.8)
+    index.add("pokaż pliki", "READ_FILE", 0.6)
+    assert len(index) == 1
+    assert index.lookup("pokaż") == ("READ_FILE", 0.6)
+
+
+def test_listener_skips_failures_and_bounds_size():
+    index = LearnedPatternIndex(max_entries=2)
+    index.on_conversation("usuń plik", "DELETE", 0.9, {"success": False})
+    index.on_conversation("bez pewności", "HELP", 0.0)
+    assert len(index) == 0
+    for i in range(5):
+        index.on_conversation(f"komenda {i}", "EXECUTE", 0.8, {"success": True})
+    assert len(index) <= 4
+    assert "komenda 4" in index and "komenda 0" not in index
+    assert index.lookup("komenda 0") is None
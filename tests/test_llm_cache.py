@@ -0,0 +1,102 @@
+import pytest
+
+from dark8_core.llm import ReasoningEngine
+from dark8_core.llm.cache import LLMCache
+
+
+def test_memory_lru_is_bounded():
+    cache = LLMCache(max_memory=2)
+    for i in range(3):
+        cache.put(f"p{i}", f"r{i}")
+    assert cache.get("p0") is None
+    assert cache.get("p2") == "r2"
+    assert cache.get_stats()["size"] == 2
+
+
+def test_key_covers_model_temperature_and_system():
+    cache = LLMCache()
+    cache.put("prompt", "a", model="mistral", temperature=0.3, system="sys")
+    assert cache.get("prompt", model="mistral", temperature=0.3, system="sys") == "a"
+    assert cache.get("prompt", model="llama3", temperature=0.3, system="sys") is None
+    assert cache.get("prompt", model="mistral", temperature=0.7, system="sys") is None
+    assert cache.get("prompt", model="mistral", temperature=0.3, system="other") is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    cache = LLMCache(path=path, max_memory=1)
+    cache.put("a", "ra", model="m")
+    cache.put("b", "rb", model="m")
+    assert cache.get("a", model="m") == "ra"  # evicted from memory, read from disk
+    assert cache.get_stats()["disk_hits"] == 1
+    cache.close()
+
+    reopened = LLMCache(path=path)
+    assert reopened.get("b", model="m") == "rb"
+    assert reopened.get_stats()["disk_size"] == 2
+    reopened.clear()
+    assert reopened.get("b", model="m") is None
+
+
+def test_semantic_lookup_stays_in_scope():
+    vectors = {"jak naprawić błąd importu?": [1.0, 0.0], "jak naprawic blad importu": [0.99, 0.05], "inne": [0.0, 1.0]}
+    cache = LLMCache(semantic_threshold=0.95, embed=vectors.__getitem__)
+    cache.put("jak naprawić błąd importu?", "odpowiedź", model="m")
+    assert cache.get("jak naprawic blad importu", model="m") == "odpowiedź"
+    assert cache.get("jak naprawic blad importu", model="other") is None
+    assert cache.get("inne", model="m") is None
+    assert cache.get_stats()["semantic_hits"] == 1
+
+
+class _FakeClient:
+    model = "mistral"
+    temperature = 0.3
+    available = True
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, prompt, context=None):
+        self.prompts.append(prompt)
+        return "" if "fail" in prompt else f"answer {len(self.prompts)}"
+
+
+@pytest.mark.asyncio
+async def test_reasoning_engine_uses_cache():
+    client = _FakeClient()
+    engine = ReasoningEngine(client=client, cache=LLMCache())
+    first = await engine.reason("zbuduj aplikację")
+    assert await engine.reason("zbuduj aplikację") == first
+    assert await engine.code_review("x = 1") != first
+    await engine.explain_error("fail")
+    await engine.explain_error("fail")
+    # errors are not cached
+    assert len(client.prompts) == 4
+
+
+def test_semantic_scope_filters_before_top_k():
+    # many closer prompts of another model must not push this model's match out of the top k
+    vectors = {f"inny {i}": [1.0, 0.001 * i] for i in range(10)}
+    vectors.update({"pytanie": [1.0, 0.02], "zapytanie": [1.0, 0.0]})
+    cache = LLMCache(semantic_threshold=0.9, embed=vectors.__getitem__)
+    cache.put("pytanie", "moja odpowiedź", model="m")
+    for i in range(10):
+        cache.put(f"inny {i}", "cudza", model="other")
+    assert cache.get("zapytanie", model="m") == "moja odpowiedź"
+
+
+def test_evicted_entries_take_their_vectors_along(tmp_path):
+    vectors = {"a": [1.0, 0.0], "b": [0.0, 1.0], "a2": [0.99, 0.01]}
+    cache = LLMCache(max_memory=1, semantic_threshold=0.9, embed=vectors.__getitem__)
+    cache.put("a", "ra")
+    cache.put("b", "rb")  # memory-only: "a" is gone for good
+    assert sum(len(s) for s in cache._vectors.values()) == 1
+    assert cache.get("a2") is None
+
+    disk = LLMCache(path=str(tmp_path / "c.sqlite3"), max_disk=1, semantic_threshold=0.9, embed=vectors.__getitem__)
+    disk._puts = 998
+    disk.put("a", "ra")
+    disk.put("b", "rb")  # 1000th put prunes "a" from SQLite
+    assert sum(len(s) for s in disk._vectors.values()) == 1
+    assert disk.get("a2") is None
+    disk.close()
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from dark8_core.llm.gateway import GatewayBusy, GatewayTimeout, LLMGateway, llm_priority
+
+
+def test_limit_and_priority_order():
+    gw = LLMGateway(max_in_flight=1, aging_seconds=0)
+    order = []
+    hold = gw.slot("m", priority="agent")
+    hold.__enter__()
+
+    def worker(priority):
+        with gw.slot("m", priority=priority):
+            order.append(priority)
+
+    threads = []
+    for p in ("background", "agent", "interactive"):
+        t = threading.Thread(target=worker, args=(p,))
+        t.start()
+        threads.append(t)
+        time.sleep(0.02)
+    assert gw.stats()["m"]["in_flight"] == 1
+    hold.__exit__(None, None, None)
+    for t in threads:
+        t.join(2)
+    assert order == ["interactive", "agent", "background"]
+    stats = gw.stats()["m"]["priorities"]
+    assert stats["background"]["queue_wait"]["count"] == 1
+    assert stats["background"]["queue_wait"]["p95_ms"] >= stats["interactive"]["queue_wait"]["p95_ms"]
+
+
+def test_bounded_queue_rejects_and_timeout():
+    gw = LLMGateway(max_in_flight=1, max_queue={"background": 0, "agent": 1})
+    with gw.slot("m"):
+        with pytest.raises(GatewayBusy):
+            with gw.slot("m", priority="background"):
+                pass
+        with pytest.raises(GatewayTimeout):
+            with gw.slot("m", timeout=0.01):
+                pass
+        with gw.slot("other"):  # limits are per model
+            pass
+    stats = gw.stats()["m"]["priorities"]
+    assert stats["background"]["rejected"] == 1 and stats["agent"]["timed_out"] == 1
+    assert gw.stats()["m"]["in_flight"] == 0
+
+
+def test_waiting_background_work_ages_up():
+    gw = LLMGateway(max_in_flight=1, aging_seconds=0.05)
+    order = []
+    hold = gw.slot("m")
+    hold.__enter__()
+
+    def worker(priority):
+        with gw.slot("m", priority=priority):
+            order.append(priority)
+
+    bg = threading.Thread(target=worker, args=("background",))
+    bg.start()
+    time.sleep(0.2)  # four aging periods: background now outranks a fresh interactive request
+    fg = threading.Thread(target=worker, args=("interactive",))
+    fg.start()
+    time.sleep(0.02)
+    hold.__exit__(None, None, None)
+    bg.join(2)
+    fg.join(2)
+    assert order == ["background", "interactive"]
+
+
+@pytest.mark.asyncio
+async def test_async_slots_and_context_priority():
+    gw = LLMGateway(max_in_flight=2)
+    running, peak = 0, 0
+
+    async def call():
+        nonlocal running, peak
+        async with gw.aslot("m"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    with llm_priority("background"):
+        await asyncio.gather(*(call() for _ in range(6)))
+    assert peak == 2
+    stats = gw.stats()["m"]["priorities"]["background"]
+    assert stats["latency"]["count"] == 6 and gw.stats()["m"]["in_flight"] == 0
+
+
+def test_snapshot_prompts_queue_as_background(tmp_path, monkeypatch):
+    pytest.importorskip("requests")
+    import dark8_llm_os_api as os_api
+    from dark8_mark01.utils.dark8_code_reader import analyze_dark8_project
+
+    gw = LLMGateway(max_in_flight=1)
+    monkeypatch.setattr(os_api, "get_gateway", lambda: gw)
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"response": "ok"}
+
+    monkeypatch.setattr(os_api.requests, "post", lambda *a, **kw: Response())
+    for name in ("a.py", "b.py"):
+        (tmp_path / name).write_text("x = 1\n")
+
+    report = analyze_dark8_project(str(tmp_path))
+
+    assert report.count("ANALIZA PLIKU") == 2
+    priorities = gw.stats()["codellama:13b"]["priorities"]
+    assert priorities["background"]["latency"]["count"] == 2
+    assert priorities["agent"]["latency"]["count"] == 0
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from dark8_mark01.utils import dark8_llm_kernel_v3 as kernel  # noqa: E402
+
+
+@pytest.fixture
+def router(monkeypatch):
+    r = kernel.ModelRouter(half_life=60.0)
+    monkeypatch.setattr(kernel, "_router", r)
+    return r
+
+
+def test_prompt_size_and_kind_pick_the_model(router):
+    assert router.route("Jaka to intencja: 'pokaż pliki'?")[0] == "llama_main"
+    assert router.route("Przeanalizuj ten moduł krok po kroku")[0] == "qwen_boost"
+    assert router.route("x" * 3000)[0] == "qwen_boost"
+    assert router.route("krótko", preferred="qwen_boost")[0] == "qwen_boost"
+
+
+def test_latency_budget_and_errors_demote_a_model(router):
+    for _ in range(5):
+        router.record("llama_main", 4.0, tokens_per_sec=20.0)
+        router.record("qwen_boost", 1.0)
+    stats = router.stats("llama_main")
+    assert stats["p50"] == stats["p95"] == 4.0 and stats["tokens_per_sec"] == pytest.approx(20.0)
+    assert router.route("krótko", latency_budget=2.0) == ["qwen_boost", "llama_main"]
+    assert router.route("krótko", latency_budget=5.0)[0] == "llama_main"
+
+    for _ in range(20):
+        router.record("llama_main", None, ok=False)
+    assert router.stats("llama_main")["error_rate"] > 0.5
+    assert router.route("krótko")[0] == "qwen_boost"
+
+
+def test_failover_on_timeout_updates_stats(router, monkeypatch):
+    calls = []
+
+    def fake_generate(model, prompt, system_prompt=None, timeout=None, timing=None):
+        calls.append((model, timeout))
+        if model == kernel.LLM_MODELS["llama_main"]:
+            raise kernel.LLMKernelTimeout("[LLM TIMEOUT] test")
+        return "ok", {"eval_count": 50, "eval_duration": 1e9}
+
+    monkeypatch.setattr(kernel, "_ollama_generate", fake_generate)
+    assert kernel.llm_kernel_generate("klasyfikuj", latency_budget=3.0) == "ok"
+    assert [m for m, _ in calls] == ["llama3.2:1b", "qwen2.5:1.5b"] and calls[0][1] == 3.0
+    assert router.stats("llama_main")["error_rate"] == 1.0
+    assert router.stats("qwen_boost")["tokens_per_sec"] == pytest.approx(50.0)
+
+    with pytest.raises(kernel.LLMKernelError):
+        kernel.llm_kernel_generate("klasyfikuj", model_name="llama_main", allow_fallback=False)
+
+
+def test_gateway_rejection_is_not_a_model_failure(router, monkeypatch):
+    from dark8_core.llm.gateway import LLMGateway
+
+    gw = LLMGateway(max_in_flight=1, max_queue={"agent": 0})
+    monkeypatch.setattr(kernel, "get_gateway", lambda: gw)
+    with gw.slot(kernel.LLM_MODELS["llama_main"]):
+        with pytest.raises(kernel.LLMKernelBusy):
+            kernel.llm_kernel_generate("klasyfikuj", model_name="llama_main", allow_fallback=False)
+    assert router.stats("llama_main")["samples"] == 0
+
+
+def test_queue_wait_counts_against_the_timeout(monkeypatch):
+    from dark8_core.llm.gateway import LLMGateway
+
+    gw = LLMGateway(max_in_flight=1)
+    monkeypatch.setattr(kernel, "get_gateway", lambda: gw)
+    timeouts = []
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"response": "ok"}
+
+    def fake_post(url, json=None, timeout=None):
+        timeouts.append(timeout)
+        return Response()
+
+    monkeypatch.setattr(kernel.requests, "post", fake_post)
+    held = threading.Event()
+
+    def hold():
+        with gw.slot("m"):
+            held.set()
+            time.sleep(0.3)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(2)
+    assert kernel._ollama_generate("m", "p", timeout=5.0)[0] == "ok"
+    holder.join(2)
+    assert 0 < timeouts[0] <= 4.8
+
+
+def test_explicit_model_without_fallback_runs_even_when_degraded(router, monkeypatch):
+    for _ in range(5):
+        router.record("qwen_boost", None, ok=False)
+    calls = []
+
+    def fake_generate(model, prompt, system_prompt=None, timeout=None, timing=None):
+        calls.append(model)
+        return "ok", {}
+
+    monkeypatch.setattr(kernel, "_ollama_generate", fake_generate)
+    assert router.route("krótko", preferred="qwen_boost")[0] == "qwen_boost"
+    kernel.llm_kernel_generate("krótko", model_name="qwen_boost", allow_fallback=False)
+    assert calls == [kernel.LLM_MODELS["qwen_boost"]]
+
+
+def test_queue_wait_is_not_model_latency(router, monkeypatch):
+    from dark8_core.llm.gateway import LLMGateway
+
+    gw = LLMGateway(max_in_flight=1)
+    monkeypatch.setattr(kernel, "get_gateway", lambda: gw)
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"response": "ok"}
+
+    monkeypatch.setattr(kernel.requests, "post", lambda *a, **kw: Response())
+    model = kernel.LLM_MODELS["llama_main"]
+    held = threading.Event()
+
+    def hold():
+        with gw.slot(model):
+            held.set()
+            time.sleep(0.3)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait(2)
+    assert kernel.llm_kernel_generate("krótko", model_name="llama_main", allow_fallback=False) == "ok"
+    holder.join(2)
+    assert router.stats("llama_main")["p50"] < 0.2
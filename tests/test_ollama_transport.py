@@ -0,0 +1,132 @@
+import pytest
+
+from dark8_core.llm import OllamaClient
+from dark8_core.llm.transport import OllamaTransport
+
+
+class _Response:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+        self.text = str(self._data)
+
+    def json(self):
+        return self._data
+
+
+class _FakeHTTP:
+    """Stands in for httpx.AsyncClient: replies from a script, records calls."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+        self.is_closed = False
+
+    async def request(self, method, path, **kwargs):
+        self.calls.append((method, path))
+        return self.replies.pop(0)
+
+    async def aclose(self):
+        self.is_closed = True
+
+
+def _transport(replies, retries=2):
+    transport = OllamaTransport("http://ollama:11434/", retries=retries, backoff=0)
+    created = []
+
+    def new_client():
+        created.append(_FakeHTTP(replies))
+        return created[-1]
+
+    transport._new_client = new_client
+    return transport, created
+
+
+@pytest.mark.asyncio
+async def test_retries_unavailable_upstream():
+    transport, created = _transport([_Response(503), _Response(503), _Response(200)])
+    assert (await transport.request("GET", "/api/tags")).status_code == 200
+    assert len(created[0].calls) == 3
+
+    transport, _ = _transport([_Response(503), _Response(503)], retries=1)
+    assert (await transport.request("GET", "/api/tags")).status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_generation_posts_are_not_retried_once_they_may_have_run():
+    # 503: Ollama refused the request, nothing was generated -> safe to retry
+    transport, created = _transport([_Response(503), _Response(200)])
+    assert (await transport.request("POST", "/api/generate", json={})).status_code == 200
+    assert len(created[0].calls) == 2
+
+    # 504: the model may have generated behind the proxy -> do not send it again
+    transport, created = _transport([_Response(504), _Response(200)])
+    assert (await transport.request("POST", "/api/generate", json={})).status_code == 504
+    assert len(created[0].calls) == 1
+
+    # ...unless the caller says the request is idempotent
+    transport, created = _transport([_Response(504), _Response(200)])
+    assert (await transport.request("POST", "/api/show", json={}, idempotent=True)).status_code == 200
+
+
+def test_read_timeouts_are_not_connect_errors():
+    httpx = pytest.importorskip("httpx")
+    from dark8_core.llm.transport import is_connect_error
+
+    assert is_connect_error(httpx.ConnectError("refused"))
+    assert is_connect_error(httpx.ConnectTimeout("slow connect"))
+    assert not is_connect_error(httpx.ReadTimeout("slow model"))
+
+
+@pytest.mark.asyncio
+async def test_client_is_pooled_and_availability_is_lazy():
+    transport, created = _transport(
+        [_Response(200, {"models": []}), _Response(200, {"response": "a"}), _Response(200, {"response": "b"})]
+    )
+    client = OllamaClient(host="http://ollama:11434", transport=transport)
+    assert created == [] and not client.available
+
+    assert await client.generate("x") == "a"
+    assert await client.generate("y") == "b"
+    # one connection pool, a single availability probe
+    assert len(created) == 1
+    assert created[0].calls == [("GET", "/api/tags"), ("POST", "/api/generate"), ("POST", "/api/generate")]
+
+    await client.aclose()
+    assert created[0].is_closed
+
+
+@pytest.mark.asyncio
+async def test_unavailable_is_rechecked_later():
+    transport, created = _transport([_Response(500), _Response(200)])
+    client = OllamaClient(transport=transport)
+    assert not await client.check_availability()
+    assert not await client.check_availability()  # cached negative answer
+    assert await client.check_availability(refresh=True)
+    assert len(created[0].calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_generations_are_coalesced():
+    import asyncio
+
+    release = asyncio.Event()
+
+    class _Slow(_FakeHTTP):
+        async def request(self, method, path, **kwargs):
+            self.calls.append((method, path))
+            if path == "/api/generate":
+                await release.wait()
+                return _Response(200, {"response": kwargs["json"]["prompt"].upper()})
+            return _Response(200)
+
+    transport = OllamaTransport("http://ollama:11434", backoff=0)
+    fake = _Slow([])
+    transport._new_client = lambda: fake
+    client = OllamaClient(host="http://coalesce:11434", transport=transport)
+
+    tasks = [asyncio.ensure_future(client.generate(p)) for p in ("a", "a", "a", "b")]
+    await asyncio.sleep(0.01)
+    release.set()
+    assert await asyncio.gather(*tasks) == ["A", "A", "A", "B"]
+    assert fake.calls.count(("POST", "/api/generate")) == 2
@@ -0,0 +1,120 @@
+import sqlite3
+
+from dark8_core.agent.tools import db as db_tools
+from dark8_core.search import DatabaseSearchSource, FileSearchSource, parse_query
+from dark8_core.search.query import And, Not, Or, Phrase, Term, fold, to_fts5, to_like
+
+
+def test_parse_operators_phrases_fields_and_prefix():
+    node = parse_query('title:"ruch drogowy" OR kod* -java')
+    assert node == Or(
+        (
+            Phrase(("ruch", "drogowy"), field="title"),
+            And((Term("kod", prefix=True), Not(Term("java")))),
+        )
+    )
+    assert parse_query("python LUB rust") == Or((Term("python"), Term("rust")))
+    assert parse_query("a I NIE b") == And((Term("a"), Not(Term("b"))))
+    # punctuation is dropped instead of reaching MATCH
+    assert parse_query('tips & tricks! "unterminated') == And((Term("tips"), Term("tricks"), Term("unterminated")))
+    assert parse_query(" ?! ") is None
+    assert to_fts5(parse_query("-only")) is None
+
+
+def test_fold_keeps_offsets():
+    text = "Zażółć gęślą jaźń"
+    assert fold(text) == "zazolc gesla jazn"
+    assert len(fold(text)) == len(text)
+    # "İ".lower() is two characters long; it is kept as is
+    assert fold("İstanbul Łódź") == "İstanbul lodz"
+
+
+def test_phrase_with_l_keeps_adjacency(tmp_path):
+    assert to_fts5(parse_query('"stary most"')) == '"stary most"'
+    assert to_fts5(parse_query('"biala lodz"')) == (
+        '("biala lodz" OR "biala łodz" OR "biała lodz" OR "biała łodz")'
+    )
+    db_path = str(tmp_path / "phrase.db")
+    hit = db_tools.insert_document(db_path, "Biała łódź na jeziorze", {})
+    db_tools.insert_document(db_path, "łódź jest biała", {})
+    assert [r["id"] for r in db_tools.search_fts(db_path, '"biala lodz"')] == [hit]
+
+
+def test_fts_handles_punctuation_diacritics_and_prefix(tmp_path):
+    db_path = str(tmp_path / "q.db")
+    pl = db_tools.insert_document(db_path, "Spotkanie w Łodzi, kraków", {"title": "Łódź przewodnik"})
+    en = db_tools.insert_document(db_path, "python programming: tips & tricks", {"title": "guide"})
+
+    assert [r["id"] for r in db_tools.search_fts(db_path, "lodz")] == [pl]
+    assert [r["id"] for r in db_tools.search_fts(db_path, "title:przewodnik")] == [pl]
+    assert [r["id"] for r in db_tools.search_fts(db_path, "tips & tricks!")] == [en]
+    assert [r["id"] for r in db_tools.search_fts(db_path, "progr*")] == [en]
+    assert db_tools.search_fts(db_path, "python -tips") == []
+    assert db_tools.search_fts(db_path, '"unbalanced (quote') == []
+
+
+def test_fts_without_prefix_index_is_migrated(tmp_path):
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        """
+        CREATE TABLE documents (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT,
+            content TEXT NOT NULL, tags TEXT, metadata TEXT);
+        CREATE VIRTUAL TABLE documents_fts USING fts5(
+            title, content, tags, content='documents', content_rowid='id');
+        INSERT INTO documents (content) VALUES ('prefix lookups');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    res = db_tools.ensure_fts5(db_path)
+    assert res["success"] is True and res["migrated"] is True
+    assert len(db_tools.search_fts(db_path, "look*")) == 1
+
+
+def test_like_fallback_compiles_boolean_query(tmp_path):
+    db = tmp_path / "plain.db"
+    conn = sqlite3.connect(str(db))
+    conn.execute("CREATE TABLE documents (id INTEGER PRIMARY KEY, content TEXT)")
+    conn.executemany(
+        "INSERT INTO documents (content) VALUES (?)",
+        [("alpha beta",), ("alpha gamma",), ("beta only 100%",)],
+    )
+    conn.commit()
+    conn.close()
+
+    where, params = to_like(parse_query("alpha -gamma"))
+    assert "NOT" in where and params == ["%alpha%", "%gamma%"]
+
+    src = DatabaseSearchSource(str(db))
+    assert [r.metadata["row_id"] for r in src.search_sync("alpha -gamma")] == [1]
+    assert [r.metadata["row_id"] for r in src.search_sync("beta")] == [1, 3]
+
+
+def test_file_source_folds_diacritics(tmp_path):
+    (tmp_path / "a.txt").write_text("intro\nNocleg w Łodzi\n")
+    hits = FileSearchSource([str(tmp_path)], exts={".txt"}).search_sync("lodzi")
+    assert len(hits) == 1
+    assert hits[0].snippet == "Nocleg w Łodzi"
+
+
+def test_punctuated_words_match_literally_outside_fts(tmp_path):
+    node = parse_query("Config.py")
+    assert node == Phrase(("config", "py"), raw="config.py")
+    assert to_fts5(node) == '"config py"'
+    assert to_like(parse_query("e-mail")) == ("content LIKE ? ESCAPE '\\'", ["%e-mail%"])
+
+    (tmp_path / "a.txt").write_text("see foo.bar and e-mail\n")
+    (tmp_path / "b.txt").write_text("foo bar, e mail\n")
+    files = FileSearchSource([str(tmp_path)], exts={".txt"})
+    assert [r.metadata["path"] for r in files.search_sync("foo.bar")] == [str(tmp_path / "a.txt")]
+    assert [r.metadata["path"] for r in files.search_sync("e-mail")] == [str(tmp_path / "a.txt")]
+
+    db = tmp_path / "plain.db"
+    conn = sqlite3.connect(str(db))
+    conn.execute("CREATE TABLE documents (id INTEGER PRIMARY KEY, content TEXT)")
+    conn.executemany("INSERT INTO documents (content) VALUES (?)", [("open config.py",), ("config py",)])
+    conn.commit()
+    conn.close()
+    assert [r.metadata["row_id"] for r in DatabaseSearchSource(str(db)).search_sync("config.py")] == [1]
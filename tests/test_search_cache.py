@@ -2,7 +2,15 @@ import time
 
 import pytest
 
-from dark8_core.search import SearchResult, SearchSource, SearchEngine
+from dark8_core.agent.tools import db as db_tools
+from dark8_core.search import (
+    DatabaseSearchSource,
+    FileSearchSource,
+    SearchCache,
+    SearchEngine,
+    SearchResult,
+    SearchSource,
+)
 
 
 class CountingSource(SearchSource):
@@ -48,3 +56,72 @@ async def test_cache_expiry():
     time.sleep(1.1)
     _ = await engine.search("q", limit=1)
     assert src.count == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_lru_eviction_and_counters():
+    engine = SearchEngine(cache_max_entries=2)
+    src = CountingSource()
+    engine.register_source("count", src)
+
+    await engine.search("a", limit=1)
+    await engine.search("b", limit=1)
+    await engine.search("a", limit=1)  # hit, "b" becomes least recently used
+    await engine.search("c", limit=1)  # evicts "b"
+    await engine.search("a", limit=1)  # still cached
+    assert src.count == 3
+
+    stats = engine.cache_stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_key_includes_extra_sources(tmp_path):
+    d1 = tmp_path / "one"
+    d2 = tmp_path / "two"
+    d1.mkdir()
+    d2.mkdir()
+    (d1 / "a.txt").write_text("shared word from one")
+    (d2 / "b.txt").write_text("shared word from two")
+
+    engine = SearchEngine()
+    r1 = await engine.search("shared", extra_sources=[FileSearchSource(paths=[str(d1)])])
+    r2 = await engine.search("shared", extra_sources=[FileSearchSource(paths=[str(d2)])])
+    assert r1["results"][0]["metadata"]["path"].endswith("a.txt")
+    assert r2["results"][0]["metadata"]["path"].endswith("b.txt")
+
+    # an equivalent ephemeral source reuses the cached entry
+    await engine.search("shared", extra_sources=[FileSearchSource(paths=[str(d1)])])
+    assert engine.cache_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidated_on_document_write(tmp_path):
+    db_path = str(tmp_path / "docs.db")
+    db_tools.insert_document(db_path, "first invalidation doc", {})
+
+    engine = SearchEngine()
+    engine.register_source("db", DatabaseSearchSource(db_path))
+    r1 = await engine.search("invalidation", limit=10)
+    assert len(r1["results"]) == 1
+
+    db_tools.insert_document(db_path, "second invalidation doc", {})
+    assert engine.cache_stats()["invalidations"] == 1
+    r2 = await engine.search("invalidation", limit=10)
+    assert len(r2["results"]) == 2
+
+
+def test_cache_byte_limit():
+    cache = SearchCache(max_entries=100, max_bytes=100)
+    cache.put("a", {"v": "x" * 40})
+    cache.put("b", {"v": "y" * 40})
+    cache.put("c", {"v": "z" * 40})
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["bytes"] <= 100
+    # oversized values are not cached at all
+    cache.put("big", {"v": "q" * 500})
+    assert cache.get("big") is None
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from dark8_core.search import SearchEngine, SearchResult, SearchSource
+
+
+class SleepySource(SearchSource):
+    def __init__(self, name: str, delay: float):
+        self.name = name
+        self.delay = delay
+
+    async def search(self, query: str, limit: int = 10):
+        await asyncio.sleep(self.delay)
+        return [SearchResult(source=self.name, score=0.5, snippet=query, metadata={})]
+
+
+class BlockingSource(SearchSource):
+    blocking = True
+
+    def __init__(self):
+        self.thread = None
+
+    def search_sync(self, query: str, limit: int = 10):
+        self.thread = threading.current_thread().name
+        time.sleep(0.2)
+        return [SearchResult(source="blocking", score=0.9, snippet=query, metadata={})]
+
+
+@pytest.mark.asyncio
+async def test_sources_run_concurrently():
+    engine = SearchEngine()
+    for i in range(4):
+        engine.register_source(f"s{i}", SleepySource(f"s{i}", 0.2))
+
+    start = time.perf_counter()
+    res = await engine.search("q", limit=10)
+    elapsed = time.perf_counter() - start
+
+    assert len(res["results"]) == 4
+    assert res["timed_out"] == [] and res["partial"] is False
+    assert elapsed < 0.6
+
+
+@pytest.mark.asyncio
+async def test_slow_source_times_out_with_partial_results():
+    engine = SearchEngine(source_timeout=0.1)
+    engine.register_source("fast", SleepySource("fast", 0.0))
+    engine.register_source("slow", SleepySource("slow", 1.0))
+
+    res = await engine.search("q", limit=10)
+    assert res["success"] is True
+    assert [r["source"] for r in res["results"]] == ["fast"]
+    assert res["timed_out"] == ["slow"]
+    assert res["partial"] is True
+
+    # partial answers are not cached
+    assert len(engine._cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_blocking_source_runs_off_loop():
+    engine = SearchEngine()
+    src = BlockingSource()
+    engine.register_source("blocking", src)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    res, _ = await asyncio.gather(engine.search("q"), ticker())
+    assert res["results"][0]["source"] == "blocking"
+    assert src.thread.startswith("dark8-search")
+    assert ticks == 10
+    engine.close()
+
+
+class CrawlingSource(SearchSource):
+    """A scan that would run for a long time, but honours its deadline."""
+
+    blocking = True
+    accepts_deadline = True
+
+    def __init__(self):
+        self.stopped = threading.Event()
+
+    def search_sync(self, query: str, limit: int = 10, deadline=None):
+        end = time.monotonic() + 5.0
+        while time.monotonic() < end and (deadline is None or time.monotonic() < deadline):
+            time.sleep(0.01)
+        self.stopped.set()
+        return []
+
+
+@pytest.mark.asyncio
+async def test_timed_out_scan_frees_its_worker():
+    engine = SearchEngine(source_timeout=0.1, max_workers=1)
+    crawler = CrawlingSource()
+    engine.register_source("crawler", crawler)
+    try:
+        res = await engine.search("q", fuzzy=False)
+        assert res["timed_out"] == ["crawler"]
+        # the thread gives up at the deadline instead of holding the only worker for 5s
+        assert await asyncio.get_running_loop().run_in_executor(None, crawler.stopped.wait, 1.0)
+
+        engine.unregister_source("crawler")
+        engine.register_source("blocking", BlockingSource())
+        engine.source_timeout = 1.0
+        res = await engine.search("q2", fuzzy=False)
+        assert res["timed_out"] == [] and res["results"][0]["source"] == "blocking"
+    finally:
+        engine.close()
+
@@ -39,3 +39,34 @@ def test_search_engine_falls_back_to_like_when_no_fts(tmp_path):
     results = res.get("results", [])
     # fallback should find via LIKE
     assert any(r.get("metadata", {}).get("row_id") == id1 for r in results)
+
+
+def test_fallback_sources_only_run_after_fts_miss(tmp_path):
+    from dark8_core.search import SearchResult, SearchSource
+
+    class ScanSource(SearchSource):
+        fallback = True
+
+        def __init__(self):
+            self.calls = 0
+
+        async def search(self, query, limit=10):
+            self.calls += 1
+            return [SearchResult(source="scan", score=0.5, snippet=query, metadata={"path": "x"})]
+
+    db_path = str(tmp_path / "engine_staged.db")
+    db_tools.insert_document(db_path, "the quick brown fox", {})
+    db_tools.reindex_all(db_path)
+
+    engine = SearchEngine()
+    engine.register_source("db", DatabaseSearchSource(db_path))
+    scan = ScanSource()
+    engine.register_source("scan", scan)
+
+    res = asyncio.run(engine.search("quick", limit=5, fuzzy=False))
+    assert [r["source"] for r in res["results"]] == ["db_fts"]
+    assert scan.calls == 0
+
+    res = asyncio.run(engine.search("zebra", limit=5, fuzzy=False))
+    assert [r["source"] for r in res["results"]] == ["scan"]
+    assert scan.calls == 1
@@ -0,0 +1,49 @@
+import pytest
+
+from dark8_core.search import RankingEngine, SearchEngine, SearchResult, SearchSource, make_snippet
+
+
+def test_make_snippet_cuts_matching_line_and_highlights():
+    text = "header\nsome Database notes here\nfooter"
+    assert make_snippet(text, "database") == "some <b>Database</b> notes here"
+    assert make_snippet(text, "database", highlight=False) == "some Database notes here"
+
+    long_line = "x" * 500 + " needle " + "y" * 500
+    snippet = make_snippet(long_line, "needle", width=100)
+    assert "<b>needle</b>" in snippet
+    assert len(snippet) <= 100 + len("<b></b>")
+
+
+def test_result_is_slotted_and_lazy():
+    r = SearchResult(source="db", score=0.5, metadata={"row_id": 1}, ref=1, text="a\nfind me\nb", query="find")
+    assert not hasattr(r, "__dict__")
+    assert r._snippet is None
+    copy = r.with_score(0.9)
+    assert copy._snippet is None and copy.ref == 1
+    assert r.snippet == "<b>find</b> me"
+    assert r.to_dict() == {"source": "db", "score": 0.5, "snippet": "<b>find</b> me", "metadata": {"row_id": 1}}
+
+
+class _ManyHits(SearchSource):
+    def __init__(self):
+        self.results = []
+
+    async def search(self, query, limit=10):
+        self.results = [
+            SearchResult(
+                source="many", score=i / 100, metadata={"doc_id": i}, ref=i, text=f"doc {i} {query}", query=query
+            )
+            for i in range(100)
+        ]
+        return self.results
+
+
+@pytest.mark.asyncio
+async def test_engine_extracts_snippets_only_for_top_k():
+    src = _ManyHits()
+    engine = SearchEngine(ranker=RankingEngine(method="score"))
+    engine.register_source("many", src)
+    res = await engine.search("term", limit=3)
+    assert [r["snippet"] for r in res["results"]] == ["doc 99 <b>term</b>", "doc 98 <b>term</b>", "doc 97 <b>term</b>"]
+    evaluated = [r for r in src.results if r._snippet is not None]
+    assert len(evaluated) == 3
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from dark8_core.llm.singleflight import SingleFlight, StreamFlight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result_and_survives_one_cancel():
+    group = SingleFlight()
+    calls = []
+    release = asyncio.Event()
+
+    async def work():
+        calls.append(1)
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(group.do(("k",), work))
+    second = asyncio.ensure_future(group.do(("k",), work))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await second == "done"
+    assert calls == [1] and group.joined == 1 and len(group) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_propagates_errors():
+    group = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0)
+        raise ValueError("upstream")
+
+    results = await asyncio.gather(group.do(("x",), boom), group.do(("x",), boom), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results) and group.started == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_late_joiner_gets_prefix_then_tail():
+    group = StreamFlight()
+    step = asyncio.Queue()
+    opened = []
+
+    async def source():
+        opened.append(1)
+        while True:
+            chunk = await step.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    async def collect(into):
+        async for chunk in group.stream(("p",), source):
+            into.append(chunk)
+
+    early, late = [], []
+    t1 = asyncio.ensure_future(collect(early))
+    await step.put("a")
+    await step.put("b")
+    await asyncio.sleep(0.01)
+    t2 = asyncio.ensure_future(collect(late))
+    await asyncio.sleep(0.01)
+    assert late == ["a", "b"]
+    await step.put("c")
+    await step.put(None)
+    await asyncio.gather(t1, t2)
+    assert early == late == ["a", "b", "c"]
+    assert opened == [1] and len(group) == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_is_cancelled_when_everyone_leaves():
+    group = StreamFlight()
+    closed = asyncio.Event()
+
+    async def source():
+        try:
+            while True:
+                yield "x"
+                await asyncio.sleep(0.001)
+        finally:
+            closed.set()
+
+    gen = group.stream(("p",), source)
+    assert await gen.__anext__() == "x"
+    await gen.aclose()
+    await asyncio.wait_for(closed.wait(), 1)
+    assert len(group) == 0
+
+
+@pytest.mark.asyncio
+async def test_joiner_raises_the_flight_priority():
+    from dark8_core.llm.gateway import LLMGateway, llm_priority
+
+    gw = LLMGateway(max_in_flight=1, aging_seconds=0)
+    group = SingleFlight()
+    order = []
+
+    async def call(name):
+        async with gw.aslot("m"):
+            order.append(name)
+
+    hold = gw.aslot("m")
+    await hold.__aenter__()
+    with llm_priority("background"):
+        flight = asyncio.ensure_future(group.do(("k",), lambda: call("flight")))
+    with llm_priority("agent"):
+        other = asyncio.ensure_future(call("agent"))
+    await asyncio.sleep(0.01)
+    # an interactive caller joins the queued background flight: it jumps the agent call
+    with llm_priority("interactive"):
+        joined = asyncio.ensure_future(group.do(("k",), lambda: call("never")))
+    await asyncio.sleep(0.01)
+    assert gw.stats()["m"]["priorities"]["interactive"]["queued"] == 1
+    await hold.__aexit__(None, None, None)
+    await asyncio.gather(flight, other, joined)
+    assert order == ["flight", "agent"]
+
+
+@pytest.mark.asyncio
+async def test_flights_are_kept_per_loop_object():
+    group = SingleFlight()
+
+    async def work():
+        return asyncio.get_running_loop()
+
+    assert await group.do(("k",), work) is asyncio.get_running_loop()
+    assert len(group) == 0 and len(group._flights._by_loop) == 1
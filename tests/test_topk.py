@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+from dark8_core.search import FileSearchSource, RankingEngine, SearchEngine, SearchResult, SearchSource, TopK
+
+
+def _r(score, name="s"):
+    return SearchResult(source=name, score=score, snippet=f"{score}", metadata={"doc_id": f"{name}{score}"})
+
+
+def test_topk_keeps_best_and_tracks_threshold():
+    topk = TopK(3)
+    assert topk.threshold == float("-inf")
+    for score in (0.1, 0.9, 0.5, 0.3, 0.7):
+        topk.push(_r(score))
+    assert [r.score for r in topk.results()] == [0.9, 0.7, 0.5]
+    assert topk.threshold == 0.5
+    assert not topk.accepts(0.4) and topk.accepts(0.6)
+
+
+def test_rank_with_limit_matches_full_sort():
+    rng = random.Random(7)
+    results = [_r(round(rng.random(), 2), f"s{i % 3}") for i in range(200)]
+    for method in ("score", "rrf", "weighted"):
+        ranker = RankingEngine(method=method)
+        full = ranker.rank(list(results))
+        assert [r.score for r in ranker.rank(list(results), limit=10)] == [r.score for r in full[:10]]
+
+
+def test_file_source_stops_once_threshold_is_perfect(tmp_path):
+    for i in range(5):
+        (tmp_path / f"f{i}.txt").write_text("needle here")
+    topk = TopK(2)
+    topk.push_many([_r(1.0, "a"), _r(1.0, "b")])
+    src = FileSearchSource([str(tmp_path)], exts={".txt"})
+    assert src.search_sync("needle", limit=5, topk=topk) == []
+    assert len(src.search_sync("needle", limit=5)) == 5
+
+
+class _Perfect(SearchSource):
+    async def search(self, query, limit=10):
+        return [_r(1.0, "perfect") for _ in range(limit)]
+
+
+@pytest.mark.asyncio
+async def test_engine_shares_threshold_with_sources(tmp_path):
+    (tmp_path / "a.txt").write_text("needle")
+    seen = []
+
+    class Recording(FileSearchSource):
+        def search_sync(self, query, limit=10, topk=None, **kwargs):
+            seen.append(topk)
+            return super().search_sync(query, limit, topk=topk, **kwargs)
+
+    engine = SearchEngine(ranker=RankingEngine(method="score"))
+    engine.register_source("perfect", _Perfect())
+    engine.register_source("files", Recording([str(tmp_path)], exts={".txt"}))
+    try:
+        res = await engine.search("needle", limit=2)
+        assert len(res["results"]) == 2
+        assert isinstance(seen[0], TopK)
+    finally:
+        engine.close()
+
+
+def test_rrf_votes_only_down_to_limit():
+    # "x" is last in a long list: beyond the fusion depth it gets no vote from "a"
+    results = [_r(1.0 - i / 100, "a") for i in range(20)] + [_r(0.1, "b")]
+    results[19].metadata["doc_id"] = "x"
+    results[20].metadata["doc_id"] = "x"
+    ranker = RankingEngine(method="rrf")
+    fused = {r.metadata["doc_id"]: r.score for r in ranker.rank(list(results), limit=3)}
+    assert fused["x"] == pytest.approx(0.5)
+    full = {r.metadata["doc_id"]: r.score for r in ranker.rank(list(results))}
+    assert full["x"] > 0.5
+
+
+class _CountingFiles(FileSearchSource):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.walked = 0
+
+    def _walk(self):
+        for p in super()._walk():
+            self.walked += 1
+            yield p
+
+
+def test_file_source_stops_the_whole_walk_mid_scan(tmp_path):
+    roots = []
+    for r in range(3):
+        root = tmp_path / f"r{r}"
+        root.mkdir()
+        for i in range(4):
+            (root / f"f{i}.txt").write_text("needle" if r == 0 and i < 2 else "other")
+        roots.append(str(root))
+    topk = TopK(2)
+    src = _CountingFiles(roots, exts={".txt"})
+    # k perfect hits come from the first root; the other roots are never read
+    assert len(src.search_sync("needle", limit=10, topk=topk)) == 2
+    assert topk.threshold == 1.0 and src.walked <= 4
+
+    src = _CountingFiles(roots, exts={".txt"})
+    assert len(src.search_sync("needle", limit=10)) == 2
+    assert src.walked == 12
+
+
+@pytest.mark.asyncio
+async def test_score_ranker_lets_later_scans_read_less(tmp_path):
+    for i in range(6):
+        (tmp_path / f"f{i}.txt").write_text("needle")
+
+    async def walked(ranker, perfect):
+        files = _CountingFiles([str(tmp_path)], exts={".txt"})
+        engine = SearchEngine(ranker=ranker)
+        if perfect:
+            engine.register_source("perfect", _Perfect())
+        engine.register_source("files", files)
+        try:
+            await engine.search("needle", limit=2, fuzzy=False)
+        finally:
+            engine.close()
+        return files.walked
+
+    # the cheap source fills the shared top-k first; the file walk then stops at once
+    assert await walked(RankingEngine(method="score"), perfect=True) == 0
+    assert await walked(RankingEngine(method="score"), perfect=False) == 2
+    # fused ranks have no shared threshold: the walk reads its own `limit` hits
+    assert await walked(RankingEngine(method="rrf"), perfect=True) == 2
@@ -0,0 +1,81 @@
+import pytest
+
+from dark8_core.agent.tools import db as db_tools
+from dark8_core.search import SearchEngine
+from dark8_core.search.sources import DatabaseSearchSource
+
+
+def test_trigram_candidates_follow_writes(tmp_path):
+    db_path = str(tmp_path / "tri.db")
+    doc_id = db_tools.insert_document(db_path, "configuration of the scheduler", {})
+    db_tools.insert_document(db_path, "unrelated text about cats", {})
+
+    # opt-in: reads never build the index
+    assert db_tools.search_trigram(db_path, "schedular") == []
+    assert db_tools.has_trigram_index(db_path) is False
+
+    assert db_tools.ensure_trigram_index(db_path)["success"]
+    hits = db_tools.search_trigram(db_path, "schedular")
+    assert hits and hits[0]["id"] == doc_id
+
+    # index was built from the existing rows; triggers keep it in sync from now on
+    new_id = db_tools.insert_document(db_path, "schedule planner", {})
+    assert new_id in {h["id"] for h in db_tools.search_trigram(db_path, "schedul")}
+    db_tools.delete_document(db_path, new_id)
+    assert new_id not in {h["id"] for h in db_tools.search_trigram(db_path, "schedul")}
+
+    assert db_tools.search_trigram(db_path, "ab") == []
+
+
+def test_fuzzy_source_tolerates_typos(tmp_path):
+    db_path = str(tmp_path / "typo.db")
+    doc_id = db_tools.insert_document(db_path, "intro line\nrestart the database server\nfooter", {})
+    db_tools.insert_document(db_path, "something else entirely", {})
+    db_tools.ensure_trigram_index(db_path)
+
+    src = DatabaseSearchSource(db_path)
+    # LIKE scan cannot see through the typo
+    assert src.search_sync("databse") == []
+    hits = src.search_fuzzy_sync("databse")
+    assert [h.metadata["row_id"] for h in hits] == [doc_id]
+    assert hits[0].snippet == "restart the database server"
+    assert 0.5 <= hits[0].score < 1.0
+
+
+@pytest.mark.asyncio
+async def test_engine_fuzzy_path_uses_trigram_prefilter(tmp_path):
+    db_path = str(tmp_path / "engine.db")
+    doc_id = db_tools.insert_document(db_path, "kubernetes deployment notes", {})
+    db_tools.ensure_trigram_index(db_path)
+
+    engine = SearchEngine()
+    engine.register_source("db", DatabaseSearchSource(db_path))
+    try:
+        res = await engine.search("kubernetis", limit=5, fuzzy=True)
+        assert [r["metadata"]["row_id"] for r in res["results"]] == [doc_id]
+
+        strict = await engine.search("kubernetis", limit=5, fuzzy=False)
+        assert strict["results"] == []
+    finally:
+        engine.close()
+
+
+@pytest.mark.asyncio
+async def test_engine_skips_fuzzy_when_exact_search_matches(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "exact.db")
+    db_tools.insert_document(db_path, "kubernetes deployment notes", {})
+    db_tools.ensure_trigram_index(db_path)
+    src = DatabaseSearchSource(db_path)
+    calls = []
+    original = src.search_fuzzy_sync
+    monkeypatch.setattr(src, "search_fuzzy_sync", lambda *a, **kw: calls.append(a) or original(*a, **kw))
+
+    engine = SearchEngine()
+    engine.register_source("db", src)
+    try:
+        res = await engine.search("kubernetes", limit=5, fuzzy=True)
+        assert res["results"] and calls == []
+        await engine.search("kubernetis", limit=5, fuzzy=True)
+        assert len(calls) == 1
+    finally:
+        engine.close()
@@ -0,0 +1,79 @@
+import numpy as np
+
+from dark8_core.nlp.bert import SemanticSimilarityEngine
+from dark8_core.nlp.vector_store import VectorStore
+from dark8_core.search.vector import encode_embedding
+
+
+def _vectors(n, dim, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_exact_search_matches_brute_force():
+    vecs = _vectors(200, 16)
+    store = VectorStore(dim=16)
+    store.add_many([f"v{i}" for i in range(200)], vecs)
+
+    q = vecs[:3] + 0.01
+    normed = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+    expected = np.argsort(-(normed @ (q / np.linalg.norm(q, axis=1, keepdims=True)).T), axis=0)[:5].T
+    for hits, exp in zip(store.search_many(q, k=5), expected):
+        assert [h[0] for h in hits] == [f"v{i}" for i in exp]
+    assert store.search(vecs[7], k=1)[0][0] == "v7"
+
+
+def test_delete_and_reuse_slot():
+    store = VectorStore(dim=4)
+    store.add("a", [1, 0, 0, 0], {"t": "a"})
+    store.add("b", [0, 1, 0, 0])
+    assert store.delete("a") and not store.delete("a")
+    assert [h[0] for h in store.search([1, 0, 0, 0], k=5)] == ["b"]
+    store.add("c", [1, 0, 0, 0])
+    assert len(store) == 2 and store.search([1, 0, 0, 0], k=1)[0][0] == "c"
+
+
+def test_persists_across_restarts(tmp_path):
+    path = tmp_path / "kb"
+    store = VectorStore(dim=8, path=str(path), initial_capacity=2)
+    vecs = _vectors(50, 8)
+    store.add_many([str(i) for i in range(50)], vecs, [{"n": i} for i in range(50)])
+    store.delete("3")
+    store.add("4", vecs[10], {"n": "replaced"})
+    store.flush()
+
+    reopened = VectorStore(dim=8, path=str(path))
+    assert len(reopened) == 49 and "3" not in reopened
+    assert reopened.search(vecs[10], k=2)[0][0] in {"4", "10"}
+    assert reopened.get("4")[1] == {"n": "replaced"}
+
+    reopened.compact()
+    again = VectorStore(dim=8, path=str(path))
+    assert sorted(again.ids(), key=int) == sorted(reopened.ids(), key=int)
+
+
+def test_ivf_search_recall_on_large_index():
+    vecs = _vectors(3000, 32, seed=1)
+    store = VectorStore(dim=32, exact_threshold=1000, nprobe=8)
+    store.add_many(range(3000), vecs)
+    hits = store.search_many(vecs[:50], k=1)
+    recall = sum(h[0][0] == str(i) for i, h in enumerate(hits)) / 50
+    assert recall >= 0.9
+    # appends after training are assigned to a cluster immediately
+    store.add("new", vecs[5] * 2)
+    assert {h[0] for h in store.search(vecs[5], k=2)} == {"5", "new"}
+
+
+def test_similarity_engine_uses_store(tmp_path):
+    engine = SemanticSimilarityEngine(store_path=str(tmp_path / "sim"))
+    engine.add_to_knowledge("zbuduj aplikację", "BUILD_APP", item_id="x")
+    engine.add_to_knowledge("szukaj w sieci", "SEARCH")
+    top = engine.find_similar("zbuduj aplikację", top_k=1)[0]
+    assert top["intent"] == "BUILD_APP" and abs(top["similarity"] - 1.0) < 1e-5
+
+    emb = engine.bert.get_embedding("wzorzec singleton")
+    n = engine.add_knowledge_items([{"id": 7, "title": "singleton", "content": "", "embedding": encode_embedding(emb)}])
+    assert n == 1
+    assert engine.find_similar("wzorzec singleton", top_k=1)[0]["id"] == "knowledge:7"
+
+    restarted = SemanticSimilarityEngine(store_path=str(tmp_path / "sim"))
+    assert len(restarted.knowledge_base) == 3